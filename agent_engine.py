@@ -2,19 +2,32 @@
 ESG-Radar Multi-Agent System
 LangGraph 기반 3단계 검증 시스템:
 1. Integrity Engine: 데이터 정합성 및 K-ESG 5대 항목 검증
-2. Green Audit: 그린워싱 위험 탐지
+2. Green Audit: 그린워싱 위험 탐지 (Integrity Engine과 병렬 실행)
 3. Report Generator: 최종 점수 및 인증서 생성
 """
 
 import os
 import logging
-from typing import TypedDict, Annotated, List, Dict
+from typing import TypedDict, Annotated, List, Dict, Optional, Callable
 from operator import add
 
-from langchain_openai import ChatOpenAI
+from backends import make_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.graph import StateGraph, END
 from rag_engine import ESG_RAG
+from metrics import span, collect_timings, current_timings
+
+
+# K-ESG 체크리스트 점검 방식
+# batched: 모든 항목을 LLM 한 번의 구조화된(JSON) 응답으로 판정 (실패 시 per_item으로 대체)
+# per_item: 항목마다 질문하고 답변 문구로 공개 여부 판단
+CHECKLIST_MODE = os.getenv("ESG_CHECKLIST_MODE", "batched")
+
+# 표의 수치만으로 판정할 수 있는 항목 → numeric_extractor 지표 키
+# 에너지/용수/폐기물은 질문이 비율(재생에너지·재활용률)까지 묻는데 추출기는 사용량만 찾으므로 LLM으로 점검
+FACT_METRICS = {
+    "ghg": ["scope1", "scope2", "scope3"],
+}
 
 
 # State 정의
@@ -46,41 +59,78 @@ class ESGRadarState(TypedDict):
 class ESGRadarAgent:
     """ESG-Radar Multi-Agent 시스템"""
     
-    def __init__(self, pdf_path: str, api_key: str):
+    def __init__(self, pdf_path: str, api_key: str, progress_callback: Optional[Callable[[Dict], None]] = None,
+                 rag: Optional[ESG_RAG] = None, previous_doc_hash: Optional[str] = None):
         self.pdf_path = pdf_path
         self.api_key = api_key
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0,
-            openai_api_key=api_key,
-            request_timeout=90
-        )
-        
-        # RAG 엔진 초기화
-        self.rag = ESG_RAG(pdf_path, api_key)
+        self.progress_callback = progress_callback
+        self.llm = make_chat_model("gpt-4o", api_key, request_timeout=90)
+        
+        # RAG 엔진 초기화 (세션 레지스트리 등에서 이미 만든 엔진이 있으면 재사용)
+        if rag is None:
+            self._notify("node_start", node="indexing")
+            rag = ESG_RAG(pdf_path, api_key, previous_doc_hash=previous_doc_hash)
+            self._notify("node_done", node="indexing")
+        elif previous_doc_hash and rag.previous_doc_hash != previous_doc_hash:
+            rag.use_previous_version(previous_doc_hash)
+        self.rag = rag
+        self.previous_doc_hash = previous_doc_hash  # 이 분석에서 요청한 이전 버전 (리포트의 incremental 표시용)
         
         # StateGraph 구성
         self.workflow = self._build_workflow()
         self.app = self.workflow.compile()
     
+    def _notify(self, event: str, **data):
+        """진행 상황 콜백 호출 (콜백 오류는 분석에 영향을 주지 않음)"""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback({"event": event, **data})
+        except Exception as e:
+            logging.warning(f"진행 상황 보고 실패: {str(e)}")
+    
+    def _incremental_stats(self):
+        """이 분석에서 이전 버전을 요청했으면 페이지 비교 결과 + 이번 실행에서 재사용한 답변 수, 아니면 None"""
+        if not self.previous_doc_hash or self.rag.previous_doc_hash != self.previous_doc_hash:
+            return None
+        timings = current_timings()
+        answers_reused = timings.as_dict()["counters"].get("answers_reused", 0) if timings is not None else 0
+        return self.rag.incremental_stats(answers_reused)
+    
+    def _question_progress(self, node: str, total: int):
+        """ask_many의 on_result에 넘길 질문 단위 진행 보고 함수"""
+        def on_result(index, result):
+            self._notify("question_done", node=node, index=index, total=total,
+                         error=isinstance(result, Exception))
+        return on_result
+    
     def _build_workflow(self) -> StateGraph:
         """LangGraph workflow 구성"""
         workflow = StateGraph(ESGRadarState)
         
         # 노드 추가
-        workflow.add_node("integrity_engine", self.integrity_engine_node)
-        workflow.add_node("green_audit", self.green_audit_node)
-        workflow.add_node("report_generator", self.report_generator_node)
+        workflow.add_node("integrity_engine", self._timed("integrity_engine", self.integrity_engine_node))
+        workflow.add_node("green_audit", self._timed("green_audit", self.green_audit_node))
+        workflow.add_node("report_generator", self._timed("report_generator", self.report_generator_node))
         
-        # 엣지 연결
+        # 엣지 연결: Integrity Engine과 Green Audit은 서로의 결과를 쓰지 않으므로
+        # 진입점에서 동시에 실행하고, 둘 다 끝나면 Report Generator에서 합류
         workflow.set_entry_point("integrity_engine")
-        workflow.add_edge("integrity_engine", "green_audit")
-        workflow.add_edge("green_audit", "report_generator")
+        workflow.set_entry_point("green_audit")
+        workflow.add_edge(["integrity_engine", "green_audit"], "report_generator")
         workflow.add_edge("report_generator", END)
         
         return workflow
     
-    def integrity_engine_node(self, state: ESGRadarState) -> ESGRadarState:
+    @staticmethod
+    def _timed(node: str, func: Callable[[ESGRadarState], Dict]) -> Callable[[ESGRadarState], Dict]:
+        """노드 실행 시간을 graph.<노드명> 구간으로 계측"""
+        def run(state: ESGRadarState) -> Dict:
+            with span(f"graph.{node}"):
+                return func(state)
+        return run
+    
+    def integrity_engine_node(self, state: ESGRadarState) -> Dict:
         """
         Node 1: 데이터 정합성 검증 엔진
         - K-ESG 5대 필수 항목 체크
@@ -88,6 +138,7 @@ class ESGRadarAgent:
         - 교차 검증 로직
         """
         logging.info("🔍 Integrity Engine 시작...")
+        self._notify("node_start", node="integrity_engine")
         
         # K-ESG 5대 필수 항목
         k_esg_items = {
@@ -113,62 +164,146 @@ class ESGRadarAgent:
             }
         }
         
-        # 각 항목 검증
-        checklist_results = {}
-        total_found = 0
-        
-        for key, item in k_esg_items.items():
-            answer, sources, pages = self.rag.ask(item["query"])
-            
-            # 데이터 존재 여부 판단
-            has_data = "찾을 수 없습니다" not in answer and "없습니다" not in answer[:30]
-            if has_data:
-                total_found += 1
-            
-            checklist_results[key] = {
-                "title": item["title"],
-                "found": has_data,
-                "answer": answer,
-                "sources": sources,
-                "pages": pages
-            }
-        
-        # Decoupling 분석
+        # Decoupling 분석 질문
         decoupling_query = """
         매출액, 생산량 등 사업 성과와 온실가스 배출량, 에너지 사용량의 탈동조화(Decoupling) 추이가 설명되어 있습니까?
         예를 들어 '매출 증가에도 불구하고 배출량은 감소' 같은 설명이 있는지 확인하고, 
         구체적인 수치와 비교 연도를 알려주세요.
         """
-        decoupling_answer, decoupling_sources, decoupling_pages = self.rag.ask(decoupling_query)
-        
-        has_decoupling = "찾을 수 없습니다" not in decoupling_answer and len(decoupling_answer) > 50
         
-        decoupling_analysis = {
-            "explained": has_decoupling,
-            "answer": decoupling_answer,
-            "sources": decoupling_sources,
-            "pages": decoupling_pages
+        # 사전 추출한 수치로 확정되는 항목은 LLM 없이 답변
+        fast_results = {}
+        for key, metrics in FACT_METRICS.items():
+            result = self.rag.answer_from_facts(metrics)
+            if result is not None:
+                answer, sources, pages = result
+                fast_results[key] = {"title": k_esg_items[key]["title"], "found": True,
+                                     "answer": answer, "sources": sources, "pages": pages}
+                self._notify("item_done", node="integrity_engine", key=key, item=fast_results[key])
+        if fast_results:
+            logging.info(f"수치 사전 추출로 확인된 항목: {', '.join(fast_results)}")
+        remaining_items = {key: item for key, item in k_esg_items.items() if key not in fast_results}
+        
+        checklist_results = None
+        decoupling_analysis = None
+        if CHECKLIST_MODE == "batched":
+            checklist_results, decoupling_analysis = self._check_items_batched(remaining_items, decoupling_query)
+        if checklist_results is None:
+            checklist_results, decoupling_analysis = self._check_items_per_item(remaining_items, decoupling_query)
+        checklist_results = {
+            key: fast_results[key] if key in fast_results else checklist_results[key]
+            for key in k_esg_items
         }
         
+        total_found = sum(1 for item in checklist_results.values() if item["found"])
+        has_decoupling = decoupling_analysis["explained"]
+        
         # 정합성 점수 계산 (0-100)
         base_score = (total_found / len(k_esg_items)) * 70  # 5대 항목: 70점
         decoupling_bonus = 30 if has_decoupling else 0  # Decoupling: 30점
         integrity_score = min(100, base_score + decoupling_bonus)
         
-        state["k_esg_checklist"] = checklist_results
-        state["decoupling_analysis"] = decoupling_analysis
-        state["integrity_score"] = round(integrity_score, 1)
-        state["integrity_findings"] = {
-            "total_items": len(k_esg_items),
-            "items_found": total_found,
-            "completion_rate": round((total_found / len(k_esg_items)) * 100, 1)
+        logging.info(f"✅ Integrity Score: {integrity_score}점")
+        self._notify("node_done", node="integrity_engine", score=round(integrity_score, 1))
+        
+        # 병렬 브랜치이므로 state를 직접 수정하지 않고 변경분만 반환
+        return {
+            "k_esg_checklist": checklist_results,
+            "decoupling_analysis": decoupling_analysis,
+            "integrity_score": round(integrity_score, 1),
+            "integrity_findings": {
+                "total_items": len(k_esg_items),
+                "items_found": total_found,
+                "completion_rate": round((total_found / len(k_esg_items)) * 100, 1)
+            },
+            "messages": [f"✅ Integrity Engine 완료: {integrity_score}점"]
+        }
+    
+    def _check_items_batched(self, k_esg_items: Dict, decoupling_query: str):
+        """5대 항목 + Decoupling을 한 번의 구조화된 LLM 호출로 점검 (실패 시 (None, None))"""
+        items = {key: item["query"] for key, item in k_esg_items.items()}
+        items["decoupling"] = decoupling_query
+        try:
+            results = self.rag.ask_checklist(items)
+        except Exception as e:
+            logging.warning(f"체크리스트 일괄 점검 실패, 항목별 질문으로 대체: {str(e)}")
+            return None, None
+        
+        on_result = self._question_progress("integrity_engine", len(items))
+        for index, key in enumerate(items):
+            on_result(index, results[key])
+        
+        checklist_results = {
+            key: {"title": item["title"], **results[key]}
+            for key, item in k_esg_items.items()
         }
-        state["messages"] = [f"✅ Integrity Engine 완료: {integrity_score}점"]
+        for key, item in checklist_results.items():
+            self._notify("item_done", node="integrity_engine", key=key, item=item)
+        decoupling = results["decoupling"]
+        decoupling_analysis = {
+            "explained": decoupling["found"],
+            "answer": decoupling["answer"],
+            "sources": decoupling["sources"],
+            "pages": decoupling["pages"]
+        }
+        return checklist_results, decoupling_analysis
+    
+    @staticmethod
+    def _judge_item(item: Dict, result) -> Dict:
+        """ask 결과(또는 예외) → 체크리스트 항목 결과"""
+        if isinstance(result, Exception):
+            answer, sources, pages = f"질문 처리 중 오류 발생: {str(result)}", [], []
+            has_data = False
+        else:
+            answer, sources, pages = result
+            # 데이터 존재 여부 판단
+            has_data = "찾을 수 없습니다" not in answer and "없습니다" not in answer[:30]
+        return {
+            "title": item["title"],
+            "found": has_data,
+            "answer": answer,
+            "sources": sources,
+            "pages": pages
+        }
+    
+    def _check_items_per_item(self, k_esg_items: Dict, decoupling_query: str):
+        """항목마다 질문하고 답변 문구로 공개 여부 판단"""
+        # 5대 항목 + Decoupling 질문을 동시에 실행 (실패한 질문은 해당 항목만 미확인 처리)
+        queries = [item["query"] for item in k_esg_items.values()] + [decoupling_query]
+        keys = list(k_esg_items)
+        checklist_results = {}
+        question_progress = self._question_progress("integrity_engine", len(queries))
         
-        logging.info(f"✅ Integrity Score: {integrity_score}점")
-        return state
+        def on_result(index, result):
+            # 각 항목은 답변이 오는 대로 검증하여 바로 보고
+            question_progress(index, result)
+            if index < len(keys):
+                key = keys[index]
+                checklist_results[key] = self._judge_item(k_esg_items[key], result)
+                self._notify("item_done", node="integrity_engine", key=key, item=checklist_results[key])
+        
+        answers = self.rag.ask_many(queries, return_exceptions=True, on_result=on_result)
+        checklist_results = {key: checklist_results[key] for key in keys}
+        
+        # Decoupling 분석
+        decoupling_result = answers[-1]
+        if isinstance(decoupling_result, Exception):
+            decoupling_answer = f"질문 처리 중 오류 발생: {str(decoupling_result)}"
+            decoupling_sources, decoupling_pages = [], []
+            has_decoupling = False
+        else:
+            decoupling_answer, decoupling_sources, decoupling_pages = decoupling_result
+            has_decoupling = "찾을 수 없습니다" not in decoupling_answer and len(decoupling_answer) > 50
+        
+        decoupling_analysis = {
+            "explained": has_decoupling,
+            "answer": decoupling_answer,
+            "sources": decoupling_sources,
+            "pages": decoupling_pages
+        }
+        return checklist_results, decoupling_analysis
     
-    def green_audit_node(self, state: ESGRadarState) -> ESGRadarState:
+    def green_audit_node(self, state: ESGRadarState) -> Dict:
         """
         Node 2: 그린워싱 감지 엔진
         - 환경부 '환경성 표시·광고 관리제도' 위반 유형 검사
@@ -176,6 +311,7 @@ class ESGRadarAgent:
         - 위험도 레벨 산정 (High/Medium/Low)
         """
         logging.info("🌱 Green Audit 시작...")
+        self._notify("node_start", node="green_audit")
         
         # 그린워싱 탐지 지식베이스
         knowledge_base = """
@@ -230,9 +366,9 @@ class ESGRadarAgent:
         risks_found = []
         risk_scores = []
         
-        for risk_query in risk_queries:
-            # 프롬프트 강화: 지식베이스 포함
-            full_prompt = f"""
+        # 프롬프트 강화: 지식베이스 포함
+        full_prompts = [
+            f"""
             {knowledge_base}
             
             위의 그린워싱 기준을 바탕으로 다음 질문에 답하세요:
@@ -241,8 +377,16 @@ class ESGRadarAgent:
             위험 사례가 발견되면 구체적인 문구와 페이지 번호를 명시하고,
             발견되지 않으면 "위험 요소가 발견되지 않았습니다"라고 답하세요.
             """
-            
-            answer, sources, pages = self.rag.ask(full_prompt)
+            for risk_query in risk_queries
+        ]
+        answers = self.rag.ask_many(full_prompts, return_exceptions=True,
+                                    on_result=self._question_progress("green_audit", len(full_prompts)))
+        
+        for risk_query, result in zip(risk_queries, answers):
+            if isinstance(result, Exception):
+                # 질문 실패는 위험 판정에서 제외 (다른 항목은 계속 평가)
+                continue
+            answer, sources, pages = result
             
             # 위험 발견 여부 판단
             risk_detected = (
@@ -281,15 +425,18 @@ class ESGRadarAgent:
         else:
             risk_level = "High"
         
-        state["greenwashing_risks"] = risks_found
-        state["greenwashing_score"] = round(greenwashing_score, 1)
-        state["risk_level"] = risk_level
-        state["messages"].append(f"✅ Green Audit 완료: {greenwashing_score}점 (위험도: {risk_level})")
-        
         logging.info(f"✅ Greenwashing Score: {greenwashing_score}점 (위험도: {risk_level})")
-        return state
+        self._notify("node_done", node="green_audit", score=round(greenwashing_score, 1), risk_level=risk_level)
+        
+        # messages는 add 리듀서로 병합되므로 새 메시지만 반환
+        return {
+            "greenwashing_risks": risks_found,
+            "greenwashing_score": round(greenwashing_score, 1),
+            "risk_level": risk_level,
+            "messages": [f"✅ Green Audit 완료: {greenwashing_score}점 (위험도: {risk_level})"]
+        }
     
-    def report_generator_node(self, state: ESGRadarState) -> ESGRadarState:
+    def report_generator_node(self, state: ESGRadarState) -> Dict:
         """
         Node 3: 최종 리포트 생성
         - 종합 점수 계산
@@ -297,6 +444,7 @@ class ESGRadarAgent:
         - 대시보드용 JSON 생성
         """
         logging.info("📊 Report Generator 시작...")
+        self._notify("node_start", node="report_generator")
         
         integrity_score = state["integrity_score"]
         greenwashing_score = state["greenwashing_score"]
@@ -326,19 +474,25 @@ class ESGRadarAgent:
             
             # 메타데이터
             "pdf_path": state["pdf_path"],
+            "doc_hash": self.rag.doc_hash,
+            "incremental": self._incremental_stats(),  # 이전 버전 대비 재사용 통계 (요청하지 않았으면 None)
             "total_risks_found": len(state["greenwashing_risks"]),
             "k_esg_completion": state["integrity_findings"]["completion_rate"]
         }
         
-        state["final_report"] = final_report
-        state["pre_assurance_eligible"] = pre_assurance_eligible
-        state["messages"].append(f"✅ 최종 리포트 생성 완료 (종합: {composite_score}점)")
-        
         logging.info(f"✅ 최종 종합 점수: {composite_score}점")
         if pre_assurance_eligible:
             logging.info("🏆 Pre-Assurance 인증 자격 획득!")
+        self._notify("score", composite_score=composite_score, integrity_score=integrity_score,
+                     greenwashing_score=greenwashing_score, risk_level=state["risk_level"],
+                     pre_assurance_eligible=pre_assurance_eligible)
+        self._notify("node_done", node="report_generator")
         
-        return state
+        return {
+            "final_report": final_report,
+            "pre_assurance_eligible": pre_assurance_eligible,
+            "messages": [f"✅ 최종 리포트 생성 완료 (종합: {composite_score}점)"]
+        }
     
     def run(self) -> Dict:
         """워크플로우 실행"""
@@ -349,24 +503,45 @@ class ESGRadarAgent:
             "messages": []
         }
         
-        # 워크플로우 실행
-        final_state = self.app.invoke(initial_state)
+        # 워크플로우 실행 (재사용한 답변 수 등 실행 단위 카운터를 세기 위해 수집기가 없으면 새로 시작)
+        if current_timings() is None:
+            with collect_timings():
+                return self.run()
+        with span("graph.total"):
+            final_state = self.app.invoke(initial_state)
         
         return final_state["final_report"]
 
 
-def analyze_esg_report(pdf_path: str, api_key: str) -> Dict:
+def analyze_esg_report(pdf_path: str, api_key: str,
+                       progress_callback: Optional[Callable[[Dict], None]] = None,
+                       rag: Optional[ESG_RAG] = None, previous_doc_hash: Optional[str] = None) -> Dict:
     """
     ESG 보고서 종합 분석 (진입점)
     
     Args:
         pdf_path: PDF 파일 경로
         api_key: OpenAI API 키
+        progress_callback: 진행 이벤트를 받을 함수 (node_start/node_done/question_done)
+        rag: 이미 인덱싱된 RAG 엔진 (없으면 새로 생성)
+        previous_doc_hash: 같은 보고서의 이전 버전 문서 해시 (바뀐 페이지와 관련된 질문만 다시 답변)
     
     Returns:
         최종 분석 리포트 (Dict)
     """
-    agent = ESGRadarAgent(pdf_path, api_key)
-    report = agent.run()
+    # 호출 측(작업 러너)에서 이미 수집 중이면 인덱싱 시간까지 포함된 그 수집기를 사용
+    timings = current_timings()
+    if timings is None:
+        with collect_timings() as timings:
+            agent = ESGRadarAgent(pdf_path, api_key, progress_callback=progress_callback, rag=rag,
+                                  previous_doc_hash=previous_doc_hash)
+            report = agent.run()
+    else:
+        agent = ESGRadarAgent(pdf_path, api_key, progress_callback=progress_callback, rag=rag,
+                              previous_doc_hash=previous_doc_hash)
+        report = agent.run()
+    
+    # 요청 단위 단계별 소요 시간/토큰 수 (병렬 구간은 합산)
+    report["timings"] = timings.as_dict()
     return report
 
@@ -0,0 +1,120 @@
+"""
+답변 캐시
+- (PDF 해시, 질문, 프롬프트 템플릿 해시, 모델, k) 키로 답변/출처/페이지 저장
+- 같은 보고서를 다시 분석하면 LLM 호출 없이 저장된 답변 반환
+- TTL 만료 및 전체 용량 기준 LRU 제거
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+
+
+ANSWER_CACHE_PATH = os.getenv("ESG_ANSWER_CACHE_PATH", os.path.join("cache", "answers.sqlite"))
+ANSWER_CACHE_ENABLED = os.getenv("ESG_ANSWER_CACHE", "1") != "0"
+ANSWER_CACHE_TTL = float(os.getenv("ESG_ANSWER_CACHE_TTL_HOURS", "168")) * 3600
+ANSWER_CACHE_MAX_BYTES = int(os.getenv("ESG_ANSWER_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+# 저장할 때마다 용량 확인을 하지 않고 일정 횟수마다 정리
+EVICT_EVERY = 50
+
+
+def make_answer_key(doc_hash, question, config):
+    """문서 해시 + 질문 + 답변 생성 설정으로 캐시 키 생성"""
+    payload = json.dumps({"doc": doc_hash, "question": question, "config": config},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AnswerCache:
+    """SQLite 기반 답변 캐시 (gunicorn 워커/작업 러너가 함께 사용)"""
+
+    def __init__(self, path=ANSWER_CACHE_PATH, ttl=ANSWER_CACHE_TTL, max_bytes=ANSWER_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT PRIMARY KEY,"
+                " doc_hash TEXT NOT NULL,"
+                " answer TEXT NOT NULL,"
+                " sources TEXT NOT NULL,"
+                " pages TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        """저장된 (answer, sources, pages) 반환 (없거나 만료되었으면 None)"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT answer, sources, pages, created FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            answer, sources, pages, created = row
+            if now - created > self.ttl:
+                conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+        return answer, json.loads(sources), json.loads(pages)
+
+    def put(self, key, doc_hash, result):
+        answer, sources, pages = result
+        sources_json = json.dumps(sources, ensure_ascii=False)
+        pages_json = json.dumps(pages)
+        size = len(answer.encode('utf-8')) + len(sources_json) + len(pages_json)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (key, doc_hash, answer, sources, pages, size, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, doc_hash, answer, sources_json, pages_json, size, now, now)
+            )
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """만료 항목 삭제 후 용량 초과분을 오래 사용하지 않은 순서로 제거"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM answers WHERE created < ?", (time.time() - self.ttl,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM answers").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            removed = 0
+            for key, size in conn.execute("SELECT key, size FROM answers ORDER BY last_used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                total -= size
+                removed += 1
+        logging.info(f"답변 캐시 정리: {removed}건 제거")
+
+
+_default_cache = None
+
+
+def get_default_answer_cache():
+    """프로세스 공용 답변 캐시 (비활성화 시 None)"""
+    global _default_cache
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        _default_cache = AnswerCache()
+    return _default_cache
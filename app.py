@@ -1,141 +1,89 @@
 import os
+import json
+import time
 import traceback
 
-from flask import Flask, render_template, request, redirect, flash, send_from_directory, jsonify
+from flask import Flask, render_template, request, redirect, flash, send_from_directory, jsonify, url_for, g
+from flask import Request, Response, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from dotenv import load_dotenv
-from rag_engine import ESG_RAG
-from agent_engine import analyze_esg_report
+from upload_store import UploadStore, UploadTooLarge, UPLOAD_MAX_MB, UPLOAD_MAX_BYTES
+from session_registry import get_registry
+from basic_review import run_basic_review
+from job_queue import JobQueue, STATUS_DONE, STATUS_FAILED
+from job_runner import start_in_thread as start_job_runner_thread
+import metrics
 
 # 환경변수 로드
 load_dotenv()
 
+class UploadRequest(Request):
+    """multipart 파일 부분을 업로드 저장소의 임시 파일로 바로 받음 (받는 동안 SHA-256 계산, 크기 제한 즉시 적용)"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return upload_store.open_spool()
+
 app = Flask(__name__)
+app.request_class = UploadRequest
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['SECRET_KEY'] = 'esg-secret-key-2024'  # flash 메시지를 위한 시크릿 키
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# Content-Length가 제한을 넘으면 본문을 읽기 전에 거절 (multipart 헤더 여유분 1MB)
+app.config['MAX_CONTENT_LENGTH'] = UPLOAD_MAX_BYTES + 1024 * 1024
+upload_store = UploadStore(app.config['UPLOAD_FOLDER'])
+
+# 분석 작업 큐 (작업 실행은 job_runner 프로세스가 담당)
+job_queue = JobQueue()
+
+# 문서별 RAG 엔진 세션 (추가 질문에서 인덱스 재사용)
+session_registry = get_registry()
+
+# 진행 이벤트 스트림: 새 이벤트 확인 주기와 연결 유지용 주석 전송 간격 (초)
+SSE_POLL_INTERVAL = 0.5
+SSE_KEEPALIVE_SECONDS = 15
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """엔드포인트별 응답 시간 기록 후 이 워커의 계측값 스냅샷 저장 (/metrics 합산용)"""
+    if request.endpoint and request.endpoint != 'prometheus_metrics' and 'request_start' in g:
+        metrics.observe(f"http.{request.endpoint}", time.perf_counter() - g.request_start)
+    metrics.write_snapshot()
+    return response
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
         try:
-            if 'file' not in request.files:
-                flash('파일이 선택되지 않았습니다.', 'error')
-                return redirect(request.url)
-            
-            file = request.files['file']
-            if file.filename == '':
-                flash('파일이 선택되지 않았습니다.', 'error')
+            filepath, filename, doc_hash, error = _receive_pdf_upload()
+            if error is not None:
+                flash(error[0], 'error')
                 return redirect(request.url)
-            
-            # 파일 확장자 확인
-            if not file.filename.lower().endswith('.pdf'):
-                flash('PDF 파일만 업로드 가능합니다.', 'error')
-                return redirect(request.url)
-            
             api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                flash('OPENAI_API_KEY 환경변수가 설정되지 않았습니다.', 'error')
-                return redirect(request.url)
-            
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-            file.save(filepath)
             
-            # 파일 크기 체크 (100MB 제한 - 2GB 인스턴스)
-            file_size = os.path.getsize(filepath) / (1024 * 1024)  # MB
-            if file_size > 100:
-                flash(f'PDF 파일이 너무 큽니다 ({file_size:.1f}MB). 100MB 이하의 파일만 처리 가능합니다.', 'error')
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-                return redirect(request.url)
-            
-            app.logger.info(f"PDF 파일 처리 시작: {file.filename} ({file_size:.1f}MB)")
-            
-            # RAG 엔진 초기화 (시간이 조금 걸릴 수 있음)
+            # RAG 엔진 초기화 (시간이 조금 걸릴 수 있음, 이미 인덱싱된 문서는 세션 재사용)
+            # 저장 파일은 내용 주소 기반이라 다른 요청과 공유될 수 있으므로 실패해도 삭제하지 않음
             try:
-                rag = ESG_RAG(filepath, api_key)
+                rag = session_registry.get_or_create(filepath, api_key, doc_hash=doc_hash,
+                                                     previous_doc_hash=_previous_doc_hash())
             except MemoryError as e:
                 flash(f'PDF 파일이 너무 크거나 복잡하여 메모리 부족이 발생했습니다. 더 작은 파일로 시도해주세요. ({str(e)})', 'error')
-                if os.path.exists(filepath):
-                    os.remove(filepath)
                 return redirect(request.url)
             except Exception as e:
                 flash(f'PDF 파일 처리 중 오류가 발생했습니다: {str(e)}', 'error')
-                if os.path.exists(filepath):
-                    os.remove(filepath)
                 return redirect(request.url)
             
-            # 검토할 ESG 항목 리스트 (핵심 항목만 - 처리 시간 단축)
-            questions = {
-                "scope1": {
-                    "title": "Scope 1 배출량",
-                    "question": "Scope 1 직접 배출량 데이터가 포함되어 있습니까? 있다면 구체적인 수치(단위 포함)와 연도를 알려주세요.",
-                    "category": "환경"
-                },
-                "scope2": {
-                    "title": "Scope 2 배출량",
-                    "question": "Scope 2 간접 배출량(전력 등) 데이터가 포함되어 있습니까? 있다면 구체적인 수치(단위 포함)와 연도를 알려주세요.",
-                    "category": "환경"
-                },
-                "scope3": {
-                    "title": "Scope 3 배출량",
-                    "question": "Scope 3 기타 간접 배출량 데이터가 포함되어 있습니까? 있다면 구체적인 수치(단위 포함), 범주, 연도를 알려주세요.",
-                    "category": "환경"
-                },
-                "target": {
-                    "title": "탄소 중립 목표",
-                    "question": "탄소 중립(Carbon Neutral) 또는 넷제로(Net Zero) 목표가 설정되어 있습니까? 목표 연도와 구체적인 계획을 알려주세요.",
-                    "category": "환경"
-                },
-                "governance": {
-                    "title": "거버넌스 구조",
-                    "question": "ESG 거버넌스 구조(전담 조직, 이사회 위원회 등)가 설명되어 있습니까? 어떤 조직 구조를 갖추고 있는지 알려주세요.",
-                    "category": "거버넌스"
-                }
-            }
-            
-            results = {}
-            total_items = len(questions)
-            found_count = 0
-            
-            for key, item in questions.items():
-                try:
-                    answer, sources, page_numbers = rag.ask(item["question"])
-                    # 답변에서 "찾을 수 없습니다"가 포함되어 있으면 없음으로 판단
-                    is_found = "찾을 수 없습니다" not in answer and "없습니다" not in answer[:50]
-                    if is_found:
-                        found_count += 1
-                    
-                    results[key] = {
-                        "title": item["title"],
-                        "category": item["category"],
-                        "answer": answer,
-                        "sources": sources if sources else [],
-                        "page_numbers": page_numbers if page_numbers else [],  # 숫자 페이지 번호 리스트
-                        "found": is_found
-                    }
-                except Exception as e:
-                    results[key] = {
-                        "title": item["title"],
-                        "category": item["category"],
-                        "answer": f"질문 처리 중 오류 발생: {str(e)}",
-                        "sources": [],
-                        "page_numbers": [],
-                        "found": False
-                    }
-            
-            # 전체 요약 생성
-            summary = {
-                "total": total_items,
-                "found": found_count,
-                "missing": total_items - found_count,
-                "completion_rate": round((found_count / total_items) * 100, 1) if total_items > 0 else 0
-            }
+            # 주요 항목 질문 (표 수치로 확정되는 항목은 LLM 생략, 나머지는 동시에 실행)
+            results, summary = run_basic_review(rag)
             
             return render_template('result.html', 
                                  results=results, 
-                                 filename=file.filename,
+                                 filename=filename,
                                  summary=summary,
-                                 pdf_filename=file.filename)
+                                 pdf_filename=os.path.basename(filepath),
+                                 doc_id=rag.doc_hash)
             
         except Exception as e:
             error_msg = f'처리 중 오류가 발생했습니다: {str(e)}\n{traceback.format_exc()}'
@@ -166,53 +114,287 @@ def pdf_viewer(filename):
     highlight = request.args.get('q', '')
     return render_template('pdf_viewer.html', filename=filename, page=page, highlight=highlight)
 
+def _receive_pdf_upload():
+    """
+    업로드된 PDF를 내용 해시 이름으로 저장
+    → (저장 경로, 원래 파일명, SHA-256, None) 또는 (None, None, None, (오류 메시지, 상태 코드))
+    """
+    try:
+        file = request.files.get('file')
+    except UploadTooLarge:
+        return None, None, None, (UploadTooLarge.description, 413)
+    except RequestEntityTooLarge:
+        return None, None, None, (f'파일이 너무 큽니다. {UPLOAD_MAX_MB}MB 이하만 가능합니다.', 413)
+    
+    if file is None or file.filename == '':
+        return None, None, None, ('파일이 선택되지 않았습니다.', 400)
+    
+    if not file.filename.lower().endswith('.pdf'):
+        return None, None, None, ('PDF 파일만 업로드 가능합니다.', 400)
+    
+    if not os.getenv("OPENAI_API_KEY"):
+        return None, None, None, ('OPENAI_API_KEY 환경변수가 설정되지 않았습니다.', 500)
+    
+    # 본문은 이미 해시를 계산하며 임시 파일로 받았으므로 이름만 확정 (같은 보고서는 한 번만 저장)
+    filepath, doc_hash = upload_store.commit(file.stream, file.filename)
+    file_size = os.path.getsize(filepath) / (1024 * 1024)
+    app.logger.info(f"업로드 완료: {file.filename} ({file_size:.1f}MB, {doc_hash[:12]})")
+    return filepath, file.filename, doc_hash, None
+
+def _previous_doc_hash():
+    """폼의 이전 버전 문서 ID (선택, 정정 보고서를 올릴 때 바뀐 페이지만 다시 분석하기 위함)"""
+    value = (request.form.get('previous_doc_id') or '').strip().lower()
+    if len(value) != 64 or any(c not in '0123456789abcdef' for c in value):
+        return None
+    return value
+
+def _report_tags():
+    """폼의 회사/연도 (선택, 코퍼스 인덱스 태그로 사용하며 비어 있으면 파일명에서 추정)"""
+    year = (request.form.get('year') or '').strip()
+    return {
+        'company': (request.form.get('company') or '').strip() or None,
+        'year': int(year) if year.isdigit() else None,
+    }
+
+def _job_urls(job_id):
+    return {
+        'job_id': job_id,
+        'status_url': url_for('job_status', job_id=job_id),
+        'events_url': url_for('job_events', job_id=job_id),
+    }
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     """ESG-Radar 고도화 분석 (LangGraph Multi-Agent)"""
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': '파일이 선택되지 않았습니다.'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': '파일이 선택되지 않았습니다.'}), 400
-        
-        if not file.filename.lower().endswith('.pdf'):
-            return jsonify({'error': 'PDF 파일만 업로드 가능합니다.'}), 400
-        
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            return jsonify({'error': 'OPENAI_API_KEY 환경변수가 설정되지 않았습니다.'}), 500
+        filepath, filename, doc_hash, error = _receive_pdf_upload()
+        if error is not None:
+            return jsonify({'error': error[0]}), error[1]
         
-        # 파일 저장
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-        file.save(filepath)
-        
-        # 파일 크기 체크
-        file_size = os.path.getsize(filepath) / (1024 * 1024)
-        if file_size > 100:
-            os.remove(filepath)
-            return jsonify({'error': f'파일이 너무 큽니다 ({file_size:.1f}MB). 100MB 이하만 가능합니다.'}), 400
-        
-        app.logger.info(f"ESG-Radar 분석 시작: {file.filename} ({file_size:.1f}MB)")
-        
-        # LangGraph Multi-Agent 분석 실행
-        try:
-            report = analyze_esg_report(filepath, api_key)
-            
-            # 대시보드로 리다이렉트
-            return render_template('dashboard.html', 
-                                 report=report, 
-                                 filename=file.filename)
+        # LangGraph Multi-Agent 분석은 작업 러너에서 실행하고 job id만 즉시 반환
+        job_id = job_queue.submit("analyze", dict(_report_tags(), pdf_path=filepath, filename=filename,
+                                                  doc_hash=doc_hash, previous_doc_hash=_previous_doc_hash()))
+        return jsonify(dict(_job_urls(job_id), dashboard_url=url_for('job_dashboard', job_id=job_id))), 202
+    
+    except Exception as e:
+        app.logger.error(f'처리 중 오류: {str(e)}\n{traceback.format_exc()}')
+        return jsonify({'error': f'처리 중 오류가 발생했습니다: {str(e)}'}), 500
+
+@app.route('/review', methods=['POST'])
+def review():
+    """기본 검토를 작업으로 등록 (항목 결과는 /jobs/<job_id>/events로 하나씩 전달)"""
+    try:
+        filepath, filename, doc_hash, error = _receive_pdf_upload()
+        if error is not None:
+            return jsonify({'error': error[0]}), error[1]
         
-        except Exception as e:
-            app.logger.error(f"분석 중 오류: {str(e)}")
-            os.remove(filepath)
-            return jsonify({'error': f'분석 중 오류가 발생했습니다: {str(e)}'}), 500
+        job_id = job_queue.submit("review", dict(_report_tags(), pdf_path=filepath, filename=filename,
+                                                 doc_hash=doc_hash, previous_doc_hash=_previous_doc_hash()))
+        return jsonify(dict(_job_urls(job_id), result_url=url_for('job_result', job_id=job_id))), 202
     
     except Exception as e:
         app.logger.error(f'처리 중 오류: {str(e)}\n{traceback.format_exc()}')
         return jsonify({'error': f'처리 중 오류가 발생했습니다: {str(e)}'}), 500
 
+@app.route('/ask', methods=['POST'])
+def ask_followup():
+    """
+    추가 질문 (JSON): {"doc_id": 문서 해시, "question": 질문}
+    상주 중인 인덱스를 재사용하므로 검색 + LLM 호출 1회로 응답
+    """
+    data = request.get_json(silent=True) or {}
+    doc_id = data.get('doc_id', '')
+    question = (data.get('question') or '').strip()
+    if not doc_id or not question:
+        return jsonify({'error': 'doc_id와 question이 필요합니다.'}), 400
+    
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return jsonify({'error': 'OPENAI_API_KEY 환경변수가 설정되지 않았습니다.'}), 500
+    
+    # 다른 워커/작업 러너에서 인덱싱된 문서는 공유 인덱스 캐시(mmap)에서 바로 열기
+    rag = session_registry.open(doc_id, api_key)
+    if rag is None:
+        # 캐시에서 제거된 문서: 해시 이름으로 저장된 업로드 파일로 다시 인덱싱 (파일을 다시 해시하지 않음)
+        filepath = upload_store.path_for(doc_id)
+        if filepath is None:
+            return jsonify({'error': '문서 세션을 찾을 수 없습니다. 보고서를 다시 업로드해주세요.'}), 404
+        rag = session_registry.get_or_create(filepath, api_key, doc_hash=doc_id)
+    
+    try:
+        answer, sources, pages = rag.ask(question)
+    except Exception as e:
+        app.logger.error(f"추가 질문 처리 중 오류: {str(e)}")
+        return jsonify({'error': f'질문 처리 중 오류가 발생했습니다: {str(e)}'}), 500
+    return jsonify({'answer': answer, 'sources': sources, 'pages': pages})
+
+@app.route('/corpus')
+def corpus_documents():
+    """코퍼스 인덱스에 들어 있는 보고서 목록과 인덱스 정보"""
+    from corpus_index import get_default_corpus
+
+    corpus = get_default_corpus()
+    if corpus is None:
+        return jsonify({'error': '코퍼스 인덱스가 비활성화되어 있습니다.'}), 404
+    return jsonify({'stats': corpus.stats(), 'documents': corpus.documents()})
+
+@app.route('/corpus/search', methods=['POST'])
+def corpus_search():
+    """
+    여러 보고서를 모은 코퍼스에서 검색 (JSON)
+    {"queries": [질문...] 또는 "query": 질문, "k": 10, "companies": [...], "years": [...], "doc_ids": [...], "pages": [첫, 끝]}
+    질문별로 검색된 청크와, 그 청크가 나온 회사 목록 반환 (예: Scope 3를 공개한 공급사 찾기)
+    """
+    from corpus_index import get_default_corpus
+    from rag_engine import ESG_RAG
+
+    data = request.get_json(silent=True) or {}
+    queries = data.get('queries') or ([data['query']] if data.get('query') else [])
+    queries = [query.strip() for query in queries if isinstance(query, str) and query.strip()]
+    if not queries:
+        return jsonify({'error': 'query 또는 queries가 필요합니다.'}), 400
+    pages = data.get('pages')
+    if pages is not None and not (isinstance(pages, list) and len(pages) == 2 and all(isinstance(p, int) for p in pages)):
+        return jsonify({'error': 'pages는 [첫 페이지, 끝 페이지] 형식이어야 합니다.'}), 400
+    try:
+        k = max(1, min(int(data.get('k', 10)), 100))
+        years = [int(year) for year in data.get('years') or []]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'k와 years는 숫자여야 합니다.'}), 400
+
+    corpus = get_default_corpus()
+    if corpus is None:
+        return jsonify({'error': '코퍼스 인덱스가 비활성화되어 있습니다.'}), 404
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return jsonify({'error': 'OPENAI_API_KEY 환경변수가 설정되지 않았습니다.'}), 500
+
+    try:
+        hits = ESG_RAG.search_corpus(corpus, queries, api_key, k=k, companies=data.get('companies'), years=years,
+                                     doc_hashes=data.get('doc_ids'), pages=tuple(pages) if pages else None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    results = []
+    for query, docs in zip(queries, hits):
+        results.append({
+            'query': query,
+            'companies': sorted({doc.metadata['company'] for doc in docs if doc.metadata['company']}),
+            'hits': [dict(doc.metadata, text=doc.page_content) for doc in docs],
+        })
+    return jsonify({'results': results})
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """분석 작업 진행 상황 조회 (현재 그래프 노드, 질문 진행률)"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify({
+        'job_id': job['id'],
+        'status': job['status'],
+        'node': job['node'],
+        'progress': job['progress'],
+        'error': job['error'],
+        'dashboard_url': url_for(_result_endpoint(job), job_id=job_id) if job['status'] == STATUS_DONE else None
+    })
+
+def _result_endpoint(job):
+    """작업 종류별 결과 페이지 (analyze: 대시보드, review: 기본 검토 결과)"""
+    return 'job_dashboard' if job['kind'] == 'analyze' else 'job_result'
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    작업 진행 이벤트 스트림 (Server-Sent Events)
+    항목 결과(item_done), 노드 시작/완료(node_start/node_done), 최종 점수(score)를 발생 순서대로 전달하고
+    작업이 끝나면 done(결과 페이지 URL) 또는 failed 이벤트로 종료
+    재연결 시 Last-Event-ID 이후 이벤트부터 이어서 전달
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.args.get('after') or 0)
+    except ValueError:
+        last_id = 0
+    result_url = url_for(_result_endpoint(job), job_id=job_id)
+    
+    def format_event(event_id, event_type, data):
+        return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    
+    def stream():
+        nonlocal last_id
+        last_sent = time.time()
+        yield "retry: 3000\n\n"
+        while True:
+            events = job_queue.get_events(job_id, last_id)
+            for event in events:
+                last_id = event['id']
+                yield format_event(event['id'], event['type'], event['data'])
+            if events:
+                last_sent = time.time()
+                continue
+            
+            current = job_queue.get(job_id)
+            if current is None or current['status'] in (STATUS_DONE, STATUS_FAILED):
+                # 상태 확인 직전에 기록된 이벤트까지 모두 보낸 뒤 종료
+                for event in job_queue.get_events(job_id, last_id):
+                    last_id = event['id']
+                    yield format_event(event['id'], event['type'], event['data'])
+                if current is not None and current['status'] == STATUS_DONE:
+                    yield format_event(last_id, 'done', {'url': result_url})
+                else:
+                    yield format_event(last_id, 'failed', {'error': current['error'] if current else None})
+                return
+            if time.time() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                yield ": keepalive\n\n"
+                last_sent = time.time()
+            time.sleep(SSE_POLL_INTERVAL)
+    
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """완료된 기본 검토 작업의 결과 페이지"""
+    job = job_queue.get(job_id)
+    if job is None or job['kind'] != 'review':
+        flash('검토 작업을 찾을 수 없습니다.', 'error')
+        return redirect('/')
+    if job['status'] != STATUS_DONE:
+        return jsonify({'error': '검토가 아직 완료되지 않았습니다.', 'status': job['status']}), 409
+    result = job['result']
+    filename = job['payload']['filename']
+    return render_template('result.html',
+                         results=result['results'],
+                         filename=filename,
+                         summary=result['summary'],
+                         pdf_filename=os.path.basename(job['payload']['pdf_path']),
+                         doc_id=result['doc_id'])
+
+@app.route('/jobs/<job_id>/dashboard')
+def job_dashboard(job_id):
+    """완료된 분석 작업의 대시보드"""
+    job = job_queue.get(job_id)
+    if job is not None and job['kind'] == 'review':
+        # 기본 검토 결과는 대시보드 형식이 아니므로 결과 페이지로
+        return redirect(url_for('job_result', job_id=job_id))
+    if job is None or job['kind'] != 'analyze':
+        flash('분석 작업을 찾을 수 없습니다.', 'error')
+        return redirect('/')
+    if job['status'] != STATUS_DONE:
+        return jsonify({'error': '분석이 아직 완료되지 않았습니다.', 'status': job['status']}), 409
+    return render_template('dashboard.html', 
+                         report=job['result'], 
+                         filename=job['payload']['filename'])
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus 텍스트 포맷 계측값 (모든 웹 워커/작업 러너 프로세스 합산, pid 라벨로 구분)"""
+    return app.response_class(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
+    # 로컬 개발 서버: 작업 러너를 같은 프로세스의 스레드로 실행 (리로더 자식 프로세스에서만)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_job_runner_thread()
     app.run(debug=True)
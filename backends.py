@@ -0,0 +1,215 @@
+"""
+임베딩/LLM 백엔드 선택
+- openai (기본): OpenAIEmbeddings, ChatOpenAI
+- offline: 네트워크 없이 동작하는 결정적 대체 구현 (벤치마크/로컬 검증용)
+  * HashEmbeddings: 토큰 해시 기반 고정 차원 임베딩
+  * ScriptedChatModel: 설정한 지연 시간 후 정해진 규칙으로 답변
+- LLM 토큰 사용량 콜백 (prompt/completion 토큰을 metrics 카운터로 기록)
+- 프로세스 간 LLM 동시 호출 제한 (set_llm_slots로 공유 세마포어를 설정한 경우, 일괄 분석 CLI에서 사용)
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import functools
+from contextlib import contextmanager
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from metrics import increment
+
+
+ESG_BACKEND = os.getenv("ESG_BACKEND", "openai")  # openai | offline
+OFFLINE_EMBEDDING_DIM = int(os.getenv("ESG_OFFLINE_EMBEDDING_DIM", "256"))
+OFFLINE_EMBEDDING_LATENCY = float(os.getenv("ESG_OFFLINE_EMBEDDING_LATENCY", "0"))
+OFFLINE_LLM_LATENCY = float(os.getenv("ESG_OFFLINE_LLM_LATENCY", "0"))
+
+_TOKEN_RE = re.compile(r"[0-9A-Za-z가-힣]+")
+
+_llm_slots = None  # 여러 프로세스가 공유하는 세마포어 (None이면 제한 없음)
+
+
+def set_llm_slots(semaphore):
+    """이 프로세스의 LLM 호출이 공유 세마포어를 거치도록 설정 (multiprocessing 세마포어)"""
+    global _llm_slots
+    _llm_slots = semaphore
+
+
+@contextmanager
+def llm_slot():
+    """LLM 호출 한 번 동안 공유 세마포어 슬롯 점유"""
+    if _llm_slots is None:
+        yield
+        return
+    with _llm_slots:
+        yield
+
+
+class HashEmbeddings(Embeddings):
+    """
+    토큰 해시 임베딩 (feature hashing)
+    같은 텍스트는 항상 같은 벡터, 공유 토큰이 많을수록 가까운 벡터가 되어 검색 동작을 흉내냄
+    latency: 요청(배치)당 지연 시간(초) - 네트워크 왕복 모사
+    """
+
+    def __init__(self, dim=OFFLINE_EMBEDDING_DIM, latency=OFFLINE_EMBEDDING_LATENCY):
+        self.dim = dim
+        self.latency = latency
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _TOKEN_RE.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    대본형 채팅 모델
+    - responses가 있으면 순서대로 반복 반환
+    - 없으면 프롬프트의 [Context]에서 숫자가 포함된 첫 문장을 답변으로 사용
+      (response_format이 json_object면 [Items]의 항목마다 같은 규칙으로 JSON 답변)
+    - latency: 호출당 지연 시간(초) - GPT-4o 응답 시간 모사
+    """
+
+    responses: List[str] = []
+    latency: float = OFFLINE_LLM_LATENCY
+    call_count: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-chat"
+
+    def _default_answer(self, prompt):
+        context = prompt.split("[Context]:", 1)[-1].split("[Question]:", 1)[0]
+        for line in context.splitlines():
+            line = line.strip()
+            if re.search(r"\d", line) and len(line) > 20:
+                return f"{line} (오프라인 응답)"
+        return "보고서에서 해당 내용을 찾을 수 없습니다"
+
+    def _default_json_answer(self, prompt):
+        items_section, _, context = prompt.partition("[Context]:")
+        keys = re.findall(r"^\s*- (\w+):", items_section.split("[Items]:", 1)[-1], re.M)
+        page, evidence = None, None
+        for line in context.splitlines():
+            match = re.match(r"\s*\[p\.(\d+)\]", line)
+            if match:
+                page = int(match.group(1))
+            line = re.sub(r"^\s*\[p\.\d+\]", "", line).strip()
+            if evidence is None and re.search(r"\d", line) and len(line) > 20:
+                evidence = (line, page)
+        items = {}
+        for key in keys:
+            if evidence is None:
+                items[key] = {"found": False, "summary": "보고서에서 해당 내용을 찾을 수 없습니다",
+                              "values": [], "pages": []}
+            else:
+                items[key] = {"found": True, "summary": f"{evidence[0]} (오프라인 응답)",
+                              "values": [], "pages": [evidence[1]] if evidence[1] else []}
+        return json.dumps({"items": items}, ensure_ascii=False)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            with llm_slot():
+                time.sleep(self.latency)
+        prompt = "\n".join(str(message.content) for message in messages)
+        if self.responses:
+            text = self.responses[self.call_count % len(self.responses)]
+        elif (kwargs.get("response_format") or {}).get("type") == "json_object":
+            text = self._default_json_answer(prompt)
+        else:
+            text = self._default_answer(prompt)
+        self.call_count += 1
+        # 토큰 사용량은 글자 수 기반 근사치 (OpenAI 응답과 같은 형식)
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(text) // 4,
+            "total_tokens": (len(prompt) + len(text)) // 4,
+        }
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={"token_usage": usage, "model_name": self._llm_type},
+        )
+
+
+def embedding_model_id(model):
+    """캐시 키에 쓰는 임베딩 모델 식별자 (백엔드에 따라 달라짐)"""
+    if ESG_BACKEND == "offline":
+        return f"offline-hash-{OFFLINE_EMBEDDING_DIM}"
+    return model
+
+
+def chat_model_id(model):
+    """캐시 키에 쓰는 LLM 식별자 (백엔드에 따라 달라짐)"""
+    if ESG_BACKEND == "offline":
+        return "offline-scripted"
+    return model
+
+
+def make_embeddings(model, api_key):
+    if ESG_BACKEND == "offline":
+        return HashEmbeddings()
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(model=model, openai_api_key=api_key)
+
+
+@functools.lru_cache(maxsize=None)
+def _chat_openai_class():
+    from langchain_openai import ChatOpenAI
+
+    class SlottedChatOpenAI(ChatOpenAI):
+        """호출마다 llm_slot()을 거치는 ChatOpenAI"""
+
+        def _generate(self, *args, **kwargs):
+            with llm_slot():
+                return super()._generate(*args, **kwargs)
+
+    return SlottedChatOpenAI
+
+
+def make_chat_model(model, api_key, request_timeout):
+    if ESG_BACKEND == "offline":
+        return ScriptedChatModel()
+    return _chat_openai_class()(
+        model=model,
+        temperature=0,
+        openai_api_key=api_key,
+        request_timeout=request_timeout
+    )
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """LLM 응답의 token_usage를 카운터로 기록"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def on_llm_end(self, response, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        for key in ("prompt_tokens", "completion_tokens"):
+            if usage.get(key):
+                increment(f"llm_{key}", usage[key], model=self.model)
@@ -0,0 +1,111 @@
+"""
+기본 검토 (주요 ESG 항목 간단 확인)
+- 동기 요청(/)과 작업 러너의 review 작업이 함께 사용
+- 항목 하나가 끝날 때마다 on_item(key, result) 호출 (SSE로 결과를 바로 보여주기 위함)
+"""
+
+import logging
+
+
+# 검토할 ESG 항목 리스트 (핵심 항목만 - 처리 시간 단축)
+QUESTIONS = {
+    "scope1": {
+        "title": "Scope 1 배출량",
+        "question": "Scope 1 직접 배출량 데이터가 포함되어 있습니까? 있다면 구체적인 수치(단위 포함)와 연도를 알려주세요.",
+        "category": "환경",
+        "metrics": ["scope1"]  # 표 수치로 바로 답할 수 있으면 LLM 생략
+    },
+    "scope2": {
+        "title": "Scope 2 배출량",
+        "question": "Scope 2 간접 배출량(전력 등) 데이터가 포함되어 있습니까? 있다면 구체적인 수치(단위 포함)와 연도를 알려주세요.",
+        "category": "환경",
+        "metrics": ["scope2"]
+    },
+    "scope3": {
+        "title": "Scope 3 배출량",
+        "question": "Scope 3 기타 간접 배출량 데이터가 포함되어 있습니까? 있다면 구체적인 수치(단위 포함), 범주, 연도를 알려주세요.",
+        "category": "환경",
+        "metrics": ["scope3"]
+    },
+    "target": {
+        "title": "탄소 중립 목표",
+        "question": "탄소 중립(Carbon Neutral) 또는 넷제로(Net Zero) 목표가 설정되어 있습니까? 목표 연도와 구체적인 계획을 알려주세요.",
+        "category": "환경"
+    },
+    "governance": {
+        "title": "거버넌스 구조",
+        "question": "ESG 거버넌스 구조(전담 조직, 이사회 위원회 등)가 설명되어 있습니까? 어떤 조직 구조를 갖추고 있는지 알려주세요.",
+        "category": "거버넌스"
+    }
+}
+
+
+def _item_result(item, result):
+    """ask 결과(또는 예외) → 화면 표시용 항목 결과"""
+    if isinstance(result, Exception):
+        return {
+            "title": item["title"],
+            "category": item["category"],
+            "answer": f"질문 처리 중 오류 발생: {str(result)}",
+            "sources": [],
+            "page_numbers": [],
+            "found": False
+        }
+    answer, sources, page_numbers = result
+    # 답변에서 "찾을 수 없습니다"가 포함되어 있으면 없음으로 판단
+    is_found = "찾을 수 없습니다" not in answer and "없습니다" not in answer[:50]
+    return {
+        "title": item["title"],
+        "category": item["category"],
+        "answer": answer,
+        "sources": sources if sources else [],
+        "page_numbers": page_numbers if page_numbers else [],  # 숫자 페이지 번호 리스트
+        "found": is_found
+    }
+
+
+def summarize(results):
+    """전체 요약 생성"""
+    total_items = len(results)
+    found_count = sum(1 for result in results.values() if result["found"])
+    return {
+        "total": total_items,
+        "found": found_count,
+        "missing": total_items - found_count,
+        "completion_rate": round((found_count / total_items) * 100, 1) if total_items > 0 else 0
+    }
+
+
+def run_basic_review(rag, questions=QUESTIONS, on_item=None):
+    """항목별 결과와 요약 (results, summary) 반환"""
+    results = {}
+
+    def emit(key):
+        if on_item is None:
+            return
+        try:
+            on_item(key, results[key])
+        except Exception as e:
+            logging.warning(f"항목 결과 보고 실패: {str(e)}")
+
+    # 사전 추출한 수치로 확정되는 항목은 LLM 없이 답변
+    pending = []
+    for key, item in questions.items():
+        fast_result = rag.answer_from_facts(item["metrics"]) if "metrics" in item else None
+        if fast_result is None:
+            pending.append(key)
+            continue
+        results[key] = _item_result(item, fast_result)
+        results[key]["found"] = True
+        emit(key)
+
+    # 나머지 질문을 동시에 실행 (질문별 오류는 해당 항목에만 반영, 끝나는 대로 보고)
+    def on_result(index, result):
+        key = pending[index]
+        results[key] = _item_result(questions[key], result)
+        emit(key)
+
+    rag.ask_many([questions[key]["question"] for key in pending], return_exceptions=True, on_result=on_result)
+
+    results = {key: results[key] for key in questions}  # 화면 표시 순서 유지
+    return results, summarize(results)
@@ -0,0 +1,212 @@
+"""
+보고서 일괄 분석 CLI (공시 시즌 대량 스크리닝용)
+- 입력: PDF 디렉토리(하위 폴더 포함) 또는 목록 파일(.txt: 줄마다 경로, .csv/.jsonl: path, company, year)
+- 보고서마다 별도 프로세스에서 ESGRadarAgent 실행 (프로세스 수 제한)
+- LLM 동시 호출 수는 모든 프로세스를 합쳐 제한 (공유 세마포어, API 속도 제한 대응)
+- 끝나는 대로 결과를 JSONL에 한 줄씩 추가, 다시 실행하면 이미 성공한 보고서(문서 해시 기준)는 건너뜀
+- 마지막에 처리량(보고서/시간)과 단계별 소요 시간 합계 출력
+
+사용법:
+    python batch_analyze.py reports/ --output results.jsonl
+    python batch_analyze.py manifest.csv --output results.jsonl --workers 4 --llm-concurrency 8 --corpus
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from index_cache import file_sha256
+
+
+def read_manifest(path):
+    """목록 파일 → [{"path", "company", "year"}] (상대 경로는 목록 파일 위치 기준)"""
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        elif path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = [{"path": line.strip()} for line in f if line.strip() and not line.startswith("#")]
+    for row in rows:
+        year = str(row.get("year") or "").strip()
+        entries.append({
+            "path": os.path.join(base, row["path"]),
+            "company": (row.get("company") or "").strip() or None,
+            "year": int(year) if year.isdigit() else None,
+        })
+    return entries
+
+
+def collect_inputs(source):
+    """디렉토리면 하위의 모든 PDF, 파일이면 목록 파일로 읽기"""
+    if os.path.isdir(source):
+        return [
+            {"path": os.path.join(dirpath, name), "company": None, "year": None}
+            for dirpath, _, filenames in sorted(os.walk(source))
+            for name in sorted(filenames) if name.lower().endswith(".pdf")
+        ]
+    return read_manifest(source)
+
+
+def load_done(output_path):
+    """이미 성공한 보고서의 문서 해시 (마지막 줄이 중간에 끊겼으면 잘라냄)"""
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    done = set()
+    for line in data.decode('utf-8').splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if record.get("status") == "ok":
+            done.add(record["doc_hash"])
+    return done
+
+
+def _init_worker(llm_slots):
+    from backends import set_llm_slots
+
+    set_llm_slots(llm_slots)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [batch %(process)d] %(levelname)s %(message)s")
+
+
+def analyze_one(entry, add_to_corpus):
+    """작업 프로세스에서 보고서 하나 분석 → JSONL 레코드"""
+    from metrics import collect_timings
+    from rag_engine import ESG_RAG
+    from agent_engine import analyze_esg_report
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    record = {"path": entry["path"], "doc_hash": entry["doc_hash"], "company": entry["company"],
+              "year": entry["year"]}
+    start = time.perf_counter()
+    try:
+        # 인덱싱 시간도 리포트의 timings에 포함되도록 전체를 수집
+        with collect_timings():
+            rag = ESG_RAG(entry["path"], api_key, doc_hash=entry["doc_hash"])
+            report = analyze_esg_report(entry["path"], api_key, rag=rag)
+        if add_to_corpus:
+            from job_runner import add_to_corpus as add_report
+            add_report(rag, {"filename": os.path.basename(entry["path"]), "company": entry["company"],
+                             "year": entry["year"]})
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {str(e)}",
+                      seconds=round(time.perf_counter() - start, 3))
+        return record
+    record.update(status="ok", seconds=round(time.perf_counter() - start, 3), report=report)
+    return record
+
+
+def summarize(records, elapsed):
+    """처리량과 단계별 소요 시간 합계/평균"""
+    ok = [record for record in records if record["status"] == "ok"]
+    stages = {}
+    for record in ok:
+        for stage, entry in record["report"].get("timings", {}).get("stages", {}).items():
+            total = stages.setdefault(stage, {"seconds": 0.0, "count": 0})
+            total["seconds"] += entry["seconds"]
+            total["count"] += entry["count"]
+    return {
+        "reports_ok": len(ok),
+        "reports_failed": len(records) - len(ok),
+        "elapsed_seconds": round(elapsed, 1),
+        "reports_per_hour": round(len(ok) / elapsed * 3600, 1) if elapsed > 0 else None,
+        "mean_report_seconds": round(sum(record["seconds"] for record in ok) / len(ok), 2) if ok else None,
+        "stages": {
+            stage: {"seconds": round(entry["seconds"], 2), "per_report": round(entry["seconds"] / len(ok), 3),
+                    "count": entry["count"]}
+            for stage, entry in sorted(stages.items(), key=lambda item: -item[1]["seconds"])
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ESG 보고서 일괄 분석 (JSONL 출력, 중단 후 이어서 실행)")
+    parser.add_argument("source", help="PDF 디렉토리 또는 목록 파일 (.txt/.csv/.jsonl)")
+    parser.add_argument("--output", required=True, help="결과 JSONL 경로 (있으면 이어서 추가)")
+    parser.add_argument("--workers", type=int, default=2, help="동시에 분석할 보고서 수 (프로세스 수)")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="모든 프로세스를 합친 LLM 동시 호출 수")
+    parser.add_argument("--max-tasks-per-child", type=int, default=20,
+                        help="프로세스 하나가 처리할 보고서 수 (넘으면 새 프로세스로 교체, 메모리 누적 방지)")
+    parser.add_argument("--corpus", action="store_true", help="분석한 보고서를 코퍼스 인덱스에 추가")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [batch] %(levelname)s %(message)s")
+    if not os.getenv("OPENAI_API_KEY"):
+        parser.error("OPENAI_API_KEY 환경변수가 설정되지 않았습니다.")
+
+    from corpus_index import guess_tags
+
+    entries = collect_inputs(args.source)
+    for entry in entries:
+        # 목록에 회사/연도가 없으면 파일명에서 추정 (결과 JSONL과 코퍼스 태그에 사용)
+        company, year = guess_tags(entry["path"])
+        entry["company"] = entry["company"] or company
+        entry["year"] = entry["year"] or year
+    done = load_done(args.output)
+    pending = []
+    seen = set(done)
+    for entry in entries:
+        if not os.path.isfile(entry["path"]):
+            logging.warning(f"파일 없음: {entry['path']}")
+            continue
+        entry["doc_hash"] = file_sha256(entry["path"])
+        if entry["doc_hash"] in seen:
+            continue
+        seen.add(entry["doc_hash"])  # 같은 보고서가 두 번 들어 있어도 한 번만 분석
+        pending.append(entry)
+    logging.info(f"보고서 {len(entries)}개 중 {len(entries) - len(pending)}개 건너뜀 (완료/중복), {len(pending)}개 분석")
+    if not pending:
+        return 0
+
+    context = multiprocessing.get_context("spawn")
+    llm_slots = context.BoundedSemaphore(args.llm_concurrency)
+    records = []
+    start = time.perf_counter()
+    with open(args.output, 'a', encoding='utf-8') as output, \
+            ProcessPoolExecutor(max_workers=max(1, args.workers), mp_context=context, initializer=_init_worker,
+                                initargs=(llm_slots,), max_tasks_per_child=args.max_tasks_per_child) as executor:
+        futures = {executor.submit(analyze_one, entry, args.corpus): entry for entry in pending}
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                # 작업 프로세스 비정상 종료 (메모리 부족 등)
+                record = {"path": entry["path"], "doc_hash": entry["doc_hash"], "company": entry["company"],
+                          "year": entry["year"], "status": "error", "error": f"{type(e).__name__}: {str(e)}"}
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            os.fsync(output.fileno())
+            records.append(record)
+            elapsed = time.perf_counter() - start
+            logging.info(f"[{len(records)}/{len(pending)}] {record['status']} {os.path.basename(entry['path'])} "
+                         f"({record.get('seconds', 0):.1f}s, 누적 {len(records) / elapsed * 3600:.0f}개/시간)")
+
+    summary = summarize(records, time.perf_counter() - start)
+    if args.corpus:
+        # 보고서 추가는 파일에 이어 쓰기만 하므로 끝에 한 번 인덱스 학습/합치기
+        from job_runner import maintain_corpus
+        maintain_corpus()
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary["reports_failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
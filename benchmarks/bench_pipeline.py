@@ -0,0 +1,189 @@
+"""
+RAG 파이프라인 단계별 벤치마크 (네트워크 불필요)
+- 오프라인 백엔드(해시 임베딩, 대본형 LLM)와 합성 PDF로 실행
+- 추출 / 분할 / 임베딩 / FAISS 빌드 / 검색 / 전체 그래프 소요 시간과 RSS를 JSON으로 출력
+
+사용법:
+    python -m benchmarks.bench_pipeline --pages 300 --output bench.json
+    python -m benchmarks.bench_pipeline --pages 600 --llm-latency 2.0 --embedding-latency 0.3
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+
+
+# 프로젝트 모듈 import 전에 오프라인 백엔드 선택 및 캐시 비활성화
+os.environ["ESG_BACKEND"] = "offline"
+os.environ.setdefault("ESG_INDEX_CACHE", "0")
+os.environ.setdefault("ESG_EMBEDDING_CACHE", "0")
+os.environ.setdefault("ESG_ANSWER_CACHE", "0")
+
+
+QUESTIONS = [
+    "Scope 1, 2, 3 온실가스 배출량이 모두 보고되어 있습니까? 각 Scope별 수치와 단위, 연도를 알려주세요.",
+    "에너지 사용량(전력, 연료 등)과 재생에너지 비율이 보고되어 있습니까? 구체적인 수치를 알려주세요.",
+    "Water withdrawal and recycling rate",
+    "Waste generated and recycling rate",
+    "Scope 3 emissions methodology GHG Protocol",
+    "Carbon neutrality 2050 target and interim roadmap",
+]
+
+
+def current_rss_mb():
+    """현재 RSS (MB)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb():
+    """프로세스 시작 이후 최대 RSS (MB, Linux 기준 ru_maxrss는 KB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, func, **extra):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        self.stages[name] = {
+            "seconds": round(elapsed, 4),
+            "rss_mb": round(current_rss_mb() or 0, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            **extra,
+        }
+        print(f"{name:<16} {elapsed:8.3f}s  rss={self.stages[name]['rss_mb']:.0f}MB", file=sys.stderr)
+        return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def run_benchmark(pdf_path, pages, extract_workers, retrieval_repeat, run_graph):
+    from langchain_community.vectorstores import FAISS
+
+    import rag_engine
+    from rag_engine import ESG_RAG
+    from backends import make_embeddings
+    from pdf_loader import iter_page_texts
+
+    timer = StageTimer()
+
+    # 1. 페이지 텍스트 추출
+    page_texts = timer.run(
+        "extraction", lambda: list(iter_page_texts(pdf_path, pages, workers=extract_workers)),
+        workers=extract_workers,
+    )
+
+    # 2. 분할 (인덱싱 파이프라인의 페이지 → 청크 단계를 그대로 사용)
+    stage_rag = ESG_RAG.__new__(ESG_RAG)
+    stage_rag.pdf_path = pdf_path
+    stage_rag.extract_workers = extract_workers
+    page_documents = [
+        rag_engine.Document(page_content=text, metadata={'page': page_num, 'page_label': page_num + 1})
+        for page_num, text, error in page_texts
+        if text and len(text.strip()) >= 50
+    ]
+    chunks = timer.run("splitting", lambda: list(stage_rag._iter_chunks(page_documents)))
+    timer.stages["splitting"]["chunks"] = len(chunks)
+
+    # 3. 임베딩
+    embeddings = make_embeddings(ESG_RAG.EMBEDDING_MODEL, "offline")
+    texts = [chunk.page_content for chunk in chunks]
+    vectors = timer.run("embedding", lambda: embeddings.embed_documents(texts))
+
+    # 4. FAISS 빌드
+    timer.run("faiss_build", lambda: FAISS.from_embeddings(
+        list(zip(texts, vectors)), embeddings, metadatas=[chunk.metadata for chunk in chunks]
+    ))
+    del page_texts, page_documents, chunks, texts, vectors
+
+    # 5. 전체 인덱싱 (스트리밍 파이프라인, 캐시 비활성화)
+    rag = timer.run("index_total", lambda: ESG_RAG(pdf_path, "offline", extract_workers=extract_workers))
+
+    # 6. 검색 (질문 임베딩 + FAISS 배치 검색)
+    def retrieve():
+        for _ in range(retrieval_repeat):
+            rag._retrieve_many(QUESTIONS)
+    timer.run("retrieval", retrieve, questions=len(QUESTIONS), repeat=retrieval_repeat)
+
+    # 7. 전체 LangGraph 분석 (인덱싱 제외)
+    if run_graph:
+        from agent_engine import ESGRadarAgent
+        timer.run("graph", lambda: ESGRadarAgent(pdf_path, "offline", rag=rag).run())
+
+    return timer.stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ESG RAG 파이프라인 단계별 벤치마크")
+    parser.add_argument("--pages", type=int, default=300, help="합성 PDF 페이지 수")
+    parser.add_argument("--pdf", help="합성 PDF 대신 사용할 PDF 경로")
+    parser.add_argument("--extract-workers", type=int, default=1)
+    parser.add_argument("--embedding-latency", type=float, default=0.0, help="임베딩 요청당 지연(초)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="LLM 호출당 지연(초)")
+    parser.add_argument("--retrieval-repeat", type=int, default=20)
+    parser.add_argument("--skip-graph", action="store_true", help="LangGraph 전체 분석 단계 생략")
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (없으면 stdout)")
+    args = parser.parse_args()
+
+    os.environ["ESG_OFFLINE_EMBEDDING_LATENCY"] = str(args.embedding_latency)
+    os.environ["ESG_OFFLINE_LLM_LATENCY"] = str(args.llm_latency)
+
+    from pdf_loader import count_pages
+    from benchmarks.synthetic_pdf import make_pdf
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = args.pdf
+        if pdf_path is None:
+            pdf_path = make_pdf(os.path.join(tmp_dir, "synthetic_report.pdf"), args.pages)
+        pages = count_pages(pdf_path)
+        stages = run_benchmark(pdf_path, pages, args.extract_workers, args.retrieval_repeat, not args.skip_graph)
+
+        result = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "pdf": os.path.basename(pdf_path),
+                "pdf_bytes": os.path.getsize(pdf_path),
+                "pages": pages,
+                "embedding_latency": args.embedding_latency,
+                "llm_latency": args.llm_latency,
+            },
+            "stages": stages,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+청크/벡터 메모리 표현 벤치마크 (네트워크 불필요)
+- 합성 PDF로 인덱스를 만든 뒤 같은 청크를 두 가지 형태로 비교
+  before: LangChain InMemoryDocstore (청크별 Document 객체) + float32 벡터
+  after: 압축 청크 저장소 (UTF-8 버퍼 + 정수 배열) + float32/float16/sq8 벡터
+- 청크당 바이트(텍스트/메타데이터/벡터)와, 형식별 ask 결과(답변, 근거 문서, 페이지)가 before와 같은지 JSON으로 출력
+
+사용법:
+    python -m benchmarks.chunk_memory --pages 300
+    python -m benchmarks.chunk_memory --pdf report.pdf --output memory.json
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import types
+import argparse
+import tempfile
+
+from benchmarks.bench_pipeline import QUESTIONS, git_revision
+
+
+def python_bytes(root):
+    """root에서 참조로 닿는 파이썬 객체의 총 크기 (클래스/모듈/함수 제외, 같은 객체는 한 번만)"""
+    skip = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType)
+    seen = set()
+    total = 0
+    pending = [root]
+    while pending:
+        objects = [obj for obj in pending if id(obj) not in seen and not isinstance(obj, skip)]
+        for obj in objects:
+            seen.add(id(obj))
+            total += sys.getsizeof(obj)
+        pending = gc.get_referents(*objects)
+    return total
+
+
+def ask_all(rag):
+    """질문별 (답변, 근거 문서, 근거 페이지) — 근거 문서는 집합에서 만들어지므로 정렬해서 비교"""
+    results = []
+    for question in QUESTIONS:
+        answer, sources, pages = rag.ask(question, use_cache=False)
+        results.append((answer, sorted(sources), sorted(pages)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="청크/벡터 메모리 표현 벤치마크")
+    parser.add_argument("--pages", type=int, default=300, help="합성 PDF 페이지 수")
+    parser.add_argument("--pdf", help="합성 PDF 대신 사용할 PDF 경로")
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (없으면 stdout)")
+    args = parser.parse_args()
+
+    from rag_engine import ESG_RAG
+    from chunk_store import compact_vector_store, VECTOR_ENCODINGS
+    from benchmarks.synthetic_pdf import make_pdf
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = args.pdf or make_pdf(os.path.join(tmp_dir, "synthetic_report.pdf"), args.pages)
+        rag = ESG_RAG(pdf_path, "offline", index_cache=False, embedding_store=False, answer_cache=False)
+        # 압축 전 형태 (빌드 직후의 LangChain 벡터 저장소)
+        raw = rag._build_vector_db(rag.embeddings)
+
+    chunks = raw.index.ntotal
+    rag.vector_store = raw
+    expected = ask_all(rag)
+    before = python_bytes([raw.docstore._dict, raw.index_to_docstore_id])
+    formats = {
+        "langchain+float32": {
+            "chunk_bytes": round(before / chunks, 1),
+            "vector_bytes": raw.index.sa_code_size(),
+            "total_bytes": round(before / chunks + raw.index.sa_code_size(), 1),
+        }
+    }
+    for encoding in VECTOR_ENCODINGS:
+        start = time.perf_counter()
+        rag.vector_store = compact_vector_store(raw, encoding)
+        compact_seconds = time.perf_counter() - start
+        docstore, index = rag.vector_store.docstore, rag.vector_store.index
+        results = ask_all(rag)
+        formats[f"packed+{encoding}"] = {
+            "chunk_bytes": round(docstore.nbytes() / chunks, 1),
+            "vector_bytes": index.sa_code_size(),
+            "total_bytes": round(docstore.nbytes() / chunks + index.sa_code_size(), 1),
+            "compact_seconds": round(compact_seconds, 3),
+            "same_answers": sum(result == baseline for result, baseline in zip(results, expected)),
+            "same_pages": sum(result[2] == baseline[2] for result, baseline in zip(results, expected)),
+        }
+
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "pdf": os.path.basename(pdf_path),
+            "chunks": chunks,
+            "dim": raw.index.d,
+            "questions": len(QUESTIONS),
+            "mean_chunk_text_bytes": round(len(rag.vector_store.docstore._text) / chunks, 1),
+        },
+        "bytes_per_chunk": formats,
+    }
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+코퍼스 인덱스 규모 벤치마크 (네트워크 불필요)
+- 보고서 N개 × 청크 M개의 합성 벡터(보고서마다 주제 중심 주변에 분포)로 CorpusIndex 구성
+- 추가 시간, 인덱스 갱신(학습/합치기) 시간, 인덱스 파일 크기, 청크당 바이트, 검색 지연(필터 없음/회사·연도 필터), 정확 검색 대비 recall@k를 JSON으로 출력
+
+사용법:
+    python -m benchmarks.corpus_scale --documents 400 --chunks 500 --dim 256
+    python -m benchmarks.corpus_scale --documents 400 --chunks 500 --index hnsw --pq-m 32 --output corpus.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from benchmarks.bench_pipeline import current_rss_mb, git_revision
+from corpus_index import CorpusIndex
+
+
+class FixedQueryEmbeddings:
+    """미리 만든 질문 벡터를 그대로 돌려주는 임베딩 (검색 비용만 측정)"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return self.vectors[:len(texts)]
+
+
+def synthetic_report(rng, centers, chunks, dim):
+    """주제 중심 몇 개 주변에 분포한 청크 벡터로 보고서 하나의 FAISS 벡터 저장소 구성"""
+    topics = rng.choice(len(centers), size=chunks)
+    vectors = centers[topics] + 0.3 * rng.standard_normal((chunks, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = faiss.IndexFlatL2(dim)
+    index.add(vectors)
+    docstore = InMemoryDocstore({
+        str(i): Document(page_content=f"chunk {i} topic {topic}", metadata={"page": i // 4})
+        for i, topic in enumerate(topics)
+    })
+    return FAISS(embedding_function=None, index=index, docstore=docstore,
+                 index_to_docstore_id={i: str(i) for i in range(chunks)}), vectors
+
+
+def timed_search(corpus, queries, k, repeat, **filters):
+    embeddings = FixedQueryEmbeddings(queries)
+    labels = [f"q{i}" for i in range(len(queries))]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        hits = corpus.search(labels, embeddings, k=k, **filters)
+    return (time.perf_counter() - start) / repeat, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="코퍼스 인덱스 규모 벤치마크")
+    parser.add_argument("--documents", type=int, default=200, help="보고서 수")
+    parser.add_argument("--chunks", type=int, default=400, help="보고서당 청크 수")
+    parser.add_argument("--dim", type=int, default=256, help="벡터 차원")
+    parser.add_argument("--index", default="ivf", choices=["ivf", "hnsw"], help="ANN 인덱스 종류")
+    parser.add_argument("--pq-m", type=int, default=0, help="PQ 부분 벡터 수 (0이면 압축 안 함)")
+    parser.add_argument("--train-min", type=int, default=10000, help="ANN 인덱스로 전환하는 청크 수")
+    parser.add_argument("--queries", type=int, default=64, help="한 번에 검색할 질문 수")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5, help="검색 반복 횟수 (평균)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (없으면 stdout)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((64, args.dim)).astype(np.float32)
+    all_vectors = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        corpus = CorpusIndex(tmpdir, index_type=args.index, pq_m=args.pq_m, train_min=args.train_min)
+        add_seconds = maintain_seconds = 0.0
+        for number in range(args.documents):
+            vector_store, vectors = synthetic_report(rng, centers, args.chunks, args.dim)
+            start = time.perf_counter()
+            corpus.add_document(f"{number:064x}", vector_store, company=f"Supplier {number % 100}",
+                                year=2021 + number % 3, filename=f"report-{number}.pdf")
+            add_seconds += time.perf_counter() - start
+            # 작업 러너의 백그라운드 갱신을 보고서마다 실행한 것으로 모사 (필요할 때만 학습/합치기)
+            start = time.perf_counter()
+            corpus.maintain()
+            maintain_seconds += time.perf_counter() - start
+            all_vectors.append(vectors)
+            if (number + 1) % 50 == 0:
+                print(f"{number + 1}/{args.documents}개 보고서 추가", file=sys.stderr)
+
+        all_vectors = np.vstack(all_vectors)
+        picks = rng.choice(len(all_vectors), size=args.queries, replace=False)
+        queries = all_vectors[picks] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+        exact = faiss.IndexFlatL2(args.dim)
+        exact.add(all_vectors)
+        _, truth = exact.search(queries, args.k)
+
+        search_seconds, hits = timed_search(corpus, queries, args.k, args.repeat)
+        found = [{int(doc.metadata["doc_hash"], 16) * args.chunks + int(doc.page_content.split()[1]) for doc in row}
+                 for row in hits]
+        recall = float(np.mean([len(found[i] & set(truth[i].tolist())) / args.k for i in range(args.queries)]))
+        filtered_seconds, _ = timed_search(corpus, queries, args.k, args.repeat,
+                                           companies=[f"Supplier {i}" for i in range(10)], years=[2023])
+        stats = corpus.stats()
+        chunks = stats["chunks"]
+        disk = {name: os.path.getsize(os.path.join(tmpdir, name)) for name in os.listdir(tmpdir)
+                if not name.startswith(".")}
+
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "documents": args.documents,
+            "chunks_per_document": args.chunks,
+            "dim": args.dim,
+        },
+        "index": stats["spec"],
+        "chunks": chunks,
+        "add_seconds": round(add_seconds, 2),
+        "maintain_seconds": round(maintain_seconds, 2),
+        "index_bytes_per_chunk": round(stats["index_bytes"] / chunks, 1),
+        "disk_bytes": disk,
+        "search_ms_per_query": round(search_seconds / args.queries * 1000, 3),
+        "filtered_search_ms_per_query": round(filtered_seconds / args.queries * 1000, 3),
+        f"recall@{args.k}": round(recall, 3),
+        "rss_mb": current_rss_mb(),
+    }
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
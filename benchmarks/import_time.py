@@ -0,0 +1,101 @@
+"""
+모듈 import 비용 측정 (워커 부팅/재시작 시간 점검용)
+- 대상 모듈마다 새 인터프리터에서 `python -X importtime -c "import 모듈"` 실행
+- 전체 소요 시간과, 최상위 패키지별(langchain_core, langgraph, faiss, openai 등) 자체 import 시간 합계를 JSON으로 출력
+
+사용법:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --modules app rag_engine agent_engine --top 15 --output imports.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from benchmarks.bench_pipeline import git_revision
+
+
+DEFAULT_MODULES = ["app", "job_runner", "rag_engine", "agent_engine"]
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """-X importtime 출력 → [(모듈, 자체 시간 us, 누적 시간 us)]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # 머리글 줄
+        entries.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return entries
+
+
+def measure(module, top):
+    """새 인터프리터에서 모듈 하나를 import하며 측정"""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "import 실패"}
+
+    entries = parse_importtime(completed.stderr)
+    packages = {}
+    for name, self_us, _ in entries:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    cumulative = {name: cumulative_us for name, _, cumulative_us in entries}
+    return {
+        "wall_seconds": round(wall, 3),
+        "import_seconds": round(cumulative.get(module, 0) / 1e6, 3),
+        "modules_loaded": len(entries),
+        "packages": [
+            {"package": package, "seconds": round(self_us / 1e6, 3)}
+            for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈별 import 시간 측정")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="측정할 모듈")
+    parser.add_argument("--top", type=int, default=10, help="모듈마다 표시할 상위 패키지 수")
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (없으면 stdout)")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        results[module] = measure(module, args.top)
+        summary = results[module]
+        if "error" in summary:
+            print(f"{module:<16} 실패: {summary['error']}", file=sys.stderr)
+        else:
+            heaviest = ", ".join(f"{p['package']} {p['seconds']:.2f}s" for p in summary["packages"][:3])
+            print(f"{module:<16} {summary['import_seconds']:7.3f}s  ({summary['modules_loaded']}개 모듈; {heaviest})",
+                  file=sys.stderr)
+
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+        },
+        "modules": results,
+    }
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
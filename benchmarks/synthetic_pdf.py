@@ -0,0 +1,128 @@
+"""
+벤치마크용 합성 ESG 보고서 PDF 생성기
+- 외부 라이브러리 없이 PDF 1.4 바이트를 직접 작성 (Helvetica, ASCII 텍스트)
+- 실제 보고서처럼 반복 머리말/꼬리말, 페이지 번호, 목차, 배출량 표, 면책 문구 포함
+  (같은 지표는 보고서 전체에서 같은 수치로 반복 - 실제 보고서의 요약표/데이터표처럼)
+- 같은 seed면 항상 같은 파일 생성
+
+사용법: python -m benchmarks.synthetic_pdf output.pdf --pages 300
+"""
+
+import argparse
+import random
+
+
+COMPANY = "Hanbit Materials Co., Ltd."
+HEADER = f"{COMPANY} | 2023 Sustainability Report"
+DISCLAIMER = "This report contains forward-looking statements that are subject to risks and uncertainties."
+
+SECTIONS = [
+    "Climate Change Response", "Energy Management", "Water Stewardship", "Waste and Circularity",
+    "Environmental Compliance", "ESG Governance", "Supply Chain Management", "Human Rights",
+]
+
+NARRATIVE = [
+    "The company applies the GHG Protocol Corporate Standard to calculate Scope 1 and Scope 2 emissions.",
+    "Scope 3 emissions are estimated for purchased goods, upstream transportation and use of sold products.",
+    "Revenue increased while total greenhouse gas emissions decreased, demonstrating decoupling.",
+    "We target carbon neutrality by 2050 with an interim reduction of 40 percent by 2030 against 2019.",
+    "Renewable electricity is procured through power purchase agreements and on-site solar generation.",
+    "Water withdrawal is monitored at every site and recycled water is reused in cooling processes.",
+    "Waste is sorted at source and recycling rates are reported to the board ESG committee quarterly.",
+    "No significant fines or sanctions for environmental violations were reported during the period.",
+    "The ESG committee under the board of directors reviews climate risks and opportunities annually.",
+    "Eco-friendly product lines are certified under third-party environmental labelling schemes.",
+]
+
+METRICS = [
+    ("Scope 1 emissions", "tCO2eq"), ("Scope 2 emissions", "tCO2eq"), ("Scope 3 emissions", "tCO2eq"),
+    ("Energy consumption", "TJ"), ("Electricity use", "MWh"), ("Water withdrawal", "m3"),
+    ("Waste generated", "ton"), ("Recycling rate", "%"),
+]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_lines(page_num, total_pages, rnd, kpi_values):
+    lines = [HEADER, ""]
+    if page_num == 1:
+        lines.append("Table of Contents")
+        for i, section in enumerate(SECTIONS):
+            lines.append(f"{i + 1}. {section} ........ {4 + i * max(1, total_pages // len(SECTIONS))}")
+    else:
+        section = SECTIONS[(page_num * len(SECTIONS)) // (total_pages + 1)]
+        lines.append(section)
+        for _ in range(rnd.randint(6, 10)):
+            lines.append(rnd.choice(NARRATIVE))
+        if page_num % 3 == 0:
+            lines.append("")
+            lines.append("Key performance indicators 2021 2022 2023 Unit")
+            for name, unit in rnd.sample(METRICS, 4):
+                lines.append(f"{name} {' '.join(kpi_values[name])} {unit}")
+        for _ in range(rnd.randint(4, 8)):
+            lines.append(" ".join(rnd.choice(NARRATIVE).split()[:rnd.randint(6, 14)]) + ".")
+    lines.append("")
+    lines.append(DISCLAIMER)
+    lines.append(f"- {page_num} -")
+    return lines
+
+
+def make_pdf(path, pages, seed=2023):
+    """pages 페이지짜리 합성 보고서를 path에 저장"""
+    rnd = random.Random(seed)
+    kpi_values = {
+        name: [f"{rnd.randint(1, 99)}.{rnd.randint(0, 9)}" if unit == "%" else f"{rnd.randint(1000, 900000):,}"
+               for _ in range(3)]
+        for name, unit in METRICS
+    }
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = font_id + 2 * pages + 1
+    page_ids = []
+    for page_num in range(1, pages + 1):
+        lines = _page_lines(page_num, pages, rnd, kpi_values)
+        text_ops = " ".join(f"({_escape(line)}) '" for line in lines)
+        stream = f"BT /F1 9 Tf 40 800 Td 12 TL {text_ops} ET".encode('latin-1')
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842]"
+            b" /Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+    add(b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % i for i in page_ids) + b"] /Count %d >>" % pages)
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset)
+
+    with open(path, 'wb') as f:
+        f.write(out)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 ESG 보고서 PDF 생성")
+    parser.add_argument("output")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=2023)
+    args = parser.parse_args()
+    make_pdf(args.output, args.pages, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+보고서 반복 문구 제거 (분할/임베딩 전 정제)
+- 머리말/꼬리말: 페이지 위/아래 몇 줄 중 여러 페이지에 반복되는 줄 (숫자는 무시하고 비교하므로 페이지 번호 포함)
+- 목차: "항목 ........ 12" 형태의 점선 줄
+- 중복 페이지: 정제 후 내용이 거의 같은 페이지 (simhash로 후보를 찾고 단어 3-gram 자카드 유사도로 확인)
+전체 페이지를 본 뒤에야 반복 여부를 알 수 있으므로 1차로 관찰, 2차로 정제
+"""
+
+import os
+import re
+import hashlib
+
+import numpy as np
+
+
+STRIP_BOILERPLATE = os.getenv("ESG_STRIP_BOILERPLATE", "1") != "0"
+# 전체 페이지 중 이 비율 이상에서 반복되는 위/아래 줄을 머리말/꼬리말로 판단
+MIN_REPEAT_RATIO = float(os.getenv("ESG_BOILERPLATE_MIN_RATIO", "0.3"))
+MIN_PAGES = 4  # 페이지가 이보다 적으면 반복 판단을 하지 않음
+EDGE_LINES = 4  # 페이지 위/아래에서 검사할 줄 수
+NEAR_DUPLICATE_BITS = 3  # simhash 해밍 거리가 이 이하면 중복 후보
+NEAR_DUPLICATE_JACCARD = 0.9  # 후보 중 단어 3-gram 자카드 유사도가 이 이상이면 중복 페이지
+
+_DIGITS_RE = re.compile(r"\d+")
+_TOC_RE = re.compile(r"(?:\.{4,}|·{4,}|…{2,})\s*\d+\s*$")
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_line(line):
+    """비교용 정규화 (공백 정리, 소문자, 숫자는 #으로)"""
+    return _DIGITS_RE.sub("#", " ".join(line.split()).lower())
+
+
+def _edge_positions(lines):
+    """빈 줄을 제외하고 페이지 위/아래 EDGE_LINES줄의 위치"""
+    positions = [i for i, line in enumerate(lines) if line.strip()]
+    if len(positions) <= EDGE_LINES * 2:
+        return positions
+    return positions[:EDGE_LINES] + positions[-EDGE_LINES:]
+
+
+def _edge_lines(lines):
+    return [lines[i] for i in _edge_positions(lines)]
+
+
+def shingle_hashes(text):
+    """단어 3-gram 해시 (정렬된 uint64 배열)"""
+    words = _WORD_RE.findall(text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    digests = b"".join(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles)
+    return np.unique(np.frombuffer(digests, dtype=np.uint64))
+
+
+def simhash(hashes):
+    """shingle 해시 배열 → 64비트 simhash"""
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    weights = bits.sum(axis=0, dtype=np.int64) * 2 - len(hashes)
+    return int.from_bytes(np.packbits(weights > 0, bitorder='little').tobytes(), 'little')
+
+
+def jaccard(a, b):
+    intersection = len(np.intersect1d(a, b, assume_unique=True))
+    return intersection / (len(a) + len(b) - intersection)
+
+
+class BoilerplateFilter:
+    """observe()로 모든 페이지를 본 뒤 clean()으로 페이지별 정제"""
+
+    def __init__(self, min_repeat_ratio=MIN_REPEAT_RATIO):
+        self.min_repeat_ratio = min_repeat_ratio
+        self.pages = 0
+        self._line_pages = {}  # 정규화된 위/아래 줄 -> 등장 페이지 수
+        self._repeated = None
+        # 중복 페이지 탐지: simhash를 16비트씩 4구간으로 나눠 버킷팅 (해밍 거리 3 이하면 한 구간은 반드시 일치)
+        self._buckets = {}  # (구간, 16비트 값) -> [페이지 순번]
+        self._simhashes = []
+        self._shingles = []
+        self.stats = {"pages": 0, "pages_dropped": 0, "lines_removed": 0,
+                      "chars_before": 0, "chars_removed": 0}
+
+    def observe(self, text):
+        self.pages += 1
+        for line in set(normalize_line(line) for line in _edge_lines(text.splitlines())):
+            self._line_pages[line] = self._line_pages.get(line, 0) + 1
+
+    def _repeated_lines(self):
+        if self._repeated is None:
+            if self.pages < MIN_PAGES:
+                self._repeated = set()
+            else:
+                threshold = max(2, self.pages * self.min_repeat_ratio)
+                self._repeated = {line for line, count in self._line_pages.items() if count >= threshold}
+            self._line_pages = None
+        return self._repeated
+
+    def _is_near_duplicate(self, text):
+        hashes = shingle_hashes(text)
+        value = simhash(hashes)
+        bands = [(band, value >> (band * 16) & 0xFFFF) for band in range(4)]
+        candidates = set()
+        for band in bands:
+            candidates.update(self._buckets.get(band, ()))
+        for other in candidates:
+            if (bin(value ^ self._simhashes[other]).count("1") <= NEAR_DUPLICATE_BITS
+                    and jaccard(hashes, self._shingles[other]) >= NEAR_DUPLICATE_JACCARD):
+                return True
+        for band in bands:
+            self._buckets.setdefault(band, []).append(len(self._simhashes))
+        self._simhashes.append(value)
+        self._shingles.append(hashes)
+        return False
+
+    def clean(self, text):
+        """반복 머리말/꼬리말, 목차 줄 제거 (중복 페이지면 빈 문자열)"""
+        repeated = self._repeated_lines()
+        lines = text.splitlines()
+        # 반복 줄은 학습할 때와 같은 위/아래 범위에서만 제거 (본문의 같은 문장/소제목은 유지)
+        edges = {i for i in _edge_positions(lines) if normalize_line(lines[i]) in repeated} if repeated else set()
+        kept = []
+        for i, line in enumerate(lines):
+            if i in edges or _TOC_RE.search(line):
+                self.stats["lines_removed"] += 1
+                continue
+            kept.append(line)
+        cleaned = "\n".join(kept).strip()
+
+        if cleaned and self._is_near_duplicate(cleaned):
+            self.stats["pages_dropped"] += 1
+            cleaned = ""
+        self.stats["pages"] += 1
+        self.stats["chars_before"] += len(text)
+        self.stats["chars_removed"] += len(text) - len(cleaned)
+        return cleaned
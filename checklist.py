@@ -0,0 +1,97 @@
+"""
+K-ESG 체크리스트 일괄 점검
+- 여러 항목의 검색 결과를 합쳐 LLM 한 번의 JSON 응답으로 항목별 공개 여부/수치/근거 페이지를 받음
+- 응답은 스키마로 검증하며, 형식이 맞지 않으면 ValueError (호출 측에서 항목별 질문으로 대체)
+"""
+
+import re
+import json
+import hashlib
+from typing import List, Optional
+
+from langchain_core.pydantic_v1 import BaseModel, ValidationError, validator
+
+
+CHECKLIST_PROMPT = """
+        당신은 전문 ESG 규제 검토관입니다. 아래 [Context]는 ESG 보고서 발췌문이며, 각 발췌문 앞의 [p.N]은 페이지 번호입니다.
+        [Items]의 각 항목이 보고서에 공개되어 있는지 판단하여 JSON 객체 하나로만 답하십시오.
+
+        응답 형식:
+        {{"items": {{"<항목 키>": {{"found": true, "summary": "요약", "values": [{{"metric": "지표명", "value": "수치", "unit": "단위", "year": 2023}}], "pages": [12]}}}}}}
+
+        판단 기준:
+        1. [Items]의 모든 항목 키에 대해 답하십시오.
+        2. [Context]에 구체적 수치나 명시적 기재가 있을 때만 found를 true로 하십시오.
+        3. summary는 수치, 단위, 연도, 방법론을 포함해 2-3문장으로 작성하십시오.
+        4. values에는 [Context]에 실제로 적힌 수치만 넣으십시오 (없으면 빈 배열).
+        5. pages에는 근거가 된 발췌문의 [p.N] 번호만 넣으십시오.
+        6. 근거가 없으면 found는 false, summary는 "보고서에서 해당 내용을 찾을 수 없습니다"로 하십시오.
+
+        [Items]:
+        {items}
+
+        [Context]:
+        {context}
+        """
+
+PROMPT_HASH = hashlib.sha256(CHECKLIST_PROMPT.encode('utf-8')).hexdigest()
+
+
+class ChecklistValue(BaseModel):
+    metric: str
+    value: str
+    unit: Optional[str] = None
+    year: Optional[int] = None
+
+    @validator("year", pre=True)
+    def _parse_year(cls, value):
+        # "2023년", "FY2023" 같은 표기에서 연도만 추출
+        if value is None or isinstance(value, int):
+            return value
+        match = re.search(r"(19|20)\d{2}", str(value))
+        return int(match.group(0)) if match else None
+
+
+class ChecklistItem(BaseModel):
+    found: bool
+    summary: str = ""
+    values: List[ChecklistValue] = []
+    pages: List[int] = []
+
+
+def format_items(items):
+    """{키: 질문} → 프롬프트의 [Items] 목록"""
+    return "\n".join(f"- {key}: {' '.join(query.split())}" for key, query in items.items())
+
+
+def format_context(documents):
+    """청크마다 [p.N] 페이지 표시를 붙여 [Context] 구성"""
+    parts = []
+    for doc in documents:
+        page = doc.metadata.get('page_label')
+        if page is None and 'page' in doc.metadata:
+            page = doc.metadata['page'] + 1
+        parts.append(f"[p.{page}] {doc.page_content}")
+    return "\n\n".join(parts)
+
+
+def parse_response(text, keys):
+    """LLM 응답(JSON) → {키: ChecklistItem} (형식 오류나 누락 항목이 있으면 ValueError)"""
+    match = re.search(r"\{.*\}", text, re.S)  # 코드 블록 등으로 감싼 경우 대비
+    if match is None:
+        raise ValueError("체크리스트 응답에 JSON이 없습니다")
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"체크리스트 응답 JSON 파싱 실패: {str(e)}")
+
+    raw_items = data.get("items", data) if isinstance(data, dict) else None
+    if not isinstance(raw_items, dict):
+        raise ValueError("체크리스트 응답 형식 오류: items 객체가 없습니다")
+    missing = [key for key in keys if key not in raw_items]
+    if missing:
+        raise ValueError(f"체크리스트 응답에 누락된 항목: {', '.join(missing)}")
+    try:
+        return {key: ChecklistItem.parse_obj(raw_items[key]) for key in keys}
+    except ValidationError as e:
+        raise ValueError(f"체크리스트 응답 스키마 오류: {str(e)}")
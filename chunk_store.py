@@ -0,0 +1,189 @@
+"""
+메모리 맵 기반 읽기 전용 인덱스 저장 형식
+- FAISS 인덱스: faiss 기본 형식, IO_FLAG_MMAP_IFC로 열어 벡터를 파일에서 직접 참조
+- 청크 텍스트: UTF-8 바이트를 이어 붙인 한 파일 + 시작 위치 배열 (offsets[i]:offsets[i+1])
+- 청크 메타데이터: 페이지 번호/시작 위치를 값 범위에 맞는 가장 작은 정수 배열로 저장
+- 벡터: float32(기본) 또는 float16/8비트 스칼라 양자화 (ESG_VECTOR_ENCODING)
+인덱스 캐시를 쓰지 않을 때도 같은 압축 형식(PackedChunkStore)으로 메모리에 보관
+모든 파일을 mmap으로 열기 때문에 같은 보고서를 연 워커들이 OS 페이지 캐시를 공유 (워커별 사본 없음)
+캐시 항목이 교체/제거되어도 이미 연 매핑은 유지되므로 사용 중인 엔진에는 영향 없음
+"""
+
+import os
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+
+
+INDEX_FILE = "index.faiss"
+TEXT_FILE = "chunks.bin"
+OFFSETS_FILE = "chunk_offsets.npy"
+PAGES_FILE = "chunk_pages.npy"
+STARTS_FILE = "chunk_starts.npy"
+
+# 벡터 저장 형식 → faiss 스칼라 양자화 종류 (float32는 IndexFlat 그대로)
+VECTOR_ENCODINGS = {
+    "float32": None,
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# faiss 1.7.4 이전에는 IndexFlat mmap을 지원하지 않으므로 일반 로드 (워커별 사본)
+_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | getattr(faiss, "IO_FLAG_READ_ONLY", 0)
+
+
+class PositionIds:
+    """FAISS 번호 = 청크 번호인 index_to_docstore_id (청크 수만큼 dict를 만들지 않음)"""
+
+    def __init__(self, size):
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, position):
+        if not 0 <= position < self.size:
+            raise KeyError(position)
+        return position
+
+    def __contains__(self, position):
+        return isinstance(position, int) and 0 <= position < self.size
+
+    def values(self):
+        return range(self.size)
+
+    def items(self):
+        return ((position, position) for position in range(self.size))
+
+
+class PackedChunkStore:
+    """
+    청크 텍스트를 UTF-8 버퍼 하나 + 시작 위치 배열로, 메타데이터를 정수 배열로 보관
+    (청크마다 Document/str/dict 객체를 두지 않음, LangChain docstore의 search()와 같은 형태로 Document 반환)
+    """
+
+    shared = False
+
+    def __init__(self, text, offsets, pages, starts):
+        self._text = text
+        self._offsets = offsets
+        self._pages = pages
+        self._starts = starts
+        self.size = len(pages)
+
+    def __len__(self):
+        return self.size
+
+    def text(self, position):
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        return bytes(self._text[start:end]).decode('utf-8')
+
+    def search(self, position):
+        page = int(self._pages[position])
+        return Document(
+            page_content=self.text(position),
+            metadata={'page': page, 'page_label': page + 1, 'start_index': int(self._starts[position])}
+        )
+
+    def pages(self):
+        """청크별 페이지 번호 배열 (0부터, FAISS 번호 순서)"""
+        return self._pages
+
+    def texts(self):
+        return (self.text(position) for position in range(self.size))
+
+    def nbytes(self):
+        return len(self._text) + self._offsets.nbytes + self._pages.nbytes + self._starts.nbytes
+
+
+class MappedChunkStore(PackedChunkStore):
+    """mmap한 청크 텍스트/메타데이터 (여러 워커가 같은 페이지 캐시를 읽음)"""
+
+    shared = True  # 페이지 캐시를 공유하므로 프로세스별 메모리 예산에서 제외
+
+    def __init__(self, directory):
+        text_path = os.path.join(directory, TEXT_FILE)
+        super().__init__(
+            # 빈 파일은 mmap할 수 없음
+            np.memmap(text_path, dtype=np.uint8, mode='r') if os.path.getsize(text_path) else b"",
+            np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode='r'),
+            np.load(os.path.join(directory, PAGES_FILE), mmap_mode='r'),
+            np.load(os.path.join(directory, STARTS_FILE), mmap_mode='r'),
+        )
+
+
+def _smallest_uint(values):
+    """값 범위에 맞는 가장 작은 부호 없는 정수 배열 (페이지 번호/위치는 대부분 uint16/uint32로 충분)"""
+    values = np.asarray(values, dtype=np.int64)
+    top = int(values.max()) if len(values) else 0
+    for dtype in (np.uint16, np.uint32):
+        if top <= np.iinfo(dtype).max:
+            return values.astype(dtype)
+    return values
+
+
+def pack_chunks(vector_store):
+    """FAISS 벡터 저장소의 청크 → (UTF-8 텍스트 버퍼, 위치 배열, 페이지 배열, 시작 위치 배열), FAISS 번호 순서"""
+    docstore = vector_store.docstore
+    if isinstance(docstore, PackedChunkStore):
+        return bytes(docstore._text), docstore._offsets, docstore._pages, docstore._starts
+    ids = vector_store.index_to_docstore_id
+    size = len(ids)
+    parts = []
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    pages = np.zeros(size, dtype=np.int64)
+    starts = np.zeros(size, dtype=np.int64)
+    for position in range(size):
+        doc = docstore.search(ids[position])
+        data = doc.page_content.encode('utf-8')
+        parts.append(data)
+        offsets[position + 1] = offsets[position] + len(data)
+        pages[position] = doc.metadata.get('page', 0)
+        starts[position] = doc.metadata.get('start_index', 0)
+    return b"".join(parts), _smallest_uint(offsets), _smallest_uint(pages), _smallest_uint(starts)
+
+
+def encode_index(index, encoding):
+    """
+    벡터 저장 형식 변환: float32(그대로) | float16 | sq8 (차원별 최소/최대 기준 8비트 스칼라 양자화)
+    검색은 같은 전수 L2 검색이며 거리만 근사 (float16은 순위가 거의 바뀌지 않음)
+    """
+    if encoding not in VECTOR_ENCODINGS:
+        raise ValueError(f"지원하지 않는 벡터 형식: {encoding} ({', '.join(VECTOR_ENCODINGS)})")
+    if encoding == "float32" or not isinstance(index, faiss.IndexFlat):
+        return index
+    vectors = index.reconstruct_n(0, index.ntotal)
+    encoded = faiss.IndexScalarQuantizer(index.d, VECTOR_ENCODINGS[encoding], index.metric_type)
+    encoded.train(vectors)
+    encoded.add(vectors)
+    return encoded
+
+
+def compact_vector_store(vector_store, encoding="float32"):
+    """빌드 직후의 FAISS 벡터 저장소(Document 객체 + float32 벡터) → 압축 청크 저장소 + 지정한 벡터 형식"""
+    docstore = PackedChunkStore(*pack_chunks(vector_store))
+    return FAISS(embedding_function=vector_store.embedding_function, index=encode_index(vector_store.index, encoding),
+                 docstore=docstore, index_to_docstore_id=PositionIds(len(docstore)))
+
+
+def save_vector_store(vector_store, directory):
+    """FAISS 벡터 저장소 → 인덱스 파일 + 청크 텍스트/메타데이터 파일 (FAISS 번호 순서)"""
+    faiss.write_index(vector_store.index, os.path.join(directory, INDEX_FILE))
+    text, offsets, pages, starts = pack_chunks(vector_store)
+    with open(os.path.join(directory, TEXT_FILE), 'wb') as f:
+        f.write(text)
+    np.save(os.path.join(directory, OFFSETS_FILE), offsets)
+    np.save(os.path.join(directory, PAGES_FILE), pages)
+    np.save(os.path.join(directory, STARTS_FILE), starts)
+
+
+def load_vector_store(directory, embeddings):
+    """save_vector_store로 저장한 디렉토리를 읽기 전용 mmap으로 열어 FAISS 벡터 저장소 구성"""
+    index = faiss.read_index(os.path.join(directory, INDEX_FILE), _MMAP_FLAGS)
+    docstore = MappedChunkStore(directory)
+    if index.ntotal != len(docstore):
+        raise ValueError(f"인덱스({index.ntotal})와 청크 수({len(docstore)})가 다릅니다")
+    return FAISS(embedding_function=embeddings, index=index, docstore=docstore,
+                 index_to_docstore_id=PositionIds(len(docstore)))
@@ -0,0 +1,120 @@
+"""
+검색 결과 → 프롬프트 [Context] 조립
+- 같은 페이지에서 겹치거나 맞닿은 청크를 하나로 병합 (청크 overlap 중복 제거)
+- 내용이 똑같은 청크(반복 문구 등)는 순위가 높은 것만 유지
+- 토큰 예산(tiktoken 기준)을 넘는 부분은 순위가 낮은 청크부터 잘라냄
+결과 Document의 페이지 메타데이터는 그대로 유지되므로 출처 페이지는 실제로 보낸 내용 기준
+"""
+
+import os
+import logging
+
+from langchain_core.documents import Document
+
+
+# 질문 하나에 넣을 [Context] 최대 토큰 수 (0이면 제한 없음)
+CONTEXT_MAX_TOKENS = int(os.getenv("ESG_CONTEXT_MAX_TOKENS", "3000"))
+# 예산이 이보다 적게 남으면 청크를 자르지 않고 버림
+MIN_TRUNCATED_TOKENS = 100
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """gpt-4o 토크나이저 (인코딩 파일을 받을 수 없는 환경이면 None)"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.encoding_for_model("gpt-4o")
+        except Exception as e:
+            logging.warning(f"tiktoken 인코딩 로드 실패, 글자 수 기반 근사치 사용: {str(e)}")
+    return _encoding
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text, max_tokens):
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def merge_overlapping(documents):
+    """
+    같은 페이지의 겹치는/맞닿은 청크를 병합 (start_index 메타데이터 필요)
+    병합된 청크는 구성 청크 중 가장 높은 검색 순위 자리에 놓임
+    """
+    spans = []  # [rank, page, start, end, text, metadata]
+    others = []
+    for rank, doc in enumerate(documents):
+        start = doc.metadata.get('start_index')
+        if start is None or 'page' not in doc.metadata:
+            others.append((rank, doc))
+            continue
+        spans.append([rank, doc.metadata['page'], start, start + len(doc.page_content),
+                      doc.page_content, doc.metadata])
+
+    merged = []
+    spans.sort(key=lambda span: (span[1], span[2]))
+    for span in spans:
+        last = merged[-1] if merged else None
+        if last is not None and last[1] == span[1] and span[2] <= last[3]:
+            if span[3] > last[3]:
+                last[4] += span[4][last[3] - span[2]:]
+                last[3] = span[3]
+            last[0] = min(last[0], span[0])
+        else:
+            merged.append(span)
+
+    results = [
+        (rank, Document(page_content=text, metadata=dict(metadata, start_index=start)))
+        for rank, _, start, _, text, metadata in merged
+    ] + others
+    results.sort(key=lambda item: item[0])
+    return [doc for _, doc in results]
+
+
+def drop_duplicates(documents):
+    """공백만 다른 동일 내용 청크 제거 (먼저 나온 것 유지)"""
+    seen = set()
+    unique = []
+    for doc in documents:
+        key = " ".join(doc.page_content.split())
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(doc)
+    return unique
+
+
+def apply_token_budget(documents, max_tokens=CONTEXT_MAX_TOKENS):
+    """순위 순서대로 예산 안에 들어가는 만큼만 남기고, 경계의 청크는 잘라서 포함"""
+    if not max_tokens:
+        return documents
+    packed = []
+    remaining = max_tokens
+    for doc in documents:
+        tokens = count_tokens(doc.page_content)
+        if tokens <= remaining:
+            packed.append(doc)
+            remaining -= tokens
+            continue
+        if remaining >= MIN_TRUNCATED_TOKENS:
+            packed.append(Document(page_content=truncate_tokens(doc.page_content, remaining),
+                                   metadata=dict(doc.metadata, truncated=True)))
+        break
+    return packed
+
+
+def pack_context(documents, max_tokens=CONTEXT_MAX_TOKENS):
+    """검색 순위 순서의 청크 목록 → 병합/중복 제거/예산 적용된 청크 목록"""
+    return apply_token_budget(drop_duplicates(merge_overlapping(documents)), max_tokens)
@@ -0,0 +1,496 @@
+"""
+여러 보고서를 모은 코퍼스 인덱스 (동종 기업/공급망 비교 질문용)
+- 보고서별 인덱스(ESG_RAG)의 청크와 벡터를 다시 임베딩하지 않고 하나의 근사 최근접 이웃(ANN) 인덱스에 추가
+- 청크마다 회사/연도/페이지 태그, 필터는 FAISS ID 선택자로 검색 중에 적용 (전체 코퍼스를 한 번에 검색)
+  후보가 적은 필터는 원본 벡터로 정확 검색 (ANN 그래프/버킷 안에서 후보가 모자라 결과가 비는 것 방지)
+- 인덱스 종류: ivf(기본) | hnsw, ESG_CORPUS_PQ_M > 0이면 곱 양자화(PQ)로 벡터 압축
+  청크 수가 ESG_CORPUS_TRAIN_MIN 미만이면 인덱스 없이 원본 벡터로 정확 검색, 넘으면 학습하여 ANN 인덱스 구성
+  이후 학습 시점의 RETRAIN_FACTOR배로 늘면 nlist를 키워 다시 학습 (원본 벡터는 float16 파일로 보관)
+  PQ 인덱스의 근사 거리 순위는 원본 벡터로 다시 정렬 (원본은 mmap)
+- 청크 텍스트/메타데이터/원본 벡터는 추가 전용 파일에 저장하고 mmap으로 읽음
+  ANN 인덱스도 mmap으로 열어 IVF 리스트/HNSW 벡터는 페이지 캐시에서 읽음 (HNSW 그래프만 메모리에 상주)
+- 문서 추가는 파일에 이어 쓰기만 하고, 학습/재학습/합치기는 maintain()에서 별도로 실행
+  (작업 러너의 백그라운드 스레드, 일괄 분석 CLI 끝, python corpus_index.py)
+  인덱스 밖에 쌓인 청크는 그동안 원본 벡터로 정확 검색하므로 결과는 빠지지 않음
+- 쓰기는 파일 락으로 직렬화, 다른 프로세스가 추가한 문서/갱신한 인덱스는 다음 검색 때 다시 읽음
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import fcntl
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+
+CORPUS_DIR = os.getenv("ESG_CORPUS_DIR", os.path.join("cache", "corpus"))
+CORPUS_ENABLED = os.getenv("ESG_CORPUS", "1") != "0"
+CORPUS_INDEX_TYPE = os.getenv("ESG_CORPUS_INDEX", "ivf")  # ivf | hnsw
+CORPUS_PQ_M = int(os.getenv("ESG_CORPUS_PQ_M", "0"))  # PQ 부분 벡터 수 (0이면 압축 안 함, 임베딩 차원의 약수)
+CORPUS_TRAIN_MIN = int(os.getenv("ESG_CORPUS_TRAIN_MIN", "10000"))
+CORPUS_NPROBE = int(os.getenv("ESG_CORPUS_NPROBE", "32"))
+CORPUS_EF_SEARCH = int(os.getenv("ESG_CORPUS_EF_SEARCH", "128"))
+EXACT_SEARCH_MAX = int(os.getenv("ESG_CORPUS_EXACT_MAX", "50000"))  # 필터 후 후보가 이 이하면 정확 검색
+MERGE_EVERY = int(os.getenv("ESG_CORPUS_MERGE_EVERY", "20000"))  # 인덱스 밖에 쌓인 청크가 이만큼이면 인덱스에 합침
+CORPUS_REFINE = int(os.getenv("ESG_CORPUS_REFINE", "4"))  # PQ 인덱스에서 원본 벡터로 다시 정렬할 후보 배수
+
+HNSW_M = 32
+RETRAIN_FACTOR = 8
+TRAIN_SAMPLE_PER_LIST = 64
+ADD_BATCH_SIZE = 65536
+EXACT_BLOCK_SIZE = 8192
+PQ_TRAIN_MIN = 256  # 8비트 PQ 코드북 학습에 필요한 최소 벡터 수
+
+META_FILE = "corpus.json"
+INDEX_FILE = "corpus.faiss"
+TEXT_FILE = "chunks.bin"
+OFFSETS_FILE = "chunk_ends.i64"  # 청크별 텍스트 끝 위치 (시작 위치는 이전 청크의 끝)
+PAGES_FILE = "chunk_pages.i32"  # 0부터 시작하는 페이지 번호
+DOCS_FILE = "chunk_docs.i32"  # 문서 번호 (corpus.json의 documents 순서)
+VECTORS_FILE = "vectors.f16"
+LOCK_FILE = ".lock"
+MAINTAIN_LOCK_FILE = ".maintain.lock"
+
+# IVF는 역리스트를 파일에서 mmap (OnDiskInvertedLists), 그 밖의 인덱스는 벡터/코드 저장소를 mmap
+_IVF_MMAP_FLAGS = faiss.IO_FLAG_MMAP
+_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | getattr(faiss, "IO_FLAG_READ_ONLY", 0)
+
+_YEAR_RE = re.compile(r"(?<!\d)(20\d{2})(?!\d)")
+
+
+def normalize_company(name):
+    """회사명 비교용 정규화 (대소문자/공백/법인 표기 무시)"""
+    name = re.sub(r"\(주\)|주식회사|\b(co|corp|inc|ltd|llc)\b\.?", " ", (name or "").lower())
+    return " ".join(re.sub(r"[^0-9a-z가-힣]+", " ", name).split())
+
+
+def guess_tags(filename):
+    """파일명에서 회사/연도 추정 (예: '한빛소재_2023_지속가능경영보고서.pdf' → ('한빛소재', 2023))"""
+    stem = os.path.splitext(os.path.basename(filename or ""))[0]
+    years = _YEAR_RE.findall(stem)
+    year = int(years[-1]) if years else None
+    company = _YEAR_RE.sub(" ", stem)
+    company = re.sub(r"(지속가능경영|지속가능성|sustainability|esg|보고서|report)", " ", company, flags=re.I)
+    company = " ".join(re.sub(r"[_\-.]+", " ", company).split())
+    return company or None, year
+
+
+def _factory_spec(index_type, total, dim, pq_m):
+    """청크 수에 맞춘 faiss index_factory 문자열"""
+    if pq_m and dim % pq_m:
+        raise ValueError(f"ESG_CORPUS_PQ_M({pq_m})은 임베딩 차원({dim})의 약수여야 합니다")
+    if index_type == "hnsw":
+        return f"HNSW{HNSW_M}_PQ{pq_m}" if pq_m else f"HNSW{HNSW_M}"
+    if index_type != "ivf":
+        raise ValueError(f"지원하지 않는 코퍼스 인덱스 종류: {index_type}")
+    # nlist ≈ 4√N, 리스트당 학습 벡터 39개 이상 (faiss 권장)
+    nlist = max(1, min(65536, int(4 * math.sqrt(total)), total // 39))
+    return f"IVF{nlist},PQ{pq_m}" if pq_m else f"IVF{nlist},Flat"
+
+
+def _uses_pq(index):
+    """PQ 코드로 거리를 근사하는 인덱스인지 (원본 벡터로 다시 정렬 필요)"""
+    if isinstance(index, faiss.IndexIVF):
+        return isinstance(faiss.downcast_index(index), faiss.IndexIVFPQ)
+    return isinstance(index, faiss.IndexHNSW) and isinstance(faiss.downcast_index(index.storage), faiss.IndexPQ)
+
+
+class CorpusIndex:
+    """여러 보고서의 청크를 회사/연도/페이지 태그와 함께 저장하는 ANN 인덱스"""
+
+    def __init__(self, root=CORPUS_DIR, index_type=CORPUS_INDEX_TYPE, pq_m=CORPUS_PQ_M,
+                 train_min=CORPUS_TRAIN_MIN):
+        self.root = root
+        self.index_type = index_type
+        self.pq_m = pq_m
+        self.train_min = train_min
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._state = None  # ((meta.json, 인덱스 파일 수정 시각), meta, faiss 인덱스, 청크 배열들)
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    @contextmanager
+    def _flock(self, name=LOCK_FILE, blocking=True):
+        """파일 락 (blocking=False면 다른 프로세스가 잡고 있을 때 기다리지 않고 False)"""
+        with open(self._path(name), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self):
+        try:
+            with open(self._path(META_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            # chunks: 저장된 청크 수, indexed: 그중 ANN 인덱스에 들어간 앞쪽 청크 수
+            return {"dim": None, "embedding_model": None, "chunks": 0, "indexed": 0, "spec": None,
+                    "trained_at": 0, "documents": []}
+
+    def _replace(self, name, write):
+        """임시 파일에 쓴 뒤 교체 (읽는 쪽은 항상 완전한 파일만 봄)"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, self._path(name))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write_meta(self, meta):
+        def write(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+        self._replace(META_FILE, write)
+
+    def _array(self, name, dtype, count, width=1):
+        """추가 전용 파일의 앞쪽 count개만 mmap (크래시로 뒤에 남은 미완료 기록은 무시)"""
+        if count == 0:
+            return np.zeros((0, width) if width > 1 else 0, dtype=dtype)
+        shape = (count, width) if width > 1 else (count,)
+        return np.memmap(self._path(name), dtype=dtype, mode='r', shape=shape)
+
+    def _mtime(self, name):
+        try:
+            return os.stat(self._path(name)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _open_index(self):
+        """ANN 인덱스를 mmap으로 열기 (없으면 None)"""
+        path = self._path(INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            is_ivf = f.read(2) == b"Iw"  # IVF 계열 인덱스 파일 머리글 (IwFl, IwPQ, ...)
+        return faiss.read_index(path, _IVF_MMAP_FLAGS if is_ivf else _MMAP_FLAGS)
+
+    def _current(self):
+        """최신 상태 (다른 프로세스가 문서를 추가했거나 인덱스를 갱신했으면 다시 읽음)"""
+        version = (self._mtime(META_FILE), self._mtime(INDEX_FILE))
+        with self._lock:
+            if self._state is None or self._state[0] != version:
+                meta = self._read_meta()
+                count, dim = meta["chunks"], meta["dim"] or 0
+                # 인덱스는 항상 앞쪽 청크들로 만들어지므로 인덱스에 들어간 청크 수는 인덱스 자체의 ntotal
+                # (maintain()이 인덱스 파일을 교체한 뒤 메타데이터를 갱신하기 전에 읽어도 일관됨)
+                index = self._open_index()
+                if index is not None and index.ntotal > count:
+                    raise ValueError(f"코퍼스 인덱스({index.ntotal})가 청크 수({count})보다 많습니다")
+                arrays = {
+                    "ends": self._array(OFFSETS_FILE, np.int64, count),
+                    "pages": self._array(PAGES_FILE, np.int32, count),
+                    "docs": self._array(DOCS_FILE, np.int32, count),
+                    "vectors": self._array(VECTORS_FILE, np.float16, count, dim),
+                    "text": np.memmap(self._path(TEXT_FILE), dtype=np.uint8, mode='r') if count else b"",
+                }
+                self._state = (version, meta, index, arrays)
+            return self._state
+
+    def documents(self):
+        """저장된 보고서 목록 [{doc_hash, company, year, filename, chunks}]"""
+        meta = self._current()[1]
+        return [dict(doc_hash=d["doc_hash"], company=d["company"], year=d["year"], filename=d["filename"],
+                     chunks=d["end"] - d["start"]) for d in meta["documents"]]
+
+    def stats(self):
+        meta, index = self._current()[1:3]
+        return {"documents": len(meta["documents"]), "chunks": meta["chunks"],
+                "indexed": index.ntotal if index is not None else 0, "spec": meta["spec"],
+                "pending_update": self._pending_update(meta),
+                "index_bytes": os.path.getsize(self._path(INDEX_FILE)) if index is not None else 0}
+
+    def add_document(self, doc_hash, vector_store, company=None, year=None, filename=None, embedding_model=None):
+        """
+        보고서 인덱스(FAISS 벡터 저장소)의 청크와 벡터를 코퍼스에 추가 → 추가한 청크 수
+        이미 있는 문서면 태그만 갱신하고 0 반환
+        새 청크는 추가 전용 파일에만 기록 (ANN 인덱스 학습/합치기는 maintain()에서, 작업 완료를 막지 않음)
+        """
+        with self._flock():
+            meta = self._read_meta()
+            if meta["embedding_model"] and embedding_model and meta["embedding_model"] != embedding_model:
+                raise ValueError(f"코퍼스의 임베딩 모델({meta['embedding_model']})과 다릅니다: {embedding_model}")
+            for document in meta["documents"]:
+                if document["doc_hash"] == doc_hash:
+                    document.update({key: value for key, value in
+                                     (("company", company), ("year", year), ("filename", filename)) if value})
+                    self._write_meta(meta)
+                    return 0
+
+            ids = vector_store.index_to_docstore_id
+            size = len(ids)
+            if size == 0:
+                return 0
+            vectors = vector_store.index.reconstruct_n(0, size)
+            dim = vectors.shape[1]
+            if meta["dim"] is not None and meta["dim"] != dim:
+                raise ValueError(f"코퍼스의 임베딩 차원({meta['dim']})과 다릅니다: {dim}")
+            start = meta["chunks"]
+            text_end = self._truncate(meta, dim)
+
+            ends = np.zeros(size, dtype=np.int64)
+            pages = np.zeros(size, dtype=np.int32)
+            with open(self._path(TEXT_FILE), 'ab') as f:
+                for position in range(size):
+                    doc = vector_store.docstore.search(ids[position])
+                    data = doc.page_content.encode('utf-8')
+                    f.write(data)
+                    text_end += len(data)
+                    ends[position] = text_end
+                    pages[position] = doc.metadata.get('page', 0)
+            for name, array in ((OFFSETS_FILE, ends), (PAGES_FILE, pages),
+                                (DOCS_FILE, np.full(size, len(meta["documents"]), dtype=np.int32)),
+                                (VECTORS_FILE, vectors.astype(np.float16))):
+                with open(self._path(name), 'ab') as f:
+                    f.write(array.tobytes())
+
+            total = start + size
+            meta.update(dim=dim, embedding_model=meta["embedding_model"] or embedding_model)
+            meta["documents"].append({"doc_hash": doc_hash, "company": company, "year": year,
+                                      "filename": filename, "start": start, "end": total})
+            meta["chunks"] = total
+            self._write_meta(meta)
+        logging.info(f"코퍼스에 추가: {doc_hash[:12]} ({company}, {year}) {size}개 청크 → 총 {total}개")
+        return size
+
+    def _truncate(self, meta, dim):
+        """이전 쓰기가 중간에 멈춰 남은 기록을 잘라내고 텍스트 파일 끝 위치 반환"""
+        count = meta["chunks"]
+        ends = self._array(OFFSETS_FILE, np.int64, count)
+        text_end = int(ends[-1]) if count else 0
+        for name, size in ((TEXT_FILE, text_end), (OFFSETS_FILE, count * 8), (PAGES_FILE, count * 4),
+                           (DOCS_FILE, count * 4), (VECTORS_FILE, count * (dim or 0) * 2)):
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+        return text_end
+
+    def _train_threshold(self):
+        return max(self.train_min, PQ_TRAIN_MIN) if self.pq_m else self.train_min
+
+    def _pending_update(self, meta):
+        """필요한 인덱스 갱신: "train"(학습/재학습) | "merge"(쌓인 청크 합치기) | None"""
+        total, indexed = meta["chunks"], meta["indexed"]
+        if indexed == 0:
+            return "train" if total >= self._train_threshold() else None
+        if total >= meta["trained_at"] * RETRAIN_FACTOR:
+            return "train"
+        if total - indexed >= MERGE_EVERY:
+            return "merge"
+        return None
+
+    def maintain(self):
+        """
+        학습/재학습 시점이거나 인덱스 밖 청크가 MERGE_EVERY개 이상이면 ANN 인덱스 갱신 → 갱신했으면 True
+        시작 시점까지 저장된 청크로 새 인덱스를 만들고 교체 (그동안 문서 추가는 막지 않음)
+        다른 프로세스가 이미 갱신 중이면 기다리지 않고 False
+        """
+        with self._flock(MAINTAIN_LOCK_FILE, blocking=False) as acquired:
+            if not acquired:
+                return False
+            meta = self._read_meta()
+            update = self._pending_update(meta)
+            if update is None:
+                return False
+            total, dim = meta["chunks"], meta["dim"]
+            if update == "train":
+                index, spec = self._train(total, dim)
+                trained_at = total
+            else:
+                # 합치기는 인덱스 전체를 메모리로 읽어 뒤에 추가 (mmap 인덱스는 읽기 전용)
+                index, spec, trained_at = faiss.read_index(self._path(INDEX_FILE)), meta["spec"], meta["trained_at"]
+                self._add_vectors(index, meta["indexed"], total, dim)
+            self._replace(INDEX_FILE, lambda path: faiss.write_index(index, path))
+            with self._flock():
+                meta = self._read_meta()  # 갱신 중 추가된 문서 반영
+                meta.update(indexed=total, spec=spec, trained_at=trained_at)
+                self._write_meta(meta)
+        logging.info(f"코퍼스 인덱스 갱신({update}): {spec}, {total}개 청크")
+        return True
+
+    def _add_vectors(self, index, start, end, dim):
+        vectors = self._array(VECTORS_FILE, np.float16, end, dim)
+        for batch_start in range(start, end, ADD_BATCH_SIZE):
+            batch = vectors[batch_start:min(end, batch_start + ADD_BATCH_SIZE)]
+            index.add(np.ascontiguousarray(batch, dtype=np.float32))
+
+    def _train(self, total, dim):
+        """저장된 원본 벡터 앞쪽 total개로 ANN 인덱스를 새로 학습/구성 → (인덱스, factory 문자열)"""
+        vectors = self._array(VECTORS_FILE, np.float16, total, dim)
+        spec = _factory_spec(self.index_type, total, dim, self.pq_m)
+        index = faiss.index_factory(dim, spec, faiss.METRIC_L2)
+        if not index.is_trained:
+            nlist = faiss.extract_index_ivf(index).nlist if spec.startswith("IVF") else 1
+            sample_size = min(total, max(nlist * TRAIN_SAMPLE_PER_LIST, PQ_TRAIN_MIN * 39))
+            sample = np.sort(np.random.default_rng(0).choice(total, sample_size, replace=False))
+            logging.info(f"코퍼스 인덱스 학습: {spec} ({sample_size}개 벡터)")
+            index.train(np.ascontiguousarray(vectors[sample], dtype=np.float32))
+        self._add_vectors(index, 0, total, dim)
+        return index, spec
+
+    def _candidates(self, meta, arrays, companies, years, doc_hashes, pages):
+        """필터에 맞는 청크 번호 배열 (필터가 없으면 None)"""
+        if not (companies or years or doc_hashes or pages):
+            return None
+        company_set = {normalize_company(company) for company in companies or ()}
+        year_set = {int(year) for year in years or ()}
+        hash_set = set(doc_hashes or ())
+        ranges = [
+            np.arange(document["start"], document["end"], dtype=np.int64)
+            for document in meta["documents"]
+            if (not company_set or normalize_company(document["company"]) in company_set)
+            and (not year_set or document["year"] in year_set)
+            and (not hash_set or document["doc_hash"] in hash_set)
+        ]
+        if not ranges:
+            return np.zeros(0, dtype=np.int64)
+        # 문서 청크는 연속 구간이므로 문서 필터는 구간을 이어 붙여 계산
+        candidates = np.concatenate(ranges)
+        if pages:
+            first, last = pages
+            chunk_pages = arrays["pages"][candidates] + 1
+            candidates = candidates[(chunk_pages >= first) & (chunk_pages <= last)]
+        return candidates
+
+    @staticmethod
+    def _search_params(index, candidates, fetch):
+        """탐색 폭과 필터(ID 선택자) 설정 (candidates가 None이면 필터 없음)"""
+        selector = faiss.IDSelectorBatch(candidates) if candidates is not None else None
+        if isinstance(index, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=max(CORPUS_EF_SEARCH, fetch))
+        if isinstance(index, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=CORPUS_NPROBE)
+        return faiss.SearchParameters(sel=selector)
+
+    @staticmethod
+    def _exact_search(query_vectors, vectors, positions, k):
+        """지정한 청크들의 원본 벡터로 정확한 L2 검색 (블록 단위로 읽어 임시 메모리 제한) → (거리, 청크 번호)"""
+        query_norms = (query_vectors ** 2).sum(axis=1)[:, None]
+        best_distances = np.zeros((len(query_vectors), 0), dtype=np.float32)
+        best_positions = np.zeros((len(query_vectors), 0), dtype=np.int64)
+        for block_start in range(0, len(positions), EXACT_BLOCK_SIZE):
+            block = positions[block_start:block_start + EXACT_BLOCK_SIZE]
+            block_vectors = np.asarray(vectors[block], dtype=np.float32)
+            distances = query_norms - 2 * query_vectors @ block_vectors.T + (block_vectors ** 2).sum(axis=1)[None, :]
+            best_distances = np.hstack([best_distances, distances])
+            best_positions = np.hstack([best_positions, np.broadcast_to(block, distances.shape)])
+            if best_distances.shape[1] > k:
+                top = np.argpartition(best_distances, k - 1, axis=1)[:, :k]
+                best_distances = np.take_along_axis(best_distances, top, axis=1)
+                best_positions = np.take_along_axis(best_positions, top, axis=1)
+        return best_distances, best_positions
+
+    def _rerank(self, query_vectors, vectors, positions, k):
+        """PQ 근사 거리로 뽑은 후보를 원본 벡터로 다시 정렬"""
+        distances = np.full((len(query_vectors), k), np.inf, dtype=np.float32)
+        reranked = np.full((len(query_vectors), k), -1, dtype=np.int64)
+        for row, (query_vector, candidates) in enumerate(zip(query_vectors, positions)):
+            candidates = candidates[candidates >= 0]
+            if len(candidates):
+                found_distances, found = self._exact_search(query_vector[None, :], vectors, candidates, k)
+                distances[row, :found.shape[1]] = found_distances[0]
+                reranked[row, :found.shape[1]] = found[0]
+        return distances, reranked
+
+    def search(self, queries, embeddings, k=10, companies=None, years=None, doc_hashes=None, pages=None):
+        """
+        여러 질문을 코퍼스 전체에서 한 번에 검색 (질문 임베딩 1회 요청 + 배치 검색 1회)
+        companies/years/doc_hashes: 허용할 값 목록, pages: (첫 페이지, 끝 페이지) 1부터, 끝 포함
+        반환: 질문별 [Document] (metadata: doc_hash, company, year, filename, page, page_label, score)
+        - ANN 인덱스에 아직 합치지 않은 최근 청크는 원본 벡터로 정확 검색하여 결과에 합침
+        - PQ 인덱스는 k * ESG_CORPUS_REFINE개 후보를 원본 벡터로 다시 정렬
+        """
+        queries = list(queries)
+        _, meta, index, arrays = self._current()
+        count = meta["chunks"]
+        indexed = index.ntotal if index is not None else 0
+        candidates = self._candidates(meta, arrays, companies, years, doc_hashes, pages)
+        if not queries or count == 0 or (candidates is not None and len(candidates) == 0):
+            return [[] for _ in queries]
+
+        query_vectors = np.asarray(embeddings.embed_documents(queries), dtype=np.float32)
+        if query_vectors.shape[1] != meta["dim"]:
+            raise ValueError(f"질문 임베딩 차원({query_vectors.shape[1]})이 코퍼스({meta['dim']})와 다릅니다")
+        vectors = arrays["vectors"]
+        if candidates is not None and len(candidates) <= EXACT_SEARCH_MAX:
+            distances, positions = self._exact_search(query_vectors, vectors, candidates, k)
+        else:
+            parts = []
+            indexed_candidates = candidates[candidates < indexed] if candidates is not None else None
+            if index is not None and (indexed_candidates is None or len(indexed_candidates)):
+                fetch = k * CORPUS_REFINE if _uses_pq(index) else k
+                params = self._search_params(index, indexed_candidates, fetch)
+                found_distances, found = index.search(query_vectors, fetch, params=params)
+                if fetch > k:
+                    found_distances, found = self._rerank(query_vectors, vectors, found, k)
+                parts.append((found_distances, found))
+            tail = np.arange(indexed, count, dtype=np.int64) if candidates is None else candidates[candidates >= indexed]
+            if len(tail):
+                parts.append(self._exact_search(query_vectors, vectors, tail, k))
+            distances = np.hstack([part[0] for part in parts])
+            positions = np.hstack([part[1] for part in parts])
+
+        results = []
+        for row_distances, row_positions in zip(distances, positions):
+            order = np.argsort(row_distances)[:k]
+            results.append([
+                self._document(meta, arrays, int(row_positions[i]), float(row_distances[i]))
+                for i in order if row_positions[i] >= 0
+            ])
+        return results
+
+    def _document(self, meta, arrays, position, distance):
+        start = int(arrays["ends"][position - 1]) if position else 0
+        end = int(arrays["ends"][position])
+        page = int(arrays["pages"][position])
+        document = meta["documents"][int(arrays["docs"][position])]
+        return Document(
+            page_content=bytes(arrays["text"][start:end]).decode('utf-8'),
+            metadata={"doc_hash": document["doc_hash"], "company": document["company"], "year": document["year"],
+                      "filename": document["filename"], "page": page, "page_label": page + 1,
+                      "score": distance},
+        )
+
+
+_default_corpus = None
+_default_lock = threading.Lock()
+
+
+def get_default_corpus():
+    """프로세스 공용 코퍼스 인덱스 (비활성화 시 None)"""
+    global _default_corpus
+    if not CORPUS_ENABLED:
+        return None
+    with _default_lock:
+        if _default_corpus is None:
+            _default_corpus = CorpusIndex()
+    return _default_corpus
+
+
+def main():
+    """코퍼스 인덱스 갱신 (학습/재학습/합치기가 필요할 때만) 후 상태 출력: python corpus_index.py [코퍼스 디렉토리]"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [corpus] %(levelname)s %(message)s")
+    corpus = CorpusIndex(sys.argv[1]) if len(sys.argv) > 1 else CorpusIndex()
+    corpus.maintain()
+    print(json.dumps(corpus.stats(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+청크 단위 임베딩 캐시
+- (임베딩 모델, 정규화된 청크 텍스트 해시) 키로 벡터를 SQLite에 저장
+- 연도별/언어별 보고서에 반복되는 청크는 API를 다시 호출하지 않음
+- 캐시 미스만 배치로 묶어 실제 임베딩 모델에 요청
+"""
+
+import os
+import re
+import hashlib
+import logging
+import sqlite3
+import unicodedata
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+EMBEDDING_CACHE_PATH = os.getenv("ESG_EMBEDDING_CACHE_PATH", os.path.join("cache", "embeddings.sqlite"))
+EMBEDDING_CACHE_ENABLED = os.getenv("ESG_EMBEDDING_CACHE", "1") != "0"
+EMBEDDING_BATCH_SIZE = int(os.getenv("ESG_EMBEDDING_BATCH_SIZE", "256"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """공백/유니코드 표기 차이를 제거해 같은 내용이면 같은 키가 되도록 정규화"""
+    text = unicodedata.normalize("NFC", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class EmbeddingStore:
+    """SQLite 기반 임베딩 저장소 (여러 워커가 동시에 사용 가능하도록 WAL 모드)"""
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, text_hash))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, model, hashes):
+        """해시 목록에 대해 저장된 벡터 조회 ({hash: list[float]})"""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._connect() as conn:
+            # SQLite 변수 개수 제한을 피하기 위해 나누어 조회
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *part]
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, model, items):
+        """(hash, vector) 목록 저장"""
+        rows = [
+            (model, h, len(vector), np.asarray(vector, dtype=np.float32).tobytes())
+            for h, vector in items
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    임베딩 모델 래퍼: 저장소를 먼저 조회하고 미스만 배치로 요청
+    hits/misses는 빌드 단위 통계 확인용 (reset_stats로 초기화)
+    """
+
+    def __init__(self, embeddings, model_name, store, batch_size=EMBEDDING_BATCH_SIZE):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.store = store
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(t) for t in texts]
+        try:
+            cached = self.store.get_many(self.model_name, hashes)
+        except sqlite3.Error as e:
+            logging.warning(f"임베딩 캐시 조회 실패: {str(e)}")
+            cached = {}
+
+        # 같은 빌드 안의 중복 청크도 한 번만 요청
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = t
+
+        miss_count = sum(1 for h in hashes if h not in cached)
+        self.hits += len(hashes) - miss_count
+        self.misses += miss_count
+
+        miss_items = list(missing.items())
+        for start in range(0, len(miss_items), self.batch_size):
+            batch = miss_items[start:start + self.batch_size]
+            vectors = self.embeddings.embed_documents([t for _, t in batch])
+            new_items = [(h, v) for (h, _), v in zip(batch, vectors)]
+            cached.update(new_items)
+            try:
+                self.store.put_many(self.model_name, new_items)
+            except sqlite3.Error as e:
+                logging.warning(f"임베딩 캐시 저장 실패: {str(e)}")
+
+        return [list(cached[h]) for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        # 점검 질문은 고정 문구이므로 질의 임베딩도 같은 저장소를 사용
+        return self.embed_documents([text])[0]
+
+
+_default_store = None
+
+
+def get_default_embedding_store():
+    """프로세스 공용 임베딩 저장소 (비활성화 시 None)"""
+    global _default_store
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    if _default_store is None:
+        _default_store = EmbeddingStore()
+    return _default_store
@@ -9,7 +9,18 @@ workers = 2  # 2GB면 2개 워커 운영 가능
 timeout = 300  # 5분
 
 # 워커 클래스
-worker_class = 'sync'
+# 진행 이벤트 스트림(/jobs/<job_id>/events)은 작업이 끝날 때까지 연결을 유지하므로
+# sync 워커 대신 스레드 워커를 사용 (스트림 하나가 워커 전체를 점유하지 않도록)
+worker_class = 'gthread'
+threads = 8
+
+# 마스터에서 앱을 미리 로드하고 워커는 fork로 생성 (모듈 메모리를 copy-on-write로 공유)
+preload_app = True
+
+# 마스터에서 미리 import할 무거운 모듈 (LangChain, LangGraph, FAISS, OpenAI를 끌어옴)
+# app.py는 이들을 첫 사용 시점에 import하므로, 여기서 미리 올려두면 워커가 재시작되어도 import 비용이 없음
+# 빈 값이면 워커마다 첫 요청에서 로드
+PRELOAD_MODULES = [name for name in os.getenv("ESG_PRELOAD_MODULES", "rag_engine,agent_engine").split(",") if name]
 
 # 메모리 누수 방지: 워커가 처리할 최대 요청 수 (이후 재시작)
 max_requests = 20  # 메모리 여유 있으니 증가
@@ -33,3 +44,39 @@ worker_tmp_dir = '/dev/shm'
 # 메모리 제한 (각 워커당 ~900MB)
 worker_connections = 1000
 
+
+# 작업 러너 (/analyze, /review 작업 실행)
+# 웹 워커와 분리된 프로세스이므로 max_requests로 워커가 재시작되어도 분석이 계속됨
+_job_runner = None
+
+def when_ready(server):
+    global _job_runner
+    import subprocess
+    import sys
+    _job_runner = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'job_runner.py')])
+    server.log.info(f"작업 러너 시작 (pid={_job_runner.pid})")
+    _preload_modules(server)
+
+def _preload_modules(server):
+    """워커 fork 전에 마스터에서 무거운 모듈 import (실패해도 워커가 첫 사용 시 다시 시도)"""
+    import gc
+    import importlib
+    import time
+    for name in PRELOAD_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            server.log.warning(f"모듈 미리 로드 실패 ({name}): {e}")
+            continue
+        server.log.info(f"모듈 미리 로드: {name} ({time.perf_counter() - start:.2f}s)")
+    # 이후 GC가 물려받은 객체를 건드려 페이지가 복사되지 않도록 현재 객체를 영구 세대로 이동
+    gc.freeze()
+
+def on_exit(server):
+    if _job_runner is not None and _job_runner.poll() is None:
+        _job_runner.terminate()
+        try:
+            _job_runner.wait(timeout=30)
+        except Exception:
+            _job_runner.kill()
@@ -0,0 +1,83 @@
+"""
+보고서 새 버전의 증분 재분석 (이전 버전과 페이지 단위 비교)
+- 페이지 지문: 반복 문구 제거 후 페이지 텍스트의 SHA-1
+- 인덱싱: 이전 버전에 같은 지문의 페이지가 있으면 그 페이지의 청크와 벡터를 이전 인덱스에서 복사 (분할/임베딩 생략)
+  정제된 텍스트가 같으면 분할 결과도 같으므로 전체를 새로 만든 인덱스와 동일
+- 답변: 검색된 [Context]가 바뀌지 않은 페이지로만 구성되고 이전 버전 답변의 근거 페이지와 같으면 이전 답변 재사용
+  (페이지가 밀린 경우 근거 페이지 번호만 새 번호로 변환)
+"""
+
+import hashlib
+
+
+def page_fingerprint(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class PageDiff:
+    """두 버전의 페이지 지문 비교 (페이지 번호는 1부터 시작하는 page_label)"""
+
+    def __init__(self, old_fingerprints, new_fingerprints):
+        old_by_fingerprint = {}
+        for page, fingerprint in sorted(old_fingerprints.items()):
+            old_by_fingerprint.setdefault(fingerprint, []).append(page)
+
+        self.new_to_old = {}
+        for page, fingerprint in sorted(new_fingerprints.items()):
+            candidates = old_by_fingerprint.get(fingerprint)
+            if not candidates:
+                continue
+            # 같은 내용의 페이지가 여러 개면 같은 번호 → 앞쪽 번호 순으로 대응
+            old_page = page if page in candidates else candidates[0]
+            candidates.remove(old_page)
+            self.new_to_old[page] = old_page
+        self.old_to_new = {old_page: page for page, old_page in self.new_to_old.items()}
+        self.changed_pages = sorted(set(new_fingerprints) - set(self.new_to_old))
+        # 대응하는 페이지가 없는 이전 페이지 중 같은 번호의 새 페이지가 바뀐 페이지면 제자리 수정 (삭제 아님)
+        self.removed_pages = sorted(set(old_fingerprints) - set(self.old_to_new) - set(self.changed_pages))
+
+    def stats(self):
+        return {
+            "pages_unchanged": len(self.new_to_old),
+            "pages_changed": len(self.changed_pages),
+            "pages_removed": len(self.removed_pages),
+            "changed_pages": self.changed_pages,
+        }
+
+    def reusable(self, context_pages, old_pages):
+        """
+        새 버전의 [Context] 페이지로 이전 답변을 재사용할 수 있으면 새 번호로 바꾼 근거 페이지 목록, 아니면 None
+        - [Context]에 바뀐 페이지가 하나라도 있으면 재사용 불가
+        - 이전 답변의 근거 페이지가 모두 남아 있고, 새 [Context] 페이지와 같은 집합이어야 함
+        """
+        if not context_pages or any(page not in self.new_to_old for page in context_pages):
+            return None
+        mapped = {self.old_to_new.get(page) for page in old_pages}
+        if None in mapped or mapped != set(context_pages):
+            return None
+        return sorted(mapped)
+
+
+class PreviousVersion:
+    """이전 버전의 mmap 인덱스에서 페이지별 청크/벡터를 꺼내는 도우미"""
+
+    def __init__(self, vector_store, fingerprints):
+        self.vector_store = vector_store
+        self.page_by_fingerprint = {}
+        for page, fingerprint in sorted(fingerprints.items()):
+            self.page_by_fingerprint.setdefault(fingerprint, page)
+        self._positions = {}
+        for position, page in enumerate(vector_store.docstore.pages().tolist()):
+            self._positions.setdefault(page + 1, []).append(position)
+
+    def chunks(self, fingerprint, page):
+        """지문이 같은 이전 페이지의 (청크 Document, 벡터) 목록 (페이지 번호는 새 버전 기준으로 바꿈, 없으면 None)"""
+        old_page = self.page_by_fingerprint.get(fingerprint)
+        if old_page is None:
+            return None
+        result = []
+        for position in self._positions.get(old_page, []):
+            doc = self.vector_store.docstore.search(position)
+            doc.metadata.update(page=page - 1, page_label=page)
+            result.append((doc, self.vector_store.index.reconstruct(position).tolist()))
+        return result
@@ -0,0 +1,240 @@
+"""
+FAISS 인덱스 디스크 캐시
+- PDF 바이트의 SHA-256 + 청킹/임베딩 설정으로 키를 만들어 벡터 DB를 재사용
+- 전체 용량 기준 LRU 제거 (마지막 사용 시각 순)
+- fcntl 파일 락으로 gunicorn 워커 간 동시 접근 보호
+- 인덱스/청크는 mmap 형식(chunk_store)으로 저장하여 워커들이 같은 페이지 캐시를 읽기 전용으로 공유
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import fcntl
+import logging
+import tempfile
+from contextlib import contextmanager
+
+
+# 캐시 위치 및 용량 제한 (환경변수로 조정 가능)
+INDEX_CACHE_DIR = os.getenv("ESG_INDEX_CACHE_DIR", os.path.join("cache", "faiss"))
+INDEX_CACHE_MAX_BYTES = int(os.getenv("ESG_INDEX_CACHE_MAX_MB", "1024")) * 1024 * 1024
+INDEX_CACHE_ENABLED = os.getenv("ESG_INDEX_CACHE", "1") != "0"
+
+META_FILE = "meta.json"
+LAST_USED_FILE = ".last_used"
+BUILD_LOCK_PREFIX = ".build-"
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """파일 내용의 SHA-256 해시 (청크 단위로 읽어 메모리 사용 최소화)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_cache_key(doc_hash, config):
+    """문서 해시와 인덱싱 설정을 합쳐 캐시 키 생성"""
+    payload = json.dumps({"doc": doc_hash, "config": config}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+class IndexCache:
+    """콘텐츠 주소 기반 FAISS 인덱스 캐시"""
+
+    def __init__(self, root=INDEX_CACHE_DIR, max_bytes=INDEX_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, key)
+
+    @contextmanager
+    def _flock(self, name, shared=False):
+        """캐시 디렉토리 내 락 파일에 flock (프로세스 간 동기화)"""
+        lock_path = os.path.join(self.root, name)
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _lock_current(lock_file, lock_path):
+        """잡은 락 파일이 아직 그 경로의 파일인지 (다른 프로세스가 지웠으면 False)"""
+        try:
+            return os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino
+        except FileNotFoundError:
+            return False
+
+    @contextmanager
+    def build_lock(self, key):
+        """
+        같은 문서를 두 워커가 동시에 인덱싱하지 않도록 키 단위 락
+        (먼저 잡은 워커가 빌드하고, 나머지는 대기 후 캐시에서 로드)
+        락 파일은 놓기 직전에 지우므로 쌓이지 않음, 지워진 파일의 락을 잡은 대기자는 새 파일로 다시 시도
+        """
+        lock_path = os.path.join(self.root, f"{BUILD_LOCK_PREFIX}{key}.lock")
+        while True:
+            lock_file = open(lock_path, 'a')
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if self._lock_current(lock_file, lock_path):
+                break
+            lock_file.close()
+        try:
+            yield
+        finally:
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+
+    def _remove_stale_build_locks(self):
+        """이전 버전이 남긴 빌드 락 파일 중 아무도 잡고 있지 않은 것 삭제"""
+        for name in os.listdir(self.root):
+            if not name.startswith(BUILD_LOCK_PREFIX):
+                continue
+            lock_path = os.path.join(self.root, name)
+            try:
+                with open(lock_path, 'a') as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    if self._lock_current(lock_file, lock_path):
+                        os.remove(lock_path)
+            except (BlockingIOError, FileNotFoundError):
+                continue
+
+    def _touch(self, entry_path):
+        try:
+            with open(os.path.join(entry_path, LAST_USED_FILE), 'w') as f:
+                f.write(str(time.time()))
+        except OSError:
+            pass
+
+    def load(self, key, embeddings):
+        """캐시된 인덱스를 읽기 전용 mmap으로 열기 (없거나 손상되었으면 None)"""
+        entry_path = self._entry_path(key)
+        with self._flock(".cache.lock", shared=True):
+            if not os.path.isfile(os.path.join(entry_path, META_FILE)):
+                return None
+            try:
+                from chunk_store import load_vector_store
+                vector_store = load_vector_store(entry_path, embeddings)
+            except Exception as e:
+                logging.warning(f"인덱스 캐시 로드 실패 ({key[:12]}): {str(e)}")
+                return None
+            self._touch(entry_path)
+        logging.info(f"인덱스 캐시 적중: {key[:12]}")
+        return vector_store
+
+    def load_extra(self, key, name):
+        """인덱스와 함께 저장한 부가 데이터(JSON) 로드 (없으면 None)"""
+        try:
+            with self._flock(".cache.lock", shared=True):
+                with open(os.path.join(self._entry_path(key), name), encoding='utf-8') as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def open_extra(self, key, loader):
+        """인덱스와 함께 저장한 부가 파일을 loader(항목 디렉토리)로 열기 (없거나 실패하면 None)"""
+        with self._flock(".cache.lock", shared=True):
+            entry_path = self._entry_path(key)
+            if not os.path.isfile(os.path.join(entry_path, META_FILE)):
+                return None
+            try:
+                return loader(entry_path)
+            except (OSError, ValueError) as e:
+                logging.warning(f"인덱스 캐시 부가 데이터 로드 실패 ({key[:12]}): {str(e)}")
+                return None
+
+    def store(self, key, vector_store, meta=None, extras=None, attachments=()):
+        """
+        인덱스를 임시 디렉토리에 저장한 뒤 원자적으로 교체하고 용량 초과분 제거
+        extras: {파일명: JSON 직렬화 가능한 값} - 인덱스와 같은 수명으로 저장할 부가 데이터
+        attachments: save(디렉토리)로 자신을 저장하는 객체 (예: BM25 색인)
+        저장에 성공하면 True
+        """
+        tmp_path = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            from chunk_store import save_vector_store
+            save_vector_store(vector_store, tmp_path)
+            for name, value in (extras or {}).items():
+                with open(os.path.join(tmp_path, name), 'w', encoding='utf-8') as f:
+                    json.dump(value, f, ensure_ascii=False)
+            for attachment in attachments:
+                attachment.save(tmp_path)
+            entry_meta = dict(meta or {})
+            entry_meta.update({"key": key, "created": time.time()})
+            with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(entry_meta, f, ensure_ascii=False)
+            self._touch(tmp_path)
+
+            entry_path = self._entry_path(key)
+            with self._flock(".cache.lock"):
+                if os.path.exists(entry_path):
+                    shutil.rmtree(entry_path, ignore_errors=True)
+                os.rename(tmp_path, entry_path)
+                self._evict_locked(keep=key)
+            return True
+        except Exception as e:
+            logging.warning(f"인덱스 캐시 저장 실패 ({key[:12]}): {str(e)}")
+            return False
+        finally:
+            if os.path.exists(tmp_path):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def _last_used(self, entry_path):
+        try:
+            return os.path.getmtime(os.path.join(entry_path, LAST_USED_FILE))
+        except OSError:
+            return 0.0
+
+    def _evict_locked(self, keep=None):
+        """전체 용량이 max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 제거 (락 보유 상태에서 호출)"""
+        self._remove_stale_build_locks()
+        entries = []
+        for name in os.listdir(self.root):
+            entry_path = os.path.join(self.root, name)
+            if name.startswith('.') or not os.path.isdir(entry_path):
+                continue
+            entries.append((self._last_used(entry_path), _dir_size(entry_path), name, entry_path))
+
+        total = sum(size for _, size, _, _ in entries)
+        for _, size, name, entry_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total -= size
+            logging.info(f"인덱스 캐시 제거 (LRU): {name[:12]} ({size / (1024 * 1024):.1f}MB)")
+
+
+_default_cache = None
+
+
+def get_default_index_cache():
+    """프로세스 공용 캐시 인스턴스 (비활성화 시 None)"""
+    global _default_cache
+    if not INDEX_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        _default_cache = IndexCache()
+    return _default_cache
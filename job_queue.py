@@ -0,0 +1,205 @@
+"""
+분석 작업 큐 (SQLite 기반)
+- 업로드 요청은 작업만 등록하고 즉시 job id를 반환
+- 작업 실행은 별도 러너 프로세스(job_runner.py)가 담당하므로
+  gunicorn 워커가 max_requests로 재시작되어도 작업이 끊기지 않음
+- 러너가 죽으면 heartbeat가 끊긴 작업을 다시 대기열로 돌려 재시도
+- 진행 이벤트(항목 결과, 노드 시작/완료, 최종 점수)는 job_events에 쌓아 SSE로 전달
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+
+
+JOB_DB_PATH = os.getenv("ESG_JOB_DB_PATH", os.path.join("data", "jobs.sqlite"))
+
+# heartbeat가 이 시간(초) 이상 갱신되지 않으면 실행 중 작업을 재시도 대상으로 간주
+STALE_SECONDS = 90
+MAX_ATTEMPTS = 3
+# 진행 이벤트 보관 기간 (초)
+EVENT_RETENTION_SECONDS = 24 * 3600
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class JobQueue:
+    """작업 테이블 접근 (웹 워커와 러너 프로세스가 함께 사용)"""
+
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " node TEXT,"
+                " progress TEXT,"
+                " result TEXT,"
+                " error TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " owner_pid INTEGER,"
+                " heartbeat REAL,"
+                " created REAL NOT NULL,"
+                " updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " job_id TEXT NOT NULL,"
+                " type TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, id)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def submit(self, kind, payload):
+        """작업 등록 후 job id 반환"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, progress, created, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, STATUS_QUEUED, json.dumps(payload, ensure_ascii=False), "{}", now, now)
+            )
+        return job_id
+
+    def get(self, job_id):
+        """작업 상태 조회 (없으면 None)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for key in ("payload", "progress", "result"):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+    def claim_next(self, owner_pid):
+        """가장 오래된 대기 작업 하나를 원자적으로 가져와 실행 상태로 변경"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (STATUS_QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner_pid = ?, heartbeat = ?, attempts = attempts + 1,"
+                " updated = ? WHERE id = ?",
+                (STATUS_RUNNING, owner_pid, now, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get(row["id"])
+
+    def update_progress(self, job_id, node=None, progress=None):
+        """현재 그래프 노드와 질문 진행 상황 기록 (heartbeat도 함께 갱신)"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET node = COALESCE(?, node), progress = COALESCE(?, progress),"
+                " heartbeat = ?, updated = ? WHERE id = ?",
+                (node, json.dumps(progress, ensure_ascii=False) if progress is not None else None,
+                 now, now, job_id)
+            )
+
+    def add_event(self, job_id, event_type, data):
+        """진행 이벤트 기록 (id는 작업 내에서 증가하므로 SSE의 Last-Event-ID로 사용)"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO job_events (job_id, type, data, created) VALUES (?, ?, ?, ?)",
+                (job_id, event_type, json.dumps(data, ensure_ascii=False), time.time())
+            )
+
+    def get_events(self, job_id, after_id=0, limit=100):
+        """after_id 이후의 진행 이벤트 목록"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, type, data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (job_id, after_id, limit)
+            ).fetchall()
+        return [{"id": row["id"], "type": row["type"], "data": json.loads(row["data"])} for row in rows]
+
+    def prune_events(self, max_age=EVENT_RETENTION_SECONDS):
+        """보관 기간이 지난 진행 이벤트 삭제"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job_events WHERE created < ?", (time.time() - max_age,))
+
+    def heartbeat(self, owner_pid):
+        """러너가 실행 중인 모든 작업의 heartbeat 갱신"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE status = ? AND owner_pid = ?",
+                (time.time(), STATUS_RUNNING, owner_pid)
+            )
+
+    def complete(self, job_id, result):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, node = NULL, updated = ? WHERE id = ?",
+                (STATUS_DONE, json.dumps(result, ensure_ascii=False), now, job_id)
+            )
+
+    def fail(self, job_id, error):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                (STATUS_FAILED, error, now, job_id)
+            )
+
+    def requeue_stale(self, stale_seconds=STALE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        """heartbeat가 끊긴 실행 중 작업을 재시도 (시도 횟수 초과 시 실패 처리)"""
+        cutoff = time.time() - stale_seconds
+        now = time.time()
+        with self._connect() as conn:
+            failed = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ?"
+                " WHERE status = ? AND heartbeat < ? AND attempts >= ?",
+                (STATUS_FAILED, "작업 실행 프로세스가 반복적으로 중단되었습니다.", now,
+                 STATUS_RUNNING, cutoff, max_attempts)
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, owner_pid = NULL, updated = ?"
+                " WHERE status = ? AND heartbeat < ?",
+                (STATUS_QUEUED, now, STATUS_RUNNING, cutoff)
+            ).rowcount
+        if requeued or failed:
+            logging.warning(f"중단된 작업 정리: 재시도 {requeued}건, 실패 {failed}건")
+        return requeued
+
+    def release(self, owner_pid):
+        """프로세스 종료 시 실행 중이던 작업을 바로 대기열로 반환"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner_pid = NULL, updated = ? WHERE status = ? AND owner_pid = ?",
+                (STATUS_QUEUED, time.time(), STATUS_RUNNING, owner_pid)
+            )
@@ -0,0 +1,230 @@
+"""
+분석 작업 러너
+- job_queue에 등록된 작업을 가져와 제한된 스레드 풀에서 실행
+- gunicorn 마스터의 when_ready 훅에서 별도 프로세스로 실행됨
+  (직접 실행: python job_runner.py)
+"""
+
+import os
+import time
+import signal
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+import metrics
+from job_queue import JobQueue
+
+
+# 동시에 실행할 분석 작업 수 (2GB 인스턴스 기준)
+JOB_WORKERS = int(os.getenv("ESG_JOB_WORKERS", "2"))
+
+POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 10.0
+STALE_CHECK_INTERVAL = 30.0
+# 코퍼스 인덱스 학습/합치기 확인 주기 (작업 완료 경로 밖의 백그라운드 스레드에서 실행)
+CORPUS_MAINTAIN_INTERVAL = float(os.getenv("ESG_CORPUS_MAINTAIN_INTERVAL", "300"))
+
+
+class ProgressTracker:
+    """에이전트 진행 이벤트를 모아 작업 테이블에 기록 (이벤트 자체도 SSE 전달용으로 저장)"""
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.job_id = job_id
+        self.lock = threading.Lock()
+        self.progress = {"nodes": {}, "questions": {}}
+
+    def __call__(self, event):
+        event_type = event["event"]
+        self.queue.add_event(self.job_id, event_type, {key: value for key, value in event.items() if key != "event"})
+        with self.lock:
+            node = event.get("node")
+            if event["event"] == "node_start":
+                self.progress["nodes"][node] = "running"
+            elif event["event"] == "node_done":
+                self.progress["nodes"][node] = "done"
+            elif event["event"] == "question_done":
+                questions = self.progress["questions"].setdefault(node, {"done": 0, "total": event["total"]})
+                questions["done"] += 1
+
+            running = [name for name, state in self.progress["nodes"].items() if state == "running"]
+            self.queue.update_progress(self.job_id, node=",".join(running), progress=self.progress)
+
+
+def add_to_corpus(rag, payload):
+    """
+    분석한 보고서를 코퍼스 인덱스에 추가 (보고서 간 비교 검색용, 실패해도 작업 결과에는 영향 없음)
+    회사/연도는 업로드 폼 값, 없으면 파일명에서 추정
+    """
+    from corpus_index import get_default_corpus, guess_tags
+
+    corpus = get_default_corpus()
+    if corpus is None:
+        return
+    company, year = guess_tags(payload.get("filename"))
+    try:
+        rag.add_to_corpus(corpus, company=payload.get("company") or company, year=payload.get("year") or year,
+                          filename=payload.get("filename"))
+    except Exception as e:
+        logging.warning(f"코퍼스 인덱스 추가 실패: {str(e)}")
+
+
+def maintain_corpus():
+    """코퍼스 인덱스 학습/재학습/합치기 (필요할 때만, 실패해도 작업 러너는 계속)"""
+    from corpus_index import get_default_corpus
+
+    try:
+        corpus = get_default_corpus()
+        if corpus is not None:
+            corpus.maintain()
+    except Exception as e:
+        logging.warning(f"코퍼스 인덱스 갱신 실패: {str(e)}")
+
+
+def run_analyze_job(queue, job):
+    """ESG-Radar 분석 작업 (LangGraph Multi-Agent)"""
+    from agent_engine import analyze_esg_report
+    from session_registry import get_registry
+    from metrics import collect_timings
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다.")
+
+    pdf_path = job["payload"]["pdf_path"]
+    progress = ProgressTracker(queue, job["id"])
+    # 업로드 파일은 내용 해시 이름으로 저장되어 다른 작업과 공유될 수 있으므로 실패해도 삭제하지 않음
+    # 인덱싱 시간도 리포트의 timings에 포함되도록 작업 전체를 수집
+    with collect_timings():
+        # 같은 보고서의 인덱스는 러너 프로세스의 세션 레지스트리에서 재사용 (업로드 시 계산한 해시 사용)
+        progress({"event": "node_start", "node": "indexing"})
+        previous_doc_hash = job["payload"].get("previous_doc_hash")
+        rag = get_registry().get_or_create(pdf_path, api_key, doc_hash=job["payload"].get("doc_hash"),
+                                           previous_doc_hash=previous_doc_hash)
+        progress({"event": "node_done", "node": "indexing"})
+        report = analyze_esg_report(pdf_path, api_key, progress_callback=progress, rag=rag,
+                                    previous_doc_hash=previous_doc_hash)
+    add_to_corpus(rag, job["payload"])
+    return report
+
+
+def run_review_job(queue, job):
+    """기본 검토 작업 (주요 항목 질문, 항목마다 결과 이벤트 기록)"""
+    from basic_review import run_basic_review
+    from session_registry import get_registry
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다.")
+
+    pdf_path = job["payload"]["pdf_path"]
+    progress = ProgressTracker(queue, job["id"])
+    progress({"event": "node_start", "node": "indexing"})
+    rag = get_registry().get_or_create(pdf_path, api_key, doc_hash=job["payload"].get("doc_hash"),
+                                        previous_doc_hash=job["payload"].get("previous_doc_hash"))
+    progress({"event": "node_done", "node": "indexing"})
+    progress({"event": "node_start", "node": "review"})
+    results, summary = run_basic_review(
+        rag, on_item=lambda key, item: progress({"event": "item_done", "node": "review", "key": key, "item": item})
+    )
+    progress({"event": "node_done", "node": "review"})
+    progress({"event": "score", "summary": summary})
+    add_to_corpus(rag, job["payload"])
+    return {"results": results, "summary": summary, "doc_id": rag.doc_hash}
+
+
+# 작업 종류별 실행 함수
+JOB_HANDLERS = {
+    "analyze": run_analyze_job,
+    "review": run_review_job,
+}
+
+
+def _execute(queue, job):
+    logging.info(f"작업 시작: {job['id']} ({job['kind']}, 시도 {job['attempts']}회)")
+    try:
+        result = JOB_HANDLERS[job["kind"]](queue, job)
+        queue.complete(job["id"], result)
+        logging.info(f"작업 완료: {job['id']}")
+    except Exception as e:
+        logging.error(f"작업 실패: {job['id']}\n{traceback.format_exc()}")
+        queue.fail(job["id"], str(e))
+
+
+def run_forever(max_workers=JOB_WORKERS, stop_event=None):
+    """대기 작업을 계속 가져와 실행 (stop_event가 설정되면 실행 중 작업을 반환하고 종료)"""
+    queue = JobQueue()
+    pid = os.getpid()
+    stop_event = stop_event or threading.Event()
+    slots = threading.BoundedSemaphore(max_workers)
+
+    def run_job(job):
+        try:
+            _execute(queue, job)
+        finally:
+            slots.release()
+
+    logging.info(f"작업 러너 시작 (pid={pid}, 동시 실행 {max_workers}개)")
+    last_heartbeat = last_stale_check = last_corpus_maintain = 0.0
+    corpus_thread = None
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while not stop_event.is_set():
+            now = time.time()
+            if now - last_heartbeat >= HEARTBEAT_INTERVAL:
+                queue.heartbeat(pid)
+                metrics.write_snapshot()
+                last_heartbeat = now
+            if now - last_stale_check >= STALE_CHECK_INTERVAL:
+                queue.requeue_stale()
+                queue.prune_events()
+                last_stale_check = now
+            if now - last_corpus_maintain >= CORPUS_MAINTAIN_INTERVAL and \
+                    (corpus_thread is None or not corpus_thread.is_alive()):
+                # 재학습은 오래 걸릴 수 있으므로 작업 슬롯과 별도 스레드에서 실행
+                corpus_thread = threading.Thread(target=maintain_corpus, name="corpus-maintain", daemon=True)
+                corpus_thread.start()
+                last_corpus_maintain = now
+
+            if not slots.acquire(timeout=POLL_INTERVAL):
+                continue
+            job = queue.claim_next(pid)
+            if job is None:
+                slots.release()
+                stop_event.wait(POLL_INTERVAL)
+                continue
+            executor.submit(run_job, job)
+    finally:
+        # 종료 시 끝나지 않은 작업은 다른 러너가 이어받도록 대기열로 반환
+        queue.release(pid)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def start_in_thread(max_workers=JOB_WORKERS):
+    """로컬 개발 서버용: 같은 프로세스의 백그라운드 스레드로 러너 실행"""
+    thread = threading.Thread(target=run_forever, args=(max_workers,), name="job-runner", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [job_runner] %(levelname)s %(message)s")
+    stop_event = threading.Event()
+
+    def handle_signal(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    run_forever(stop_event=stop_event)
+    # 실행 중이던 분석 스레드를 기다리지 않고 종료 (작업은 이미 대기열로 반환됨)
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+BM25 역색인 (FAISS와 같은 청크 번호 사용)
+- "Scope 3", "GHG Protocol", "범위 3"처럼 정확한 용어로 찾는 질문을 벡터 검색과 함께 처리
+- 한/영 ESG 동의어를 같은 토큰으로 정규화 (문서/질문 양쪽에 적용)
+- 한글은 조사가 붙어도 맞도록 글자 2-gram으로 색인
+"""
+
+import os
+import json
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+
+# 정규 토큰 -> 동의어 패턴 (긴 표현을 먼저 치환하도록 순서 유지)
+SYNONYMS = [
+    ("ghgprotocol", [r"ghg\s*protocol", r"온실\s*가스\s*프로토콜"]),
+    ("scope3", [r"scope\s*3", r"범위\s*3", r"기타\s*간접\s*배출", r"other\s+indirect\s+emissions?",
+                r"value\s+chain\s+emissions?"]),
+    ("scope1", [r"scope\s*1", r"범위\s*1", r"직접\s*배출", r"direct\s+emissions?"]),
+    ("scope2", [r"scope\s*2", r"범위\s*2", r"간접\s*배출", r"indirect\s+emissions?"]),
+    ("ghg", [r"ghg", r"greenhouse\s+gas(?:es)?", r"온실\s*가스"]),
+    ("tco2eq", [r"[km]?t\s*co2\s*-?\s*e(?:q)?", r"톤\s*co2\s*-?\s*e(?:q)?"]),
+    ("netzero", [r"net[\s-]*zero", r"넷\s*제로", r"탄소\s*중립", r"carbon\s+neutral(?:ity)?"]),
+    ("renewable", [r"renewable(?:\s+energy)?", r"신?재생\s*에너지"]),
+    ("energyuse", [r"energy\s+(?:consumption|use)", r"에너지\s*(?:사용|소비)량?"]),
+    ("waterwithdrawal", [r"water\s+(?:withdrawal|consumption|use)", r"용수\s*(?:사용|취수)량?", r"취수량"]),
+    ("wastegenerated", [r"waste\s+generat\w*", r"폐기물\s*발생량?"]),
+    ("recyclingrate", [r"recycling\s+rate", r"재활용률"]),
+    ("decoupling", [r"decoupling", r"탈동조화"]),
+    ("esgcommittee", [r"esg\s+committee", r"esg\s*위원회", r"지속가능경영\s*위원회"]),
+    ("violation", [r"violations?", r"위반"]),
+    ("sanction", [r"sanctions?|fines?", r"제재|과징금|벌금"]),
+]
+
+_SYNONYM_RES = [
+    (f" syn_{canonical} ", re.compile("|".join(f"(?<![0-9a-z_])(?:{pattern})(?![0-9a-z_])" for pattern in patterns)))
+    for canonical, patterns in SYNONYMS
+]
+_TOKEN_RE = re.compile(r"[0-9a-z_]+|[가-힣]+")
+TERMS_FILE = "lexical_terms.json"
+POSTING_IDS_FILE = "lexical_ids.npy"  # 용어별 게시 목록(문서 번호)을 이어 붙인 배열
+POSTING_TFS_FILE = "lexical_tfs.npy"  # 같은 순서의 용어 빈도
+DOC_LENGTHS_FILE = "lexical_doc_lengths.npy"
+
+_STOPWORDS = {"the", "and", "of", "to", "in", "for", "is", "are", "a", "an", "on", "by", "with", "as", "or"}
+
+
+def tokenize(text):
+    """소문자 → 동의어 정규화 → 영문/숫자 단어 + 한글 2-gram"""
+    text = text.lower()
+    for replacement, pattern in _SYNONYM_RES:
+        text = pattern.sub(replacement, text)
+    tokens = []
+    for token in _TOKEN_RE.findall(text):
+        if token[0] >= '가':
+            if len(token) == 1:
+                tokens.append(token)
+            else:
+                tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        elif token not in _STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class LexicalIndex:
+    """청크 텍스트 목록으로 만드는 읽기 전용 BM25 색인 (문서 번호 = 입력 순서 = FAISS 번호)"""
+
+    K1 = 1.5
+    B = 0.75
+    mapped = False  # load()로 연 색인이면 True
+
+    def __init__(self, texts=()):
+        postings = {}
+        doc_lengths = []
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        self._postings = {}
+        for term, entries in postings.items():
+            ids = np.fromiter((doc_id for doc_id, _ in entries), dtype=np.int32, count=len(entries))
+            tfs = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries))
+            self._postings[term] = (ids, tfs)
+        self._set_doc_lengths(np.asarray(doc_lengths, dtype=np.float32))
+
+    def _set_doc_lengths(self, doc_lengths):
+        self.size = len(doc_lengths)
+        self._doc_lengths = doc_lengths
+        average_length = float(doc_lengths.mean()) if self.size else 0.0
+        # 문서 길이 정규화 항은 질문과 무관하므로 미리 계산
+        self._length_norm = self.K1 * (1 - self.B + self.B * doc_lengths / max(average_length, 1.0))
+
+    def nbytes(self):
+        """프로세스 메모리 사용량 (mmap으로 연 색인은 용어 사전과 길이 정규화 배열만)"""
+        if self.mapped:
+            return self._length_norm.nbytes + sum(len(term) for term in self._postings) * 2
+        return sum(ids.nbytes + tfs.nbytes for ids, tfs in self._postings.values()) + self._doc_lengths.nbytes * 2
+
+    def save(self, directory):
+        """색인을 mmap 가능한 파일로 저장 (용어 사전 JSON + 게시 목록 배열)"""
+        terms = {}
+        offset = 0
+        for term, (ids, _) in self._postings.items():
+            terms[term] = [offset, len(ids)]
+            offset += len(ids)
+        postings = list(self._postings.values())
+        ids = np.concatenate([ids for ids, _ in postings]) if postings else np.zeros(0, dtype=np.int32)
+        tfs = np.concatenate([tfs for _, tfs in postings]) if postings else np.zeros(0, dtype=np.float32)
+        np.save(os.path.join(directory, POSTING_IDS_FILE), ids)
+        np.save(os.path.join(directory, POSTING_TFS_FILE), tfs)
+        np.save(os.path.join(directory, DOC_LENGTHS_FILE), np.asarray(self._doc_lengths, dtype=np.float32))
+        with open(os.path.join(directory, TERMS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(terms, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory):
+        """save()로 저장한 색인을 읽기 전용 mmap으로 열기 (게시 목록은 워커 간 페이지 캐시 공유)"""
+        with open(os.path.join(directory, TERMS_FILE), encoding='utf-8') as f:
+            terms = json.load(f)
+        ids = np.load(os.path.join(directory, POSTING_IDS_FILE), mmap_mode='r')
+        tfs = np.load(os.path.join(directory, POSTING_TFS_FILE), mmap_mode='r')
+        index = cls()
+        index.mapped = True
+        index._postings = {
+            term: (ids[offset:offset + count], tfs[offset:offset + count])
+            for term, (offset, count) in terms.items()
+        }
+        index._set_doc_lengths(np.load(os.path.join(directory, DOC_LENGTHS_FILE)))
+        return index
+
+    def _idf(self, df):
+        return math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+    def search(self, query, k):
+        """
+        BM25 상위 k개 (문서 번호 목록, 점수 목록, 강도)
+        강도: 1위 문서 점수 / 모든 질문 토큰이 한 번씩 나오는 문서의 점수 (0~1 근사, 낮으면 어휘 일치가 약함)
+        """
+        terms = Counter(tokenize(query))
+        if not terms or not self.size:
+            return [], [], 0.0
+        scores = np.zeros(self.size, dtype=np.float32)
+        ideal = 0.0
+        for term, query_tf in terms.items():
+            idf = self._idf(len(self._postings[term][0]) if term in self._postings else 0)
+            ideal += idf * query_tf
+            if term not in self._postings:
+                continue
+            ids, tfs = self._postings[term]
+            scores[ids] += query_tf * idf * tfs * (self.K1 + 1) / (tfs + self._length_norm[ids])
+
+        k = min(k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[scores[top] > 0]
+        strength = float(scores[top[0]]) / ideal if len(top) and ideal > 0 else 0.0
+        return top.tolist(), scores[top].tolist(), min(strength, 1.0)
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """여러 순위 목록을 RRF로 합침 (문서 번호 목록 반환)"""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda doc_id: -scores[doc_id])
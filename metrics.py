@@ -0,0 +1,230 @@
+"""
+핫패스 계측
+- span(stage): 구간 소요 시간을 히스토그램에 기록하는 컨텍스트 매니저
+- 요청(분석) 단위 타이밍: collect_timings() 안에서 실행된 span을 모아 반환
+- Prometheus 텍스트 포맷 렌더링 (/metrics)
+  프로세스마다 계측값을 파일 스냅샷으로 남겨 어느 워커의 /metrics에서든 전체를 합산
+표준 라이브러리만 사용 (웹 워커가 LangChain 없이 가볍게 로드)
+"""
+
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+
+# 히스토그램 버킷 (초) - 밀리초 단위 검색부터 수 분 단위 인덱싱까지
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# 프로세스별 스냅샷 저장 위치 (웹 워커/작업 러너 공유)
+METRICS_DIR = os.getenv("ESG_METRICS_DIR", os.path.join("data", "metrics"))
+SNAPSHOT_INTERVAL = 5.0
+STALE_SNAPSHOT_SECONDS = 600
+
+_lock = threading.Lock()
+_last_snapshot = 0.0
+_histograms = {}  # stage -> {"buckets": [...], "sum": float, "count": int}
+_counters = {}  # (name, label tuple) -> value
+
+# 현재 요청의 타이밍 수집기 (스레드 풀/병렬 그래프 노드로 전달하려면 copy_context 사용)
+_current_timings = contextvars.ContextVar("esg_timings", default=None)
+
+
+def observe(stage, seconds):
+    """구간 소요 시간 기록"""
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def increment(name, value=1, **labels):
+    """카운터 증가 (예: LLM 토큰 수)"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.count(name, value)
+
+
+@contextmanager
+def span(stage):
+    """with span("rag.extract"): ... 형태로 구간 계측"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+class Timings:
+    """요청 하나의 단계별 누적 시간/횟수 (병렬 구간은 합산되므로 벽시계 시간보다 클 수 있음)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+
+    def add(self, stage, seconds):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"seconds": 0.0, "count": 0})
+            entry["seconds"] += seconds
+            entry["count"] += 1
+
+    def count(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "stages": {
+                    stage: {"seconds": round(entry["seconds"], 3), "count": entry["count"]}
+                    for stage, entry in self.stages.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+
+@contextmanager
+def collect_timings():
+    """블록 안에서 기록된 span을 모으는 Timings 반환"""
+    timings = Timings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def current_timings():
+    return _current_timings.get()
+
+
+def run_in_context(func):
+    """현재 요청의 타이밍 수집기를 다른 스레드에서도 쓰도록 컨텍스트를 복사한 함수 반환"""
+    context = contextvars.copy_context()
+
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def rss_bytes():
+    """현재 프로세스 RSS (bytes)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def snapshot():
+    """현재 프로세스의 계측값 (다른 프로세스와 합쳐 렌더링할 수 있는 dict)"""
+    with _lock:
+        histograms = {stage: dict(h, buckets=list(h["buckets"])) for stage, h in _histograms.items()}
+        counters = [[name, [list(label) for label in labels], value] for (name, labels), value in _counters.items()]
+    return {
+        "pid": os.getpid(),
+        "time": time.time(),
+        "histograms": histograms,
+        "counters": counters,
+        "rss_bytes": rss_bytes(),
+    }
+
+
+def write_snapshot(directory=METRICS_DIR, min_interval=SNAPSHOT_INTERVAL):
+    """
+    계측값을 파일로 저장 (gunicorn 워커/작업 러너 등 다른 프로세스의 /metrics에서 합산)
+    min_interval초 안에 다시 호출되면 건너뜀
+    """
+    global _last_snapshot
+    now = time.time()
+    if now - _last_snapshot < min_interval:
+        return
+    _last_snapshot = now
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot(), f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def collect_snapshots(directory=METRICS_DIR, max_age=STALE_SNAPSHOT_SECONDS):
+    """현재 프로세스 + 파일로 저장된 다른 프로세스들의 계측값 (오래된 파일은 삭제)"""
+    snapshots = {os.getpid(): snapshot()}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        names = []
+    now = time.time()
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if now - data.get("time", 0) > max_age:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        snapshots.setdefault(data["pid"], data)
+    return list(snapshots.values())
+
+
+def _format_labels(labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def render_prometheus(snapshots=None):
+    """Prometheus 텍스트 포맷 (프로세스별 pid 라벨)"""
+    snapshots = snapshots if snapshots is not None else collect_snapshots()
+    lines = [
+        "# HELP esg_stage_seconds Duration of pipeline stages",
+        "# TYPE esg_stage_seconds histogram",
+    ]
+    for data in snapshots:
+        pid = data["pid"]
+        for stage, histogram in sorted(data["histograms"].items()):
+            for bound, value in zip(BUCKETS, histogram["buckets"]):
+                lines.append(f'esg_stage_seconds_bucket{{stage="{stage}",pid="{pid}",le="{bound}"}} {value}')
+            lines.append(f'esg_stage_seconds_bucket{{stage="{stage}",pid="{pid}",le="+Inf"}} {histogram["count"]}')
+            lines.append(f'esg_stage_seconds_sum{{stage="{stage}",pid="{pid}"}} {histogram["sum"]:.6f}')
+            lines.append(f'esg_stage_seconds_count{{stage="{stage}",pid="{pid}"}} {histogram["count"]}')
+
+    families = {}
+    for data in snapshots:
+        for name, labels, value in data["counters"]:
+            families.setdefault(name, []).append((tuple(map(tuple, labels)) + (("pid", data["pid"]),), value))
+    for name, samples in sorted(families.items()):
+        lines.append(f"# TYPE esg_{name}_total counter")
+        for labels, value in sorted(samples):
+            lines.append(f"esg_{name}_total{_format_labels(labels)} {value}")
+
+    lines.append("# HELP esg_process_resident_memory_bytes Resident memory per worker process")
+    lines.append("# TYPE esg_process_resident_memory_bytes gauge")
+    for data in snapshots:
+        lines.append(f'esg_process_resident_memory_bytes{{pid="{data["pid"]}"}} {data["rss_bytes"]}')
+    return "\n".join(lines) + "\n"
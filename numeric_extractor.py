@@ -0,0 +1,190 @@
+"""
+수치 데이터 사전 추출 (LLM 없이 규칙 기반)
+- 인덱싱 중 페이지마다 (지표, 값, 단위, 연도, 페이지) 추출
+  예: "Scope 1 배출량  1,234  1,180  1,102  tCO2eq" + 표 머리글 "2021 2022 2023"
+- 연도는 표 머리글, 또는 문장 속 연도에서 가져오되 목표 연도(까지/목표/by/target, 아직 오지 않은 해)는 제외
+- 표 행에서 찾은 값이 있고 표의 최신 연도 값이 하나로 일관되면 LLM 호출 없이 바로 답변 (페이지 출처 포함)
+- 표 값이 없거나 서로 다른 값이 섞여 있으면 None을 반환하여 LLM 질문으로 넘김
+"""
+
+import re
+import time
+
+
+GHG_UNIT = r"[kKM]?t\s*CO[2₂]\s*-?\s*e(?:q)?|톤\s*CO[2₂]\s*-?\s*e(?:q)?"
+ENERGY_UNIT = r"TJ|GJ|[kMG]Wh|TOE|toe"
+WATER_UNIT = r"천\s*㎥|㎥|m3|m³|ML|kL|톤|tons?|tonnes?"
+WASTE_UNIT = r"톤|tons?|tonnes?"
+
+# 지표별 키워드(한/영)와 허용 단위
+METRICS = {
+    "scope1": {
+        "label": "Scope 1 배출량",
+        "keywords": r"scope\s*1(?![\d.])|범위\s*1(?![\d.])|직접\s*배출",
+        "units": GHG_UNIT,
+    },
+    "scope2": {
+        "label": "Scope 2 배출량",
+        "keywords": r"scope\s*2(?![\d.])|범위\s*2(?![\d.])|(?<!기타 )(?<!기타)간접\s*배출",
+        "units": GHG_UNIT,
+    },
+    "scope3": {
+        "label": "Scope 3 배출량",
+        "keywords": r"scope\s*3(?![\d.])|범위\s*3(?![\d.])|기타\s*간접\s*배출",
+        "units": GHG_UNIT,
+    },
+    "energy": {
+        "label": "에너지 사용량",
+        "keywords": r"energy\s+(?:consumption|use)|에너지\s*(?:사용|소비)",
+        "units": ENERGY_UNIT,
+    },
+    "water": {
+        "label": "용수 사용량",
+        "keywords": r"water\s+(?:withdrawal|consumption|use)|용수\s*(?:사용|취수)|취수량",
+        "units": WATER_UNIT,
+    },
+    "waste": {
+        "label": "폐기물 발생량",
+        "keywords": r"waste\s+generat|폐기물\s*발생",
+        "units": WASTE_UNIT,
+    },
+}
+
+_KEYWORD_RES = {name: re.compile(spec["keywords"], re.I) for name, spec in METRICS.items()}
+_UNIT_RES = {name: re.compile(rf"(?<![A-Za-z])(?:{spec['units']})(?![A-Za-z])") for name, spec in METRICS.items()}
+_NUMBER_RE = re.compile(r"(?<![\w.,])\d{1,3}(?:,\d{3})+(?:\.\d+)?(?![\w,])|(?<![\w.,])\d+(?:\.\d+)?(?![\w.,])")
+_YEAR_RE = re.compile(r"(?<!\d)(?:19[9]\d|20\d{2})(?!\d)")
+# 목표 연도 ("2030년까지", "2030 목표", "by 2030", "target year 2030")
+_TARGET_BEFORE_RE = re.compile(r"(?:\bby|\buntil|\btarget(?:\s+year)?|목표(?:\s*연도)?)\s*[:(]?\s*$", re.I)
+_TARGET_AFTER_RE = re.compile(r"^\s*년?\s*(?:까지|목표|이내)")
+
+
+# 실적으로 볼 수 있는 마지막 연도 (이후 연도는 보고 시점에 아직 오지 않은 목표 값)
+LATEST_REPORTABLE_YEAR = time.localtime().tm_year
+# 표 머리글에서 연도 사이에 올 수 있는 말 ("2021년 2022년", "FY2021 | FY2022")
+_HEADER_GAP_RE = re.compile(r"\s*년?\s*(?:[|/,]\s*)?(?:FY|CY)?\s*", re.I)
+
+
+def _years(line):
+    return [int(year) for year in _YEAR_RE.findall(line)]
+
+
+def _is_reported(line, match):
+    """목표 문구가 붙지 않았고 아직 오지 않은 해가 아니면 실적 연도"""
+    return (int(match.group(0)) <= LATEST_REPORTABLE_YEAR
+            and not _TARGET_BEFORE_RE.search(line[:match.start()])
+            and not _TARGET_AFTER_RE.match(line[match.end():]))
+
+
+def _reported_years(line):
+    """목표 연도를 제외한 연도 목록 (목표 연도의 값은 실적이 아님)"""
+    return [int(match.group(0)) for match in _YEAR_RE.finditer(line) if _is_reported(line, match)]
+
+
+def _header_years(line):
+    """
+    표 머리글(연도만 나열된 줄)이면 열별 연도 목록 (목표 열은 None), 아니면 None
+    연도 사이에 다른 말이 있으면 문장으로 봄 ("2019년 대비 2030년까지 …")
+    """
+    matches = list(_YEAR_RE.finditer(line))
+    if len(matches) < 2 or _values(line):
+        return None
+    if any(not _HEADER_GAP_RE.fullmatch(line[left.end():right.start()]) for left, right in zip(matches, matches[1:])):
+        return None
+    return [int(match.group(0)) if _is_reported(line, match) else None for match in matches]
+
+
+def _values(text):
+    """연도(쉼표 없는 4자리 1990~2099)를 제외한 수치 목록"""
+    values = []
+    for match in _NUMBER_RE.finditer(text):
+        raw = match.group(0)
+        if _YEAR_RE.fullmatch(raw):
+            continue
+        values.append(raw)
+    return values
+
+
+def extract_facts(text, page):
+    """
+    페이지 텍스트에서 지표 수치 추출 → [{"metric", "value", "raw", "unit", "year", "page", "table"}]
+    table: 연도를 표 머리글에서 가져온 표 행 값이면 True (목표 열의 값은 year가 None)
+    표 머리글은 값 개수가 같은 행이 이어지는 동안만 적용 (머리글도 표 행도 아닌 줄에서 해제)
+    """
+    facts = []
+    header_years = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        matched = [name for name, keyword_re in _KEYWORD_RES.items() if keyword_re.search(line)]
+        if len(matched) != 1:
+            # 표 머리글은 다음 행들의 연도 매핑에 사용, 값 개수가 같은 다른 지표 행이면 표가 이어지는 것으로 봄
+            line_header = _header_years(line)
+            if line_header is not None:
+                header_years = line_header
+            elif len(_values(line)) != len(header_years):
+                header_years = []
+            continue
+
+        metric = matched[0]
+        # 키워드("Scope 1")와 단위("tCO2eq")의 숫자는 값에서 제외
+        unit_match = _UNIT_RES[metric].search(line)
+        remainder = _KEYWORD_RES[metric].sub(" ", line)
+        if unit_match is not None:
+            remainder = _UNIT_RES[metric].sub(" ", remainder)
+        values = _values(remainder)
+        table = bool(header_years) and len(values) == len(header_years)
+        if not table:
+            header_years = []
+        if unit_match is None or not values:
+            continue
+
+        if table:
+            years = header_years
+        else:
+            # 표 밖 문장은 값 하나에 실적 연도 하나가 있을 때만 연도 부여 (목표 연도이거나 모호하면 None)
+            line_years = _reported_years(remainder)
+            years = line_years if len(values) == 1 and len(line_years) == 1 and len(_years(remainder)) == 1 \
+                else [None] * len(values)
+
+        unit = " ".join(unit_match.group(0).split())
+        for raw, year in zip(values, years):
+            facts.append({
+                "metric": metric,
+                "value": float(raw.replace(",", "")),
+                "raw": raw,
+                "unit": unit,
+                "year": year,
+                "page": page,
+                "table": table,
+            })
+    return facts
+
+
+def answer_from_facts(facts, metrics):
+    """
+    지표 목록에 대한 답변 (answer, sources, pages)
+    하나라도 표 행 값이 없거나, 표의 최신 연도 값이 서로 다르면 None (LLM으로 확인 필요)
+    표 밖 문장의 값은 표의 최신 연도와 같은 연도일 때 일치 확인에만 사용 (더 나중 연도가 이기지 않음)
+    """
+    lines = []
+    pages = set()
+    for metric in metrics:
+        candidates = [fact for fact in facts if fact["metric"] == metric]
+        table_facts = [fact for fact in candidates if fact.get("table") and fact["year"] is not None]
+        if not table_facts:
+            return None
+        latest_year = max(fact["year"] for fact in table_facts)
+        latest = [fact for fact in candidates if fact["year"] == latest_year]
+        if len({(fact["value"], fact["unit"]) for fact in latest}) != 1:
+            return None
+        fact = latest[0]
+        year_text = f" ({latest_year}년)" if latest_year else ""
+        fact_pages = sorted({item["page"] for item in latest})
+        lines.append(f"{METRICS[metric]['label']}: {fact['raw']} {fact['unit']}{year_text}"
+                     f" - {', '.join(map(str, fact_pages))}페이지")
+        pages.update(fact_pages)
+
+    pages = sorted(pages)
+    return "\n".join(lines), [f"{page}페이지" for page in pages], pages
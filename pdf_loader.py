@@ -0,0 +1,101 @@
+"""
+PDF 페이지 텍스트 추출
+- 순차 추출 (기본) 또는 프로세스 풀 병렬 추출
+- 병렬 모드는 페이지 범위를 샤드로 나누고 각 워커가 파일을 직접 열어 처리
+- 결과는 항상 페이지 순서대로 반환
+
+※ 프로세스 풀은 spawn 방식으로 띄우므로 이 모듈은 가벼운 의존성(PyPDF2)만 import
+"""
+
+import os
+import gc
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import PyPDF2
+
+
+# 병렬 추출 워커 수 (1이면 순차 추출, 2GB 인스턴스는 2 권장)
+EXTRACT_WORKERS = int(os.getenv("ESG_EXTRACT_WORKERS", "1"))
+
+# 워커 하나가 한 번에 처리하는 페이지 수
+SHARD_SIZE = 16
+
+
+def count_pages(pdf_path):
+    """PDF 총 페이지 수"""
+    with open(pdf_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def _extract_page_range(pdf_path, start, end):
+    """
+    [start, end) 범위 페이지 텍스트 추출 (프로세스 풀 워커에서 실행)
+    페이지 단위 오류는 건너뛰고 (page_num, None, 오류 메시지)로 반환
+    """
+    results = []
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page_num in range(start, end):
+            try:
+                results.append((page_num, pdf_reader.pages[page_num].extract_text(), None))
+            except Exception as page_error:
+                results.append((page_num, None, str(page_error)))
+    return results
+
+
+def _iter_sequential(pdf_path, pages_to_process):
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page_num in range(pages_to_process):
+            try:
+                yield page_num, pdf_reader.pages[page_num].extract_text(), None
+            except Exception as page_error:
+                yield page_num, None, str(page_error)
+
+            # 20페이지마다 로깅 (2GB면 덜 자주 gc 필요)
+            if (page_num + 1) % 20 == 0:
+                gc.collect()
+                logging.info(f"{page_num + 1}/{pages_to_process} 페이지 처리 완료")
+
+
+def _iter_parallel(pdf_path, pages_to_process, workers):
+    shards = [
+        (start, min(start + SHARD_SIZE, pages_to_process))
+        for start in range(0, pages_to_process, SHARD_SIZE)
+    ]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        # 동시에 대기 중인 샤드 수를 제한해 결과가 메모리에 쌓이지 않도록 함
+        pending = deque()
+        shard_iter = iter(shards)
+        for shard in shard_iter:
+            pending.append(executor.submit(_extract_page_range, pdf_path, *shard))
+            if len(pending) >= workers * 2:
+                break
+
+        done_pages = 0
+        while pending:
+            for result in pending.popleft().result():
+                yield result
+            done_pages += SHARD_SIZE
+            logging.info(f"{min(done_pages, pages_to_process)}/{pages_to_process} 페이지 처리 완료")
+            next_shard = next(shard_iter, None)
+            if next_shard is not None:
+                pending.append(executor.submit(_extract_page_range, pdf_path, *next_shard))
+
+
+def iter_page_texts(pdf_path, pages_to_process, workers=EXTRACT_WORKERS):
+    """
+    페이지 순서대로 (page_num, text, error) 생성
+    - page_num: 0부터 시작
+    - 추출 실패 페이지는 text=None, error=오류 메시지
+    """
+    workers = max(1, min(workers, os.cpu_count() or 1))
+    if workers == 1 or pages_to_process <= SHARD_SIZE:
+        yield from _iter_sequential(pdf_path, pages_to_process)
+    else:
+        logging.info(f"병렬 페이지 추출 ({workers}개 프로세스)")
+        yield from _iter_parallel(pdf_path, pages_to_process, workers)
@@ -1,157 +1,563 @@
 import os
 import gc
+import time
+import json
+import hashlib
 import logging
+import pickle
+import sqlite3
+import tempfile
+from itertools import zip_longest
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_community.vectorstores import FAISS
-from langchain.chains import RetrievalQA
+from langchain.chains.question_answering import load_qa_chain
 from langchain.prompts import PromptTemplate
 from langchain_core.documents import Document
-import PyPDF2
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+import numpy as np
+
+from pdf_loader import count_pages, iter_page_texts, EXTRACT_WORKERS
+from index_cache import file_sha256, make_cache_key, get_default_index_cache
+from embedding_cache import CachedEmbeddings, get_default_embedding_store
+from answer_cache import make_answer_key, get_default_answer_cache
+from backends import make_embeddings, make_chat_model, embedding_model_id, chat_model_id, TokenUsageCallback
+from metrics import span, observe, increment, run_in_context
+from context_packer import pack_context, CONTEXT_MAX_TOKENS
+import checklist
+from numeric_extractor import extract_facts, answer_from_facts
+from boilerplate import BoilerplateFilter, STRIP_BOILERPLATE, MIN_REPEAT_RATIO
+from lexical_index import LexicalIndex, reciprocal_rank_fusion
+from incremental import page_fingerprint, PageDiff, PreviousVersion
+from chunk_store import compact_vector_store
+
+
+# 상세하고 구조화된 답변을 위한 프롬프트
+PROMPT_TEMPLATE = """
+        당신은 전문 ESG 규제 검토관입니다. 아래 [Context]에 제공된 내용을 바탕으로 질문에 상세하고 구체적으로 답하십시오.
+
+        답변 작성 지침:
+        1. [Context]에서 질문과 관련된 모든 정보를 찾아 종합적으로 답변하세요.
+        2. 수치, 날짜, 단위, 방법론, 기준, 목표 등 구체적 정보가 있으면 반드시 포함하세요.
+        3. 관련 키워드나 유사 표현이 사용된 경우도 포함하세요 (예: Scope 3 = 범위 3, GHG Protocol = 온실가스 프로토콜).
+        4. 여러 페이지에 걸쳐 정보가 있으면 모두 종합하여 답변하세요.
+        5. 수치나 데이터가 있다면: "XX tCO2eq (연도: YYYY)" 형식으로 명확히 표시하세요.
+        6. 방법론이 언급되면: "GHG Protocol의 Scope 3 Guidance를 적용하여..."처럼 구체적으로 설명하세요.
+        7. [Context]에 정말로 관련 내용이 전혀 없을 때만 "보고서에서 해당 내용을 찾을 수 없습니다"라고 답하세요.
+        8. 답변은 2-4문장으로 간결하되 구체적으로 작성하세요.
+
+        [Context]:
+        {context}
+
+        [Question]:
+        {question}
+
+        [Answer]:
+        """
+
 
 class ESG_RAG:
-    def __init__(self, pdf_path, api_key):
+    # 인덱싱 설정 (변경 시 캐시 키가 달라져 자동으로 재빌드됨)
+    CHUNK_SIZE = 1500
+    CHUNK_OVERLAP = 300
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    INDEX_VERSION = 8  # 3: 청크 start_index 추가, 4: 수치 사전 추출 결과(facts.json) 함께 저장, 5: mmap 저장 형식 + BM25 색인
+    # 6: 수치에 표 행 여부(table) 추가, 목표 연도 제외, 7: 표 머리글의 목표 열 제외 + 표가 끝나면 머리글 해제
+    # 8: 반복 머리말/꼬리말은 페이지 위/아래 범위에서만 제거
+    # 분할 전 반복 머리말/꼬리말/목차/중복 페이지 제거
+    STRIP_BOILERPLATE = STRIP_BOILERPLATE
+    # 벡터 저장 형식: float32 | float16 (절반, 순위 거의 동일) | sq8 (1/4, 순위가 조금 바뀔 수 있음)
+    VECTOR_ENCODING = os.getenv("ESG_VECTOR_ENCODING", "float32")
+    # 한 번에 임베딩/인덱스에 추가하는 청크 수 (인덱싱 최대 메모리를 결정)
+    INDEX_BATCH_SIZE = int(os.getenv("ESG_INDEX_BATCH_SIZE", "128"))
+    # ask_many에서 동시에 보내는 LLM 요청 수
+    MAX_CONCURRENCY = int(os.getenv("ESG_LLM_CONCURRENCY", "4"))
+    # 답변 생성 설정
+    LLM_MODEL = "gpt-4o"
+    TOP_K = 8  # 원래대로 복원 (더 포괄적 검색)
+    # [Context] 조립 설정 (겹치는 청크 병합 후 토큰 예산 적용)
+    CONTEXT_MAX_TOKENS = CONTEXT_MAX_TOKENS
+    # MMR 다양성 선택: FETCH_K개 후보에서 서로 덜 비슷한 TOP_K개 선택 (기본 비활성화)
+    USE_MMR = os.getenv("ESG_CONTEXT_MMR", "0") == "1"
+    MMR_LAMBDA = float(os.getenv("ESG_CONTEXT_MMR_LAMBDA", "0.5"))
+    FETCH_K = TOP_K * 2
+    # 검색 방식
+    # vector: FAISS만 / hybrid: FAISS + BM25 순위를 RRF로 합침
+    # lexical_first: BM25 일치가 충분히 강하면 질문 임베딩 없이 BM25 결과만 사용, 약하면 hybrid
+    RETRIEVAL_MODE = os.getenv("ESG_RETRIEVAL_MODE", "hybrid")
+    LEXICAL_MIN_STRENGTH = float(os.getenv("ESG_LEXICAL_MIN_STRENGTH", "0.6"))
+    # 체크리스트 일괄 점검 시 모든 항목의 검색 결과를 합친 [Context] 토큰 예산
+    CHECKLIST_MAX_TOKENS = int(os.getenv("ESG_CHECKLIST_MAX_TOKENS", "8000"))
+    # 표의 수치로 답할 수 있는 항목은 LLM 없이 답변
+    NUMERIC_FAST_PATH = os.getenv("ESG_NUMERIC_FAST_PATH", "1") != "0"
+    FACTS_FILE = "facts.json"
+    PAGES_FILE = "pages.json"  # 페이지 지문 (새 버전 증분 재분석용)
+
+    def __init__(self, pdf_path, api_key, index_cache=None, embedding_store=None,
+                 extract_workers=EXTRACT_WORKERS, answer_cache=None, doc_hash=None, previous_doc_hash=None):
         self.pdf_path = pdf_path
         self.api_key = api_key
+        self.extract_workers = extract_workers
         self.vector_store = None
+        # None이면 공용 기본 캐시 사용, False면 캐시 비활성화
+        self.index_cache = get_default_index_cache() if index_cache is None else (index_cache or None)
+        self.embedding_store = get_default_embedding_store() if embedding_store is None else (embedding_store or None)
+        self.answer_cache = get_default_answer_cache() if answer_cache is None else (answer_cache or None)
+        self.doc_hash = doc_hash  # 이미 계산된 문서 해시가 있으면 재사용
+        self.embedding_stats = {"hits": 0, "misses": 0}
+        self.embeddings = None
+        self.numeric_facts = []  # 인덱싱 중 추출한 (지표, 값, 단위, 연도, 페이지)
+        self.cleaning_stats = None  # 반복 문구 제거 통계 (인덱스를 새로 만들 때만)
+        self.lexical_index = None
+        # 증분 재분석: 이전 버전 보고서의 문서 해시가 있으면 바뀌지 않은 페이지의 청크/벡터/답변 재사용
+        self.previous_doc_hash = previous_doc_hash
+        self.page_fingerprints = {}  # page_label -> 정제 후 페이지 텍스트 지문
+        self.page_diff = None
+        self.reuse_stats = None  # 이전 버전에서 복사한 청크 수 (인덱스를 새로 만들 때만)
+        self._previous = None
         self._initialize_vector_db()
+        self._build_qa_chain()
+        if previous_doc_hash:
+            self.use_previous_version(previous_doc_hash)
+
+    def _index_config(self):
+        """캐시 키에 포함되는 인덱싱 설정"""
+        config = {
+            "version": self.INDEX_VERSION,
+            "chunk_size": self.CHUNK_SIZE,
+            "chunk_overlap": self.CHUNK_OVERLAP,
+            "embedding_model": embedding_model_id(self.EMBEDDING_MODEL),
+            "boilerplate": MIN_REPEAT_RATIO if self.STRIP_BOILERPLATE else None,
+        }
+        # 기본 형식(float32)은 키에 넣지 않음 (기존 캐시 항목 유지)
+        if self.VECTOR_ENCODING != "float32":
+            config["vectors"] = self.VECTOR_ENCODING
+        return config
+
+    def _make_embeddings(self):
+        # ESG_BACKEND=offline이면 네트워크 없는 해시 임베딩 사용
+        embeddings = make_embeddings(self.EMBEDDING_MODEL, self.api_key)
+        if self.embedding_store is None:
+            return embeddings
+        # 청크 임베딩 캐시: 미스만 API로 요청
+        return CachedEmbeddings(embeddings, embedding_model_id(self.EMBEDDING_MODEL), self.embedding_store)
 
     def _initialize_vector_db(self):
-        """PDF를 로드하고 청크로 나누어 벡터 DB(FAISS)에 저장"""
-        # 1. PDF 로드 (PyPDF2 사용 - 빠르고 메모리 효율적)
-        documents = []
-        
-        # 최대 페이지 수 제한 (메모리/시간 절약)
-        MAX_PAGES = 300  # 2GB 인스턴스에서 충분히 처리 가능
-        
+        """캐시된 인덱스가 있으면 로드하고, 없으면 빌드 후 캐시에 저장"""
+        if self.doc_hash is None:
+            self.doc_hash = file_sha256(self.pdf_path)
+        embeddings = self._make_embeddings()
+        self.embeddings = embeddings
+
+        if self.index_cache is None:
+            if self.pdf_path is None:
+                raise FileNotFoundError("인덱스 캐시가 꺼져 있어 PDF 없이 열 수 없습니다")
+            with span("rag.index_build"):
+                self.vector_store = self._compact(self._build_vector_db(embeddings))
+            self._build_lexical_index()
+            return
+
+        cache_key = make_cache_key(self.doc_hash, self._index_config())
+        with span("rag.index_cache_load"):
+            loaded = self._load_cached(cache_key, embeddings)
+        if loaded:
+            return
+        with self.index_cache.build_lock(cache_key):
+            # 락 대기 중 다른 워커가 빌드를 끝냈을 수 있음
+            if self._load_cached(cache_key, embeddings):
+                return
+            if self.pdf_path is None:
+                raise FileNotFoundError(f"인덱스 캐시에 없는 문서입니다: {self.doc_hash[:12]}")
+            self._previous = self._open_previous_version(embeddings)
+            try:
+                with span("rag.index_build"):
+                    self.vector_store = self._compact(self._build_vector_db(embeddings))
+            finally:
+                self._previous = None
+            self._build_lexical_index()
+            stored = self.index_cache.store(cache_key, self.vector_store, meta={
+                "doc_hash": self.doc_hash,
+                "config": self._index_config(),
+                "chunks": len(self.vector_store.index_to_docstore_id),
+            }, extras={self.FACTS_FILE: self.numeric_facts,
+                       self.PAGES_FILE: sorted(self.page_fingerprints.items())},
+               attachments=[self.lexical_index] if self.lexical_index is not None else ())
+            # 방금 만든 인덱스도 mmap으로 다시 열어 다른 워커와 페이지 캐시 공유 (프로세스별 사본 해제)
+            if stored:
+                self._load_cached(cache_key, embeddings)
+
+    def _compact(self, vector_store):
+        """빌드 직후의 벡터 저장소 → 압축 청크 저장소 + VECTOR_ENCODING 형식 벡터 (청크별 Document 객체 해제)"""
+        with span("rag.compact"):
+            return compact_vector_store(vector_store, self.VECTOR_ENCODING)
+
+    def _load_cached(self, cache_key, embeddings):
+        """캐시 항목을 mmap으로 열어 벡터 저장소/수치/BM25 색인 설정 (없으면 False)"""
+        vector_store = self.index_cache.load(cache_key, embeddings)
+        if vector_store is None:
+            return False
+        self.vector_store = vector_store
+        self.numeric_facts = self.index_cache.load_extra(cache_key, self.FACTS_FILE) or []
+        self.page_fingerprints = {page: fingerprint for page, fingerprint in
+                                  self.index_cache.load_extra(cache_key, self.PAGES_FILE) or []}
+        self.lexical_index = None
+        if self.RETRIEVAL_MODE != "vector":
+            self.lexical_index = self.index_cache.open_extra(cache_key, LexicalIndex.load)
+            if self.lexical_index is None:
+                self._build_lexical_index()
+        return True
+
+    def _load_fingerprints(self, doc_hash):
+        """인덱스 캐시에 저장된 문서의 페이지 지문 (없으면 None)"""
+        pages = self.index_cache.load_extra(make_cache_key(doc_hash, self._index_config()), self.PAGES_FILE)
+        return {page: fingerprint for page, fingerprint in pages} if pages else None
+
+    def _open_previous_version(self, embeddings):
+        """이전 버전의 인덱스를 열어 청크/벡터 복사 준비 (캐시에 없으면 None → 전체 인덱싱)"""
+        if not self.previous_doc_hash or self.previous_doc_hash == self.doc_hash:
+            return None
+        fingerprints = self._load_fingerprints(self.previous_doc_hash)
+        vector_store = None
+        if fingerprints:
+            vector_store = self.index_cache.load(make_cache_key(self.previous_doc_hash, self._index_config()),
+                                                 embeddings)
+        if vector_store is None:
+            logging.warning(f"이전 버전 인덱스가 캐시에 없어 전체 인덱싱: {self.previous_doc_hash[:12]}")
+            return None
+        return PreviousVersion(vector_store, fingerprints)
+
+    def use_previous_version(self, previous_doc_hash):
+        """
+        이전 버전과 페이지 지문을 비교하여 답변 재사용 준비 (이미 인덱싱된 문서에도 적용 가능)
+        이전 버전의 지문이 캐시에 없으면 False
+        """
+        if self.index_cache is None or previous_doc_hash == self.doc_hash or not self.page_fingerprints:
+            return False
+        old_fingerprints = self._load_fingerprints(previous_doc_hash)
+        if old_fingerprints is None:
+            logging.warning(f"이전 버전 페이지 지문이 캐시에 없음: {previous_doc_hash[:12]}")
+            return False
+        self.previous_doc_hash = previous_doc_hash
+        self.page_diff = PageDiff(old_fingerprints, self.page_fingerprints)
+        logging.info(f"이전 버전 비교: 바뀐 페이지 {len(self.page_diff.changed_pages)}개 / "
+                     f"전체 {len(self.page_fingerprints)}개")
+        return True
+
+    def incremental_stats(self, answers_reused=0):
+        """
+        이전 버전 대비 재사용 통계 (이전 버전과 비교 중이 아니면 None)
+        엔진은 여러 작업이 공유하므로 재사용한 답변 수는 호출 측이 작업 단위로 센 값(answers_reused 카운터)을 받음
+        """
+        if self.page_diff is None:
+            return None
+        return dict(self.page_diff.stats(), previous_doc_hash=self.previous_doc_hash,
+                    answers_reused=answers_reused, **(self.reuse_stats or {}))
+
+    @classmethod
+    def from_cache(cls, doc_hash, api_key, **kwargs):
+        """PDF 없이 인덱스 캐시에서 바로 열기 (다른 워커/작업 러너가 인덱싱한 문서, 캐시에 없으면 None)"""
         try:
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
-                pages_to_process = min(total_pages, MAX_PAGES)
-                
-                if total_pages > MAX_PAGES:
-                    logging.warning(f"PDF가 너무 큽니다 ({total_pages}페이지). 처음 {MAX_PAGES}페이지만 처리합니다.")
-                else:
-                    logging.info(f"PDF 총 {total_pages}페이지 처리 시작")
-                
-                for page_num in range(pages_to_process):
-                    try:
-                        page = pdf_reader.pages[page_num]
-                        text = page.extract_text()
-                        
-                        if text and len(text.strip()) >= 50:
-                            documents.append(Document(
-                                page_content=text,
-                                metadata={'page': page_num, 'page_label': page_num + 1}
-                            ))
-                        
-                        # 20페이지마다 로깅 (2GB면 덜 자주 gc 필요)
-                        if (page_num + 1) % 20 == 0:
-                            gc.collect()
-                            logging.info(f"{page_num + 1}/{pages_to_process} 페이지 처리 완료")
-                            
-                    except Exception as page_error:
-                        logging.warning(f"페이지 {page_num + 1} 처리 중 오류: {str(page_error)}")
-                        continue
+            return cls(None, api_key, doc_hash=doc_hash, **kwargs)
+        except FileNotFoundError:
+            return None
+
+    def add_to_corpus(self, corpus, company=None, year=None, filename=None):
+        """이 보고서의 청크/벡터를 코퍼스 인덱스에 추가 (다시 임베딩하지 않음) → 추가한 청크 수"""
+        with span("corpus.add"):
+            return corpus.add_document(self.doc_hash, self.vector_store, company=company, year=year,
+                                       filename=filename, embedding_model=embedding_model_id(self.EMBEDDING_MODEL))
+
+    @classmethod
+    def search_corpus(cls, corpus, queries, api_key, k=10, **filters):
+        """
+        코퍼스 전체에서 여러 질문을 한 번에 검색 (보고서별 엔진을 열지 않음)
+        filters: companies, years, doc_hashes, pages (CorpusIndex.search 참고)
+        """
+        embeddings = make_embeddings(cls.EMBEDDING_MODEL, api_key)
+        with span("corpus.search"):
+            return corpus.search(queries, embeddings, k=k, **filters)
+
+    def _build_lexical_index(self):
+        """FAISS 청크 순서 그대로 BM25 색인 생성 (캐시에 색인 파일이 없으면 docstore에서 재구성)"""
+        if self.RETRIEVAL_MODE == "vector":
+            return
+        docstore = self.vector_store.docstore
+        with span("rag.lexical_build"):
+            self.lexical_index = LexicalIndex(
+                docstore.search(doc_id).page_content
+                for doc_id in self.vector_store.index_to_docstore_id.values()
+            )
+
+    def _iter_page_texts(self):
+        """PDF 페이지 텍스트를 순서대로 (page_num, text) 생성 (추출 실패 페이지는 건너뜀)"""
+        try:
+            total_pages = count_pages(self.pdf_path)
+            logging.info(f"PDF 총 {total_pages}페이지 처리 시작")
+            
+            pages = iter_page_texts(self.pdf_path, total_pages, workers=self.extract_workers)
+            while True:
+                # 페이지 추출 시간만 계측 (소비 측의 분할/임베딩 시간은 제외)
+                start = time.perf_counter()
+                item = next(pages, None)
+                observe("rag.extract", time.perf_counter() - start)
+                if item is None:
+                    break
+                page_num, text, page_error = item
+                if page_error is not None:
+                    logging.warning(f"페이지 {page_num + 1} 처리 중 오류: {page_error}")
+                    continue
+                yield page_num, text or ""
                         
         except MemoryError:
             raise MemoryError("PDF 로드 중 메모리 부족. 파일이 너무 크거나 복잡할 수 있습니다.")
         except Exception as e:
             raise ValueError(f"PDF 파일 읽기 실패: {str(e)}")
+
+    def _strip_boilerplate(self, pages):
+        """
+        반복 머리말/꼬리말, 목차, 중복 페이지 제거
+        1차: 추출한 페이지를 임시 파일에 쓰면서 반복 줄 관찰 (메모리에 전체 문서를 올리지 않음)
+        2차: 임시 파일을 다시 읽으며 정제
+        """
+        boilerplate_filter = BoilerplateFilter()
+        with tempfile.TemporaryFile() as spool:
+            for page_num, text in pages:
+                boilerplate_filter.observe(text)
+                pickle.dump((page_num, text), spool)
+            spool.seek(0)
+            while True:
+                try:
+                    page_num, text = pickle.load(spool)
+                except EOFError:
+                    break
+                with span("rag.clean"):
+                    cleaned = boilerplate_filter.clean(text)
+                yield page_num, cleaned
         
-        if not documents:
-            raise ValueError(f"PDF 파일에서 텍스트를 추출할 수 없습니다: {self.pdf_path}")
-        
-        logging.info(f"총 {len(documents)}개 페이지에서 텍스트 추출 완료")
+        stats = boilerplate_filter.stats
+        # 제거된 글자 수로 환산한 청크 수 (청크 간 겹침 고려)
+        stats["chunks_removed_est"] = stats["chars_removed"] // (self.CHUNK_SIZE - self.CHUNK_OVERLAP)
+        self.cleaning_stats = stats
+        logging.info(
+            f"반복 문구 제거: {stats['chars_removed']:,}/{stats['chars_before']:,}자, "
+            f"{stats['lines_removed']}줄, 중복 페이지 {stats['pages_dropped']}개 "
+            f"(약 {stats['chunks_removed_est']}개 청크 감소)"
+        )
+
+    def _iter_page_documents(self):
+        """PDF 페이지를 순서대로 Document로 생성 (정제 후 텍스트가 거의 없는 페이지는 제외)"""
+        pages = self._iter_page_texts()
+        if self.STRIP_BOILERPLATE:
+            pages = self._strip_boilerplate(pages)
+        for page_num, text in pages:
+            if len(text.strip()) >= 50:
+                yield Document(
+                    page_content=text,
+                    metadata={'page': page_num, 'page_label': page_num + 1}
+                )
 
-        # 2. 텍스트 분할 (Chunking)
+    def _extract_facts(self, page_documents):
+        """페이지를 그대로 흘려보내면서 수치 데이터를 추출해 self.numeric_facts에 모음"""
+        self.numeric_facts = []
+        for page_document in page_documents:
+            with span("rag.numeric_extract"):
+                self.numeric_facts.extend(
+                    extract_facts(page_document.page_content, page_document.metadata['page_label'])
+                )
+            yield page_document
+
+    def _fingerprint_pages(self, page_documents):
+        """페이지를 그대로 흘려보내면서 정제된 텍스트의 지문을 self.page_fingerprints에 기록"""
+        self.page_fingerprints = {}
+        for page_document in page_documents:
+            self.page_fingerprints[page_document.metadata['page_label']] = page_fingerprint(page_document.page_content)
+            yield page_document
+
+    def _iter_chunk_vectors(self, page_documents):
+        """
+        (청크, 벡터 또는 None) 생성
+        이전 버전에 같은 내용의 페이지가 있으면 분할/임베딩 없이 그 페이지의 청크와 벡터를 복사
+        """
+        for page_document in page_documents:
+            page = page_document.metadata['page_label']
+            reused = self._previous.chunks(self.page_fingerprints[page], page) if self._previous else None
+            if reused is not None:
+                self.reuse_stats["chunks_reused"] += len(reused)
+                yield from reused
+                continue
+            for chunk in self._iter_chunks([page_document]):
+                yield chunk, None
+
+    def _iter_chunks(self, page_documents):
+        """페이지 단위로 분할하여 청크 생성 (전체 문서를 메모리에 올리지 않음)"""
         # 적절한 청크 크기로 품질 유지
         text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1500,  # 원래대로 복원 (2GB면 충분)
-            chunk_overlap=300,
-            length_function=len
+            chunk_size=self.CHUNK_SIZE,  # 원래대로 복원 (2GB면 충분)
+            chunk_overlap=self.CHUNK_OVERLAP,
+            length_function=len,
+            add_start_index=True  # 검색 후 겹치는 청크 병합에 사용
         )
+        for page_document in page_documents:
+            with span("rag.split"):
+                chunks = text_splitter.split_documents([page_document])
+            for chunk in chunks:
+                # 청크에도 페이지 메타데이터 유지
+                if 'page' in chunk.metadata and 'page_label' not in chunk.metadata:
+                    chunk.metadata['page_label'] = chunk.metadata['page'] + 1
+                yield chunk
+
+    def _add_chunk_batch(self, vector_store, chunks, embeddings, vectors=None):
+        """
+        청크 배치를 임베딩하여 FAISS 인덱스에 추가 (첫 배치에서 인덱스 생성)
+        vectors: 청크별 기존 벡터 (None인 청크만 임베딩)
+        """
+        texts = [chunk.page_content for chunk in chunks]
+        metadatas = [chunk.metadata for chunk in chunks]
+        vectors = list(vectors) if vectors is not None else [None] * len(chunks)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            with span("rag.embed"):
+                embedded = embeddings.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+        text_embeddings = list(zip(texts, vectors))
+        with span("rag.faiss_add"):
+            if vector_store is None:
+                return FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas)
+            vector_store.add_embeddings(text_embeddings, metadatas=metadatas)
+        return vector_store
+
+    def _build_vector_db(self, embeddings):
+        """
+        PDF를 스트리밍 방식으로 벡터 DB(FAISS)에 저장
+        페이지 추출 → 분할 → 고정 크기 배치 임베딩 → 인덱스에 증분 추가
+        (최대 메모리는 문서 크기가 아닌 배치 크기에 비례하므로 페이지 수 제한 없음)
+        """
+        if isinstance(embeddings, CachedEmbeddings):
+            embeddings.reset_stats()
+
+        vector_store = None
+        batch = []
+        batch_vectors = []
+        pages_seen = set()
+        total_chunks = 0
+        self.reuse_stats = {"chunks_reused": 0} if self._previous is not None else None
         
-        logging.info("텍스트 분할 시작")
-        texts = text_splitter.split_documents(documents)
+        page_documents = self._fingerprint_pages(self._extract_facts(self._iter_page_documents()))
+        for chunk, vector in self._iter_chunk_vectors(page_documents):
+            batch.append(chunk)
+            batch_vectors.append(vector)
+            pages_seen.add(chunk.metadata['page'])
+            if len(batch) >= self.INDEX_BATCH_SIZE:
+                vector_store = self._add_chunk_batch(vector_store, batch, embeddings, batch_vectors)
+                total_chunks += len(batch)
+                batch = []
+                batch_vectors = []
+                gc.collect()
+                logging.info(f"임베딩 진행: {total_chunks}개 청크 ({len(pages_seen)}개 페이지)")
         
-        # 원본 documents 메모리 해제
-        del documents
-        gc.collect()
+        if batch:
+            vector_store = self._add_chunk_batch(vector_store, batch, embeddings, batch_vectors)
+            total_chunks += len(batch)
+            batch = []
+            batch_vectors = []
         
-        # 청크에도 페이지 메타데이터 유지
-        for text in texts:
-            if 'page' in text.metadata and 'page_label' not in text.metadata:
-                text.metadata['page_label'] = text.metadata['page'] + 1
-
-        # 3. 임베딩 및 벡터 저장소 생성
-        logging.info(f"임베딩 생성 시작 ({len(texts)}개 청크)")
-        embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            openai_api_key=self.api_key
-        )
-        self.vector_store = FAISS.from_documents(texts, embeddings)
+        if vector_store is None:
+            raise ValueError(f"PDF 파일에서 텍스트를 추출할 수 없습니다: {self.pdf_path}")
         
+        logging.info(f"총 {len(pages_seen)}개 페이지, {total_chunks}개 청크 임베딩 완료")
+        if self.reuse_stats is not None:
+            self.reuse_stats["chunks_embedded"] = total_chunks - self.reuse_stats["chunks_reused"]
+            logging.info(f"이전 버전에서 {self.reuse_stats['chunks_reused']}개 청크 재사용")
+        logging.info(f"수치 데이터 {len(self.numeric_facts)}건 추출")
+        if isinstance(embeddings, CachedEmbeddings):
+            self.embedding_stats = embeddings.stats()
+            logging.info(f"임베딩 캐시: 적중 {self.embedding_stats['hits']}개 / 미스 {self.embedding_stats['misses']}개")
         logging.info("벡터 DB 생성 완료")
         
-        # texts 메모리 해제
-        del texts
         gc.collect()
+        return vector_store
 
-    def ask(self, question):
-        """질문에 대해 근거를 찾아 답변"""
-        
-        # 상세하고 구조화된 답변을 위한 프롬프트
-        prompt_template = """
-        당신은 전문 ESG 규제 검토관입니다. 아래 [Context]에 제공된 내용을 바탕으로 질문에 상세하고 구체적으로 답하십시오.
+    def _build_qa_chain(self):
+        """LLM 클라이언트와 답변 체인을 엔진당 한 번만 생성 (질문마다 재사용)"""
+        self.llm = make_chat_model(
+            self.LLM_MODEL,
+            self.api_key,
+            request_timeout=60  # OpenAI API 타임아웃 설정 (60초)
+        )
+        prompt = PromptTemplate(
+            template=PROMPT_TEMPLATE, input_variables=["context", "question"]
+        )
+        # "stuff" 방식: 검색된 청크를 모두 [Context]에 넣어 한 번에 답변
+        self.qa_chain = load_qa_chain(self.llm, chain_type="stuff", prompt=prompt)
 
-        답변 작성 지침:
-        1. [Context]에서 질문과 관련된 모든 정보를 찾아 종합적으로 답변하세요.
-        2. 수치, 날짜, 단위, 방법론, 기준, 목표 등 구체적 정보가 있으면 반드시 포함하세요.
-        3. 관련 키워드나 유사 표현이 사용된 경우도 포함하세요 (예: Scope 3 = 범위 3, GHG Protocol = 온실가스 프로토콜).
-        4. 여러 페이지에 걸쳐 정보가 있으면 모두 종합하여 답변하세요.
-        5. 수치나 데이터가 있다면: "XX tCO2eq (연도: YYYY)" 형식으로 명확히 표시하세요.
-        6. 방법론이 언급되면: "GHG Protocol의 Scope 3 Guidance를 적용하여..."처럼 구체적으로 설명하세요.
-        7. [Context]에 정말로 관련 내용이 전혀 없을 때만 "보고서에서 해당 내용을 찾을 수 없습니다"라고 답하세요.
-        8. 답변은 2-4문장으로 간결하되 구체적으로 작성하세요.
+    def _retrieve_many(self, questions):
+        """
+        여러 질문의 관련 청크를 한 번에 검색 (질문 임베딩 1회 요청 + FAISS 배치 검색 1회)
+        RETRIEVAL_MODE에 따라 BM25 순위를 함께 사용
+        검색된 청크는 프롬프트에 넣을 형태로 조립하여 반환 (겹침 병합, 중복 제거, 토큰 예산)
+        """
+        questions = list(questions)
+        use_lexical = self.lexical_index is not None and self.RETRIEVAL_MODE != "vector"
+        lexical = [None] * len(questions)
+        if use_lexical:
+            with span("rag.lexical_search"):
+                lexical = [self.lexical_index.search(question, self.FETCH_K) for question in questions]
 
-        [Context]:
-        {context}
+        # lexical_first: 어휘 일치가 강한 질문은 임베딩/벡터 검색 생략
+        vector_positions = [
+            position for position, result in enumerate(lexical)
+            if not (self.RETRIEVAL_MODE == "lexical_first" and result and result[2] >= self.LEXICAL_MIN_STRENGTH)
+        ]
+        if len(vector_positions) < len(questions):
+            increment("retrieval_lexical_only", len(questions) - len(vector_positions))
 
-        [Question]:
-        {question}
+        vector_rankings = {}
+        if vector_positions:
+            with span("rag.query_embed"):
+                query_vectors = np.asarray(
+                    self.embeddings.embed_documents([questions[position] for position in vector_positions]),
+                    dtype=np.float32
+                )
+            index = self.vector_store.index
+            with span("rag.search"):
+                _, indices = index.search(query_vectors, self.FETCH_K if self.USE_MMR or use_lexical else self.TOP_K)
+            for position, query_vector, row in zip(vector_positions, query_vectors, indices):
+                row = [int(i) for i in row if i != -1]
+                if self.USE_MMR and row:
+                    with span("rag.mmr"):
+                        candidates = [index.reconstruct(i) for i in row]
+                        selected = maximal_marginal_relevance(
+                            query_vector, candidates, lambda_mult=self.MMR_LAMBDA, k=self.TOP_K
+                        )
+                    row = [row[j] for j in selected]
+                vector_rankings[position] = row
 
-        [Answer]:
-        """
-        
-        PROMPT = PromptTemplate(
-            template=prompt_template, input_variables=["context", "question"]
-        )
-        # RAG 체인 생성
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=ChatOpenAI(
-                model="gpt-4o", 
-                temperature=0, 
-                openai_api_key=self.api_key,
-                request_timeout=60  # OpenAI API 타임아웃 설정 (60초)
-            ),
-            chain_type="stuff",
-            retriever=self.vector_store.as_retriever(
-                search_kwargs={"k": 8}  # 원래대로 복원 (더 포괄적 검색)
-            ),
-            return_source_documents=True,
-            chain_type_kwargs={"prompt": PROMPT}
-        )
-        result = qa_chain.invoke({"query": question})
-        
-        # 답변과 근거(페이지 번호) 추출
-        answer = result['result']
+        results = []
+        for position in range(len(questions)):
+            lexical_ranking = lexical[position][0] if use_lexical else None
+            if position not in vector_rankings:
+                row = lexical_ranking
+            elif lexical_ranking:
+                row = reciprocal_rank_fusion([vector_rankings[position], lexical_ranking])
+            else:
+                row = vector_rankings[position]
+            docs = [
+                self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[i])
+                for i in row[:self.TOP_K]
+            ]
+            with span("rag.pack"):
+                results.append(pack_context(docs, self.CONTEXT_MAX_TOKENS))
+        return results
+
+    @staticmethod
+    def _source_pages(source_documents):
+        """검색된 청크 메타데이터에서 출처 문자열과 페이지 번호 추출"""
         # 페이지 메타데이터에서 여러 키 시도
         sources = []
         source_pages = []  # 숫자 페이지 번호 리스트
-        for doc in result['source_documents']:
+        for doc in source_documents:
             page_num = None
             # page_label 우선 확인
             if 'page_label' in doc.metadata:
@@ -171,4 +577,238 @@ class ESG_RAG:
                 sources.append("Unknown페이지")
         unique_sources = list(set(sources))
         unique_pages = sorted(list(set(source_pages)))  # 숫자 페이지 번호 리스트 (중복 제거, 정렬)
+        return unique_sources, unique_pages
+
+    def _generate(self, question, source_documents):
+        """검색된 청크로 답변 생성"""
+        with span("rag.generate"):
+            result = self.qa_chain.invoke(
+                {"input_documents": source_documents, "question": question},
+                config={"callbacks": [TokenUsageCallback(chat_model_id(self.LLM_MODEL))]},
+            )
+        answer = result[self.qa_chain.output_key]
+        unique_sources, unique_pages = self._source_pages(source_documents)
         return answer, unique_sources, unique_pages
+
+    def answer_from_facts(self, metrics):
+        """
+        사전 추출한 수치로 답변 (ask와 같은 (answer, sources, pages) 형태)
+        metrics: numeric_extractor.METRICS의 지표 키 목록 (예: ["scope1", "scope2"])
+        값이 없거나 일관되지 않으면 None → 호출 측에서 ask로 확인
+        """
+        if not self.NUMERIC_FAST_PATH:
+            return None
+        return answer_from_facts(self.numeric_facts, metrics)
+
+    def _answer_config(self):
+        """답변 캐시 키에 포함되는 설정 (프롬프트/모델/검색 개수가 바뀌면 새로 답변)"""
+        return {
+            "prompt": hashlib.sha256(PROMPT_TEMPLATE.encode('utf-8')).hexdigest(),
+            "model": chat_model_id(self.LLM_MODEL),
+            "k": self.TOP_K,
+            "retrieval": self.RETRIEVAL_MODE,
+            "lexical_min_strength": self.LEXICAL_MIN_STRENGTH if self.RETRIEVAL_MODE == "lexical_first" else None,
+            "context": {
+                "max_tokens": self.CONTEXT_MAX_TOKENS,
+                "mmr": self.MMR_LAMBDA if self.USE_MMR else None,
+            },
+        }
+
+    def _cached_answer(self, question):
+        if self.answer_cache is None:
+            return None
+        try:
+            return self.answer_cache.get(make_answer_key(self.doc_hash, question, self._answer_config()))
+        except sqlite3.Error as e:
+            logging.warning(f"답변 캐시 조회 실패: {str(e)}")
+            return None
+
+    def _store_answer(self, question, result):
+        if self.answer_cache is None:
+            return
+        try:
+            self.answer_cache.put(make_answer_key(self.doc_hash, question, self._answer_config()),
+                                  self.doc_hash, result)
+        except sqlite3.Error as e:
+            logging.warning(f"답변 캐시 저장 실패: {str(e)}")
+
+    def _previous_answer(self, question, config, context_pages):
+        """
+        이전 버전의 캐시된 답변 (response, sources, pages) 중 재사용 가능한 것 (없으면 None)
+        새 [Context]가 바뀌지 않은 페이지로만 구성되고 이전 답변의 근거 페이지와 같을 때만 재사용
+        """
+        if self.page_diff is None or self.answer_cache is None:
+            return None
+        try:
+            previous = self.answer_cache.get(make_answer_key(self.previous_doc_hash, question, config))
+        except sqlite3.Error as e:
+            logging.warning(f"이전 버전 답변 조회 실패: {str(e)}")
+            return None
+        if previous is None:
+            return None
+        pages = self.page_diff.reusable(context_pages, previous[2])
+        if pages is None:
+            return None
+        increment("answers_reused")  # 작업별 수는 metrics.collect_timings 수집기의 counters에 기록
+        return previous[0], [f"{page}페이지" for page in pages], pages
+
+    def _reuse_or_generate(self, question, source_documents):
+        """바뀌지 않은 페이지만 근거로 쓰는 질문은 이전 버전 답변 재사용, 아니면 새로 생성"""
+        context_pages = self._source_pages(source_documents)[1]
+        reused = self._previous_answer(question, self._answer_config(), context_pages)
+        if reused is not None:
+            return reused
+        return self._generate(question, source_documents)
+
+    def ask(self, question, use_cache=True):
+        """질문에 대해 근거를 찾아 답변 (use_cache=False면 답변 캐시를 건너뛰고 새로 생성)"""
+        if use_cache:
+            cached = self._cached_answer(question)
+            if cached is not None:
+                return cached
+        source_documents = self._retrieve_many([question])[0]
+        result = self._reuse_or_generate(question, source_documents) if use_cache else \
+            self._generate(question, source_documents)
+        self._store_answer(question, result)
+        return result
+
+    def ask_many(self, questions, max_workers=None, return_exceptions=False, on_result=None, use_cache=True):
+        """
+        여러 질문을 한 번에 처리 (결과는 질문 순서대로, ask와 같은 (answer, sources, pages) 형태)
+        - 답변 캐시에 있는 질문은 검색/LLM 호출 없이 바로 반환
+        - 나머지는 질문 임베딩 1회 요청 + FAISS 배치 검색 1회
+        - LLM 답변 생성은 스레드 풀로 동시에 실행
+        - 이전 버전과 비교 중이면 근거가 바뀌지 않은 질문은 이전 답변 재사용 (use_previous_version)
+        return_exceptions=True면 실패한 질문 자리에 예외 객체를 넣고 나머지는 계속 처리
+        on_result(index, result)는 질문 하나가 끝날 때마다 완료 순서대로 호출 (진행 상황 보고용)
+        """
+        questions = list(questions)
+        results = [None] * len(questions)
+        pending = []
+        for index, question in enumerate(questions):
+            cached = self._cached_answer(question) if use_cache else None
+            if cached is None:
+                pending.append(index)
+                continue
+            results[index] = cached
+            if on_result is not None:
+                on_result(index, cached)
+        if not pending:
+            return results
+        max_workers = max(1, min(max_workers or self.MAX_CONCURRENCY, len(pending)))
+
+        try:
+            retrieved = self._retrieve_many([questions[index] for index in pending])
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            logging.warning(f"질문 검색 중 오류: {str(e)}")
+            for index in pending:
+                results[index] = e
+            return results
+
+        generate = self._reuse_or_generate if use_cache else self._generate
+
+        def run(question, source_documents):
+            try:
+                result = generate(question, source_documents)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                logging.warning(f"질문 처리 중 오류: {str(e)}")
+                return e
+            self._store_answer(question, result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                # 스레드에서도 현재 요청의 타이밍 수집기에 기록되도록 컨텍스트 전달
+                executor.submit(run_in_context(run), questions[index], source_documents): index
+                for index, source_documents in zip(pending, retrieved)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                if on_result is not None:
+                    on_result(index, results[index])
+        return results
+
+    def ask_checklist(self, items, use_cache=True):
+        """
+        여러 점검 항목을 LLM 한 번의 구조화된(JSON) 응답으로 판정
+        items: {키: 질문}
+        반환: {키: {"found", "answer", "values", "sources", "pages"}}
+        - 항목별 검색 결과를 순위 순으로 번갈아 합친 뒤 겹침/중복 제거, 토큰 예산 적용
+        - 응답이 스키마에 맞지 않으면 ValueError
+        - 이전 버전과 비교 중이고 [Context]가 바뀌지 않은 페이지로만 구성되면 이전 응답 재사용
+        """
+        keys = list(items)
+        cache_question = json.dumps(items, sort_keys=True, ensure_ascii=False)
+        cache_key = make_answer_key(self.doc_hash, cache_question, self._checklist_config())
+        cached = None
+        if use_cache and self.answer_cache is not None:
+            try:
+                cached = self.answer_cache.get(cache_key)
+            except sqlite3.Error as e:
+                logging.warning(f"답변 캐시 조회 실패: {str(e)}")
+
+        if cached is not None:
+            response_text, _, context_pages = cached
+        else:
+            retrieved = self._retrieve_many([items[key] for key in keys])
+            interleaved = [doc for group in zip_longest(*retrieved) for doc in group if doc is not None]
+            context_documents = pack_context(interleaved, self.CHECKLIST_MAX_TOKENS)
+            context_pages = self._source_pages(context_documents)[1]
+            response_text = self._previous_checklist(cache_question, keys, context_pages) if use_cache else None
+            if response_text is None:
+                prompt = checklist.CHECKLIST_PROMPT.format(
+                    items=checklist.format_items(items),
+                    context=checklist.format_context(context_documents),
+                )
+                with span("rag.generate_checklist"):
+                    message = self.llm.bind(response_format={"type": "json_object"}).invoke(
+                        prompt, config={"callbacks": [TokenUsageCallback(chat_model_id(self.LLM_MODEL))]}
+                    )
+                response_text = message.content
+        parsed = checklist.parse_response(response_text, keys)
+
+        results = {}
+        for key in keys:
+            item = parsed[key]
+            # 근거 페이지는 실제로 [Context]에 들어간 페이지만 인정
+            pages = sorted(set(item.pages) & set(context_pages))
+            results[key] = {
+                "found": item.found,
+                "answer": item.summary,
+                "values": [value.dict() for value in item.values],
+                "sources": [f"{page}페이지" for page in pages],
+                "pages": pages,
+            }
+
+        if cached is None and self.answer_cache is not None:
+            try:
+                self.answer_cache.put(cache_key, self.doc_hash,
+                                      (response_text, [], context_pages))
+            except sqlite3.Error as e:
+                logging.warning(f"답변 캐시 저장 실패: {str(e)}")
+        return results
+
+    def _previous_checklist(self, cache_question, keys, context_pages):
+        """이전 버전의 체크리스트 응답을 재사용할 수 있으면 근거 페이지를 새 번호로 바꾼 JSON (없으면 None)"""
+        previous = self._previous_answer(cache_question, self._checklist_config(), context_pages)
+        if previous is None:
+            return None
+        try:
+            parsed = checklist.parse_response(previous[0], keys)
+        except ValueError:
+            return None
+        old_to_new = self.page_diff.old_to_new
+        items = {
+            key: dict(item.dict(), pages=[old_to_new[page] for page in item.pages if page in old_to_new])
+            for key, item in parsed.items()
+        }
+        return json.dumps({"items": items}, ensure_ascii=False)
+
+    def _checklist_config(self):
+        return dict(self._answer_config(), checklist_prompt=checklist.PROMPT_HASH,
+                    checklist_max_tokens=self.CHECKLIST_MAX_TOKENS)
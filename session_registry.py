@@ -0,0 +1,128 @@
+"""
+문서별 RAG 엔진 세션 레지스트리
+- 문서 해시를 키로 인덱싱이 끝난 ESG_RAG를 프로세스 메모리에 유지
+- 같은 보고서에 대한 기본 검토/고도화 분석/추가 질문이 인덱스를 재사용
+- 메모리 예산을 넘으면 가장 오래 사용하지 않은 엔진부터 제거 (LRU)
+- 다른 워커에서 인덱싱한 문서는 인덱스 캐시(mmap)에서 바로 열어 등록
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+from index_cache import file_sha256
+
+
+SESSION_MAX_BYTES = int(os.getenv("ESG_SESSION_MAX_MB", "512")) * 1024 * 1024
+
+
+def estimate_engine_bytes(rag):
+    """
+    엔진이 차지하는 프로세스 메모리 추정 (벡터 + 청크 텍스트/메타데이터 + BM25 색인)
+    mmap으로 연 인덱스/청크는 워커 간 공유되는 페이지 캐시이므로 제외
+    """
+    vector_store = rag.vector_store
+    index = vector_store.index
+    if getattr(vector_store.docstore, 'shared', False):
+        vector_bytes = text_bytes = 0
+    else:
+        # float16/8비트 양자화 인덱스는 벡터당 바이트가 작음
+        vector_bytes = index.ntotal * index.sa_code_size()
+        text_bytes = vector_store.docstore.nbytes()
+    lexical_bytes = rag.lexical_index.nbytes() if rag.lexical_index is not None else 0
+    return vector_bytes + text_bytes + lexical_bytes
+
+
+class SessionRegistry:
+    """프로세스 내 ESG_RAG 엔진 LRU 저장소"""
+
+    def __init__(self, max_bytes=SESSION_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._engines = OrderedDict()  # doc_hash -> (rag, bytes)
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def get(self, doc_hash):
+        """상주 중인 엔진 반환 (없으면 None)"""
+        with self._lock:
+            entry = self._engines.get(doc_hash)
+            if entry is None:
+                return None
+            self._engines.move_to_end(doc_hash)
+            return entry[0]
+
+    def get_or_create(self, pdf_path, api_key, doc_hash=None, previous_doc_hash=None):
+        """
+        문서 해시에 해당하는 엔진을 반환하고, 없으면 생성하여 등록
+        previous_doc_hash: 같은 보고서의 이전 버전 (바뀌지 않은 페이지의 인덱스/답변 재사용)
+        """
+        from rag_engine import ESG_RAG
+
+        doc_hash = doc_hash or file_sha256(pdf_path)
+        rag = self._get_or_build(doc_hash, lambda: ESG_RAG(pdf_path, api_key, doc_hash=doc_hash,
+                                                           previous_doc_hash=previous_doc_hash))
+        if previous_doc_hash and rag.previous_doc_hash != previous_doc_hash:
+            rag.use_previous_version(previous_doc_hash)
+        return rag
+
+    def open(self, doc_hash, api_key):
+        """
+        상주 중이 아니면 인덱스 캐시에서 PDF 없이 열어 등록 (캐시에 없으면 None)
+        다른 워커나 작업 러너가 인덱싱한 문서의 추가 질문을 아무 워커에서나 처리하기 위함
+        """
+        from rag_engine import ESG_RAG
+
+        return self._get_or_build(doc_hash, lambda: ESG_RAG.from_cache(doc_hash, api_key))
+
+    def _get_or_build(self, doc_hash, build):
+        rag = self.get(doc_hash)
+        if rag is not None:
+            logging.info(f"세션 재사용: {doc_hash[:12]}")
+            return rag
+
+        # 같은 문서를 여러 스레드가 동시에 인덱싱하지 않도록 문서 단위 락
+        with self._lock:
+            build_lock = self._build_locks.setdefault(doc_hash, threading.Lock())
+        try:
+            with build_lock:
+                rag = self.get(doc_hash)
+                if rag is None:
+                    rag = build()
+                    if rag is not None:
+                        self._put(doc_hash, rag)
+        finally:
+            with self._lock:
+                self._build_locks.pop(doc_hash, None)
+        return rag
+
+    def _put(self, doc_hash, rag):
+        size = estimate_engine_bytes(rag)
+        with self._lock:
+            self._engines[doc_hash] = (rag, size)
+            self._engines.move_to_end(doc_hash)
+            total = sum(entry_size for _, entry_size in self._engines.values())
+            # 방금 등록한 엔진은 예산을 넘더라도 유지
+            while total > self.max_bytes and len(self._engines) > 1:
+                evicted_hash, (_, evicted_size) = self._engines.popitem(last=False)
+                total -= evicted_size
+                logging.info(f"세션 제거 (LRU): {evicted_hash[:12]} ({evicted_size / (1024 * 1024):.1f}MB)")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._engines),
+                "bytes": sum(size for _, size in self._engines.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+_registry = None
+
+
+def get_registry():
+    """프로세스 공용 레지스트리"""
+    global _registry
+    if _registry is None:
+        _registry = SessionRegistry()
+    return _registry
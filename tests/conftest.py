@@ -0,0 +1,23 @@
+"""
+테스트 공통 설정
+- 프로젝트 모듈이 import 시점에 환경변수를 읽으므로 import 전에 오프라인 백엔드와 임시 캐시 경로 지정
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_TMP = tempfile.mkdtemp(prefix="esg-tests-")
+os.environ.update(
+    ESG_BACKEND="offline",
+    OPENAI_API_KEY="offline",
+    ESG_INDEX_CACHE_DIR=os.path.join(_TMP, "faiss"),
+    ESG_EMBEDDING_CACHE="0",
+    ESG_ANSWER_CACHE_PATH=os.path.join(_TMP, "answers.sqlite"),
+    ESG_JOB_DB_PATH=os.path.join(_TMP, "jobs.sqlite"),
+    ESG_METRICS_DIR=os.path.join(_TMP, "metrics"),
+    ESG_CORPUS="0",
+)
@@ -0,0 +1,23 @@
+"""반복 머리말/꼬리말 제거"""
+
+from boilerplate import BoilerplateFilter
+
+
+def _page(number, body):
+    return "\n".join(["ACME Sustainability Report 2023", *body, "Environmental Performance", f"- {number} -"])
+
+
+def test_repeated_edge_lines_removed_only_at_edges():
+    body = ["Intro line one", "Intro line two", "Intro line three", "Intro line four",
+            "Environmental Performance", "Details about emissions", "More details", "Even more details",
+            "Closing line one", "Closing line two", "Closing line three", "Closing line four"]
+    pages = [_page(number, [f"{line} p{number}" if line != "Environmental Performance" else line for line in body])
+             for number in range(1, 7)]
+    boilerplate = BoilerplateFilter()
+    for page in pages:
+        boilerplate.observe(page)
+    cleaned = boilerplate.clean(pages[0]).splitlines()
+    assert "ACME Sustainability Report 2023" not in cleaned
+    assert "- 1 -" not in cleaned
+    # 꼬리말과 같은 문장이라도 본문 가운데 있으면 유지
+    assert cleaned.count("Environmental Performance") == 1
@@ -0,0 +1,17 @@
+"""이전 버전과의 페이지 비교"""
+
+from incremental import PageDiff
+
+
+def test_edited_page_is_changed_not_removed():
+    diff = PageDiff({1: "a", 2: "b", 3: "c"}, {1: "a", 2: "B", 3: "c"})
+    assert diff.changed_pages == [2]
+    assert diff.removed_pages == []
+    assert diff.new_to_old == {1: 1, 3: 3}
+
+
+def test_deleted_page_shifts_later_pages():
+    diff = PageDiff({1: "a", 2: "b", 3: "c", 4: "d"}, {1: "a", 2: "c", 3: "d"})
+    assert diff.changed_pages == []
+    assert diff.removed_pages == [2]
+    assert diff.new_to_old == {1: 1, 2: 3, 3: 4}
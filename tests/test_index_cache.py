@@ -0,0 +1,48 @@
+"""인덱스 캐시 빌드 락"""
+
+import os
+import threading
+import time
+
+from index_cache import IndexCache
+
+
+def _lock_files(root):
+    return [name for name in os.listdir(root) if name.startswith(".build-")]
+
+
+def test_build_lock_leaves_no_lock_file(tmp_path):
+    cache = IndexCache(str(tmp_path))
+    with cache.build_lock("a" * 64):
+        assert _lock_files(tmp_path)
+    assert _lock_files(tmp_path) == []
+
+
+def test_build_lock_is_exclusive_across_unlink(tmp_path):
+    cache = IndexCache(str(tmp_path))
+    inside = []
+    overlaps = []
+
+    def build():
+        for _ in range(20):
+            with cache.build_lock("b" * 64):
+                inside.append(1)
+                if len(inside) > 1:
+                    overlaps.append(1)
+                time.sleep(0.001)
+                inside.pop()
+
+    threads = [threading.Thread(target=build) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == []
+    assert _lock_files(tmp_path) == []
+
+
+def test_eviction_removes_orphaned_lock_files(tmp_path):
+    (tmp_path / ".build-old.lock").write_text("")
+    cache = IndexCache(str(tmp_path))
+    cache._evict_locked()
+    assert _lock_files(tmp_path) == []
@@ -0,0 +1,47 @@
+"""분석 작업 러너: 이전 버전을 지정한 작업의 리포트에 증분 재사용 통계가 실리는지"""
+
+import os
+
+from benchmarks.synthetic_pdf import make_pdf
+from index_cache import file_sha256
+from job_queue import JobQueue
+from job_runner import run_analyze_job
+
+
+def _revise(path, revised_path):
+    """한 페이지의 문구만 바꾼 새 버전 PDF"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    start = data.find(b"demonstrating decoupling")
+    assert start >= 0
+    with open(revised_path, 'wb') as f:
+        f.write(data[:start] + b"demonstrating DEcoupling" + data[start + 24:])
+
+
+def _run(queue, pdf_path, **payload):
+    payload = dict(payload, pdf_path=pdf_path, doc_hash=file_sha256(pdf_path))
+    job_id = queue.submit("analyze", payload)
+    return run_analyze_job(queue, queue.get(job_id))
+
+
+def test_analyze_job_reports_incremental_stats(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    v1 = make_pdf(str(tmp_path / "v1.pdf"), 20)
+    v2 = str(tmp_path / "v2.pdf")
+    _revise(v1, v2)
+
+    first = _run(queue, v1)
+    assert first["incremental"] is None
+
+    second = _run(queue, v2, previous_doc_hash=first["doc_hash"])
+    incremental = second["incremental"]
+    assert incremental is not None
+    assert incremental["previous_doc_hash"] == first["doc_hash"]
+    assert incremental["pages_changed"] == 1
+    assert incremental["pages_removed"] == 0
+    assert incremental["answers_reused"] > 0
+    assert incremental["answers_reused"] == second["timings"]["counters"]["answers_reused"]
+
+    # 같은 엔진으로 이전 버전 없이 다시 분석하면 증분 통계 없음
+    third = _run(queue, v2)
+    assert third["incremental"] is None
@@ -0,0 +1,39 @@
+"""수치 사전 추출: 목표 연도/목표 열의 값이 실적으로 답변되지 않는지"""
+
+from numeric_extractor import extract_facts, answer_from_facts
+
+
+TABLE = "구분 2021 2022 2023\nScope 1 배출량 1,234 1,180 1,102 tCO2eq"
+
+
+def test_table_latest_year():
+    facts = extract_facts(TABLE, 3)
+    assert answer_from_facts(facts, ["scope1"]) == ("Scope 1 배출량: 1,102 tCO2eq (2023년) - 3페이지", ["3페이지"], [3])
+
+
+def test_target_sentence_does_not_win():
+    facts = extract_facts(TABLE, 3) + extract_facts("2030년까지 Scope 1 배출량을 500 tCO2eq 이하로 감축", 5)
+    assert answer_from_facts(facts, ["scope1"])[0] == "Scope 1 배출량: 1,102 tCO2eq (2023년) - 3페이지"
+
+
+def test_target_sentence_alone_is_not_confident():
+    facts = extract_facts("We aim to reduce Scope 1 emissions to 500 tCO2eq by 2030.", 5)
+    assert answer_from_facts(facts, ["scope1"]) is None
+
+
+def test_target_column_in_header():
+    facts = extract_facts("구분 2021 2022 2023 2030 목표\nScope 1 배출량 1,234 1,180 1,102 900 tCO2eq", 4)
+    assert [fact["year"] for fact in facts] == [2021, 2022, 2023, None]
+    assert answer_from_facts(facts, ["scope1"])[0] == "Scope 1 배출량: 1,102 tCO2eq (2023년) - 4페이지"
+
+
+def test_target_sentence_is_not_a_header():
+    facts = extract_facts("2019년 대비 2030년까지 온실가스 배출 감축\nScope 1 배출량 1,234 1,180 tCO2eq", 4)
+    assert all(fact["year"] is None and not fact["table"] for fact in facts)
+    assert answer_from_facts(facts, ["scope1"]) is None
+
+
+def test_header_ends_with_table():
+    text = TABLE + "\n당사는 감축 활동을 추진하고 있습니다.\nScope 2 배출량 800 790 700 tCO2eq"
+    facts = [fact for fact in extract_facts(text, 3) if fact["metric"] == "scope2"]
+    assert all(fact["year"] is None and not fact["table"] for fact in facts)
@@ -0,0 +1,136 @@
+"""
+업로드 PDF 저장소 (내용 주소 기반)
+- 요청 본문의 파일 부분을 받는 즉시 청크 단위로 임시 파일에 기록하면서 SHA-256 계산 (저장 후 다시 읽지 않음)
+- 크기 제한을 넘는 순간 수신 중단 (전체를 저장한 뒤 크기를 확인하지 않음)
+- 파일은 <sha256>.pdf로 저장: 같은 보고서는 한 번만 저장되고, 이름이 같은 다른 보고서도 서로 덮어쓰지 않음
+- 업로드 파일명은 최신 업로드를 가리키는 심볼릭 링크(별칭)로 유지
+계산한 해시는 인덱스/답변 캐시의 문서 키(doc_hash)로 그대로 사용
+"""
+
+import os
+import re
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+UPLOAD_MAX_MB = int(os.getenv("ESG_UPLOAD_MAX_MB", "100"))
+UPLOAD_MAX_BYTES = UPLOAD_MAX_MB * 1024 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+STALE_PART_SECONDS = 3600  # 중단된 업로드의 임시 파일 정리 기준
+
+PART_PREFIX = ".upload-"
+_HASH_NAME_RE = re.compile(r"^[0-9a-f]{64}\.pdf$")
+
+
+class UploadTooLarge(RequestEntityTooLarge):
+    description = f"파일이 너무 큽니다. {UPLOAD_MAX_MB}MB 이하만 가능합니다."
+
+
+class HashingSpool:
+    """쓰는 동안 SHA-256과 크기를 계산하는 임시 파일 (commit하지 않고 닫으면 삭제)"""
+
+    def __init__(self, directory, max_bytes):
+        fd, self.path = tempfile.mkstemp(prefix=PART_PREFIX, suffix=".part", dir=directory)
+        self._file = os.fdopen(fd, 'w+b')
+        self._digest = hashlib.sha256()
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.committed = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.close()
+            raise UploadTooLarge()
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+    def close(self):
+        self._file.close()
+        if not self.committed and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        # read/seek/tell/flush 등은 임시 파일에 위임 (werkzeug FileStorage가 사용)
+        return getattr(self._file, name)
+
+
+class UploadStore:
+    """uploads 디렉토리의 내용 주소 기반 PDF 저장소"""
+
+    def __init__(self, root, max_bytes=UPLOAD_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+        self._remove_stale_parts()
+
+    def _remove_stale_parts(self):
+        cutoff = time.time() - STALE_PART_SECONDS
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if name.startswith(PART_PREFIX) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def open_spool(self):
+        """요청 파싱 중 파일 부분을 받을 임시 파일"""
+        return HashingSpool(self.root, self.max_bytes)
+
+    def path_for(self, doc_hash):
+        """해시에 해당하는 저장 파일 경로 (없으면 None)"""
+        if not re.fullmatch(r"[0-9a-f]{64}", doc_hash or ""):
+            return None
+        path = os.path.join(self.root, f"{doc_hash}.pdf")
+        return path if os.path.isfile(path) else None
+
+    def commit(self, stream, filename):
+        """
+        받은 파일을 <sha256>.pdf로 확정하고 파일명 별칭 갱신 → (저장 경로, SHA-256)
+        stream이 HashingSpool이 아니면(다른 요청 클래스로 파싱된 경우) 청크 단위로 복사하며 해시 계산
+        """
+        spool = stream
+        if not isinstance(stream, HashingSpool):
+            spool = self.open_spool()
+            try:
+                for block in iter(lambda: stream.read(COPY_CHUNK_SIZE), b''):
+                    spool.write(block)
+            except Exception:
+                spool.close()
+                raise
+        doc_hash = spool.hexdigest()
+        path = os.path.join(self.root, f"{doc_hash}.pdf")
+        spool.flush()
+        if os.path.exists(path):
+            spool.close()  # 이미 저장된 보고서: 임시 파일만 삭제
+        else:
+            os.replace(spool.path, path)
+            spool.committed = True
+            spool.close()
+        self._alias(filename, doc_hash)
+        return path, doc_hash
+
+    def _alias(self, filename, doc_hash):
+        """업로드 파일명 → 저장 파일 심볼릭 링크 (같은 이름으로 다시 올리면 최신 업로드를 가리킴)"""
+        name = os.path.basename(filename or "")
+        if not name or name.startswith('.') or _HASH_NAME_RE.match(name):
+            return
+        link_path = os.path.join(self.root, name)
+        tmp_link = os.path.join(self.root, f"{PART_PREFIX}{doc_hash[:16]}-{os.getpid()}-{threading.get_ident()}.link")
+        try:
+            if os.path.lexists(tmp_link):
+                os.remove(tmp_link)
+            os.symlink(f"{doc_hash}.pdf", tmp_link)
+            os.replace(tmp_link, link_path)
+        except OSError as e:
+            logging.warning(f"업로드 파일명 별칭 생성 실패 ({name}): {str(e)}")
+